@@ -1,10 +1,32 @@
+import asyncio
 import os
+import json
 import logging
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager, nullcontext
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Optional, Tuple, Union
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from dotenv import load_dotenv
-from app.models import UserRequest, AssistantResponse
+from app.models import UserRequest, AssistantResponse, BatchUserRequest, BatchAssistantResponse, MultiIntentResponse
 from app.services.intent_processor import IntentProcessor
+from app.services.admission import BATCH, INTERACTIVE, PRIORITIES, AdmissionController, AdmissionRejected, Permit
+from app.services.cache import ResponseCache, create_cache
+from app.services.session_store import SessionStore, create_session_store
+from app.services.web_search import WebSearchService
+from app.services.local_classifier import LocalIntentClassifier
+from app.services.entity_extractor import LocalEntityExtractor
+from app.services.http_clients import HTTPClientPool
+from app.services.endpoint_pool import EndpointPool, LLMEndpoint
+from app.services.model_router import ModelRouter, ModelTier
+from app.services.resilience import CircuitBreaker, LLMResilience
+from app.services.metrics import REGISTRY as metrics_registry
+from app.utils.prompt_compiler import PromptCompiler
+
+if TYPE_CHECKING:
+    from app.services.example_index import ExampleIndex
 
 # Load environment variables
 load_dotenv()
@@ -13,11 +35,39 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global intent_processor, http_client_pool, admission_controller
+    # Each worker builds its own processor at startup; missing configuration fails startup loudly
+    try:
+        admission_controller = create_admission_controller()
+        intent_processor, http_client_pool = create_intent_processor(
+            on_throttled=admission_controller.record_throttled if admission_controller else None
+        )
+    except Exception as e:
+        logger.error(f"Failed to initialize intent processor: {str(e)}")
+        raise
+    logger.info("Intent processor initialized successfully with Azure OpenAI")
+    # Heavy imports and client construction run in the background so startup does not wait on them
+    warm_up = asyncio.get_running_loop().run_in_executor(None, intent_processor.warm_up)
+    yield
+    await warm_up
+    # Close pooled connections, search threads and cache handles on shutdown
+    await intent_processor.aclose()
+    await http_client_pool.aclose()
+    intent_processor = None
+    http_client_pool = None
+    admission_controller = None
+
+# Per-stage latency histograms and failure counters; recording is skipped when disabled
+metrics_registry.enabled = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Personal Assistant Bot API",
     description="API for processing fuzzy user inputs and converting them to structured responses",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -29,8 +79,130 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize intent processor
-try:
+# Built per worker process during lifespan startup
+intent_processor: Optional[IntentProcessor] = None
+http_client_pool: Optional[HTTPClientPool] = None
+admission_controller: Optional[AdmissionController] = None
+
+# Default deadlines for shedding requests that could not finish in time; X-Request-Timeout overrides them
+REQUEST_DEADLINE_SECONDS = float(os.getenv("ADMISSION_DEADLINE_SECONDS", "30"))
+BATCH_REQUEST_DEADLINE_SECONDS = float(os.getenv("ADMISSION_BATCH_DEADLINE_SECONDS", "120"))
+# Larger batches are rejected up front rather than holding a slot past any deadline
+MAX_BATCH_INPUTS = int(os.getenv("MAX_BATCH_INPUTS", "100"))
+
+def create_admission_controller() -> Optional[AdmissionController]:
+    """
+    Adaptive concurrency limit and priority queue in front of the intent processor
+    """
+    if os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() != "true":
+        return None
+    return AdmissionController(
+        initial_limit=int(os.getenv("ADMISSION_INITIAL_LIMIT", "16")),
+        min_limit=int(os.getenv("ADMISSION_MIN_LIMIT", "1")),
+        max_limit=int(os.getenv("ADMISSION_MAX_LIMIT", "128")),
+        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "256")),
+        latency_target=float(os.getenv("ADMISSION_LATENCY_TARGET_SECONDS", "10")),
+        batch_share=float(os.getenv("ADMISSION_BATCH_SHARE", "0.75"))
+    )
+
+def create_intent_cache() -> Optional[ResponseCache]:
+    return create_cache(
+        backend=os.getenv("INTENT_CACHE_BACKEND", "memory"),
+        max_size=int(os.getenv("INTENT_CACHE_MAX_SIZE", "1024")),
+        ttl_seconds=float(os.getenv("INTENT_CACHE_TTL_SECONDS", "3600")),
+        path=os.getenv("INTENT_CACHE_PATH", "intent_cache.db")
+    )
+
+def create_web_search_cache() -> Optional[ResponseCache]:
+    # Entries live for the max age; after the fresh period they are served stale and refreshed
+    return create_cache(
+        backend=os.getenv("WEB_SEARCH_CACHE_BACKEND", "memory"),
+        max_size=int(os.getenv("WEB_SEARCH_CACHE_MAX_SIZE", "2048")),
+        ttl_seconds=float(os.getenv("WEB_SEARCH_CACHE_MAX_AGE_SECONDS", "86400")),
+        path=os.getenv("WEB_SEARCH_CACHE_PATH", "web_search_cache.db"),
+        table="web_search"
+    )
+
+def create_session_store_from_env() -> Optional[SessionStore]:
+    return create_session_store(
+        backend=os.getenv("SESSION_STORE_BACKEND", "memory"),
+        max_sessions=int(os.getenv("SESSION_MAX_SESSIONS", "10000")),
+        ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "1800")),
+        path=os.getenv("SESSION_STORE_PATH", "sessions.db")
+    )
+
+def create_example_index() -> Optional["ExampleIndex"]:
+    """
+    Few-shot example index built from the samples directory and an optional JSONL corpus
+    """
+    if os.getenv("FEW_SHOT_EXAMPLES_ENABLED", "true").lower() != "true":
+        return None
+    # numpy is only imported when the index is actually built
+    from app.services.example_index import ExampleIndex
+    samples_dir = os.getenv("FEW_SHOT_SAMPLES_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "samples"))
+    index = ExampleIndex.from_paths(
+        samples_dir=samples_dir,
+        corpus_path=os.getenv("FEW_SHOT_CORPUS_PATH") or None,
+        min_similarity=float(os.getenv("FEW_SHOT_MIN_SIMILARITY", "0.2"))
+    )
+    if not len(index):
+        logger.warning(f"No few-shot examples found in {samples_dir}")
+        return None
+    logger.info(f"Few-shot example index built with {len(index)} examples")
+    return index
+
+def create_model_router() -> Optional[ModelRouter]:
+    """
+    Deployment tiers from AZURE_OPENAI_DEPLOYMENT_TIERS, cheapest first, e.g. "gpt-4o-mini,gpt-4o".
+    MODEL_TIER_COSTS gives each tier's USD per 1K prompt:completion tokens, e.g. "0.00015:0.0006,0.0025:0.01";
+    MODEL_ESCALATION_THRESHOLDS overrides the confidence threshold per intent, e.g. "other=0.6,travel=0.8".
+    """
+    deployments = [name.strip() for name in os.getenv("AZURE_OPENAI_DEPLOYMENT_TIERS", "").split(",") if name.strip()]
+    if len(deployments) < 2:
+        return None
+    costs = [cost.strip() for cost in os.getenv("MODEL_TIER_COSTS", "").split(",") if cost.strip()]
+    tiers = []
+    for i, deployment in enumerate(deployments):
+        prompt_cost, _, completion_cost = costs[i].partition(":") if i < len(costs) else ("0", "", "0")
+        tiers.append(ModelTier(deployment, float(prompt_cost), float(completion_cost or 0)))
+    thresholds = {}
+    for item in os.getenv("MODEL_ESCALATION_THRESHOLDS", "").split(","):
+        if "=" in item:
+            intent, _, threshold = item.partition("=")
+            thresholds[intent.strip().lower()] = float(threshold)
+    return ModelRouter(
+        tiers,
+        default_threshold=float(os.getenv("MODEL_ESCALATION_THRESHOLD", "0.7")),
+        thresholds=thresholds
+    )
+
+def create_endpoint_pool(azure_endpoint: str, azure_api_key: str) -> Optional[EndpointPool]:
+    """
+    Extra Azure OpenAI resources from AZURE_OPENAI_ENDPOINT_2 / AZURE_OPENAI_API_KEY_2, _3, ...
+    alongside the primary endpoint. Every endpoint must serve the same deployment names.
+    """
+    endpoints = [LLMEndpoint("1", azure_endpoint, azure_api_key)]
+    n = 2
+    while os.getenv(f"AZURE_OPENAI_ENDPOINT_{n}"):
+        api_key = os.getenv(f"AZURE_OPENAI_API_KEY_{n}")
+        if not api_key:
+            raise ValueError(f"AZURE_OPENAI_API_KEY_{n} environment variable is required")
+        endpoints.append(LLMEndpoint(str(n), os.getenv(f"AZURE_OPENAI_ENDPOINT_{n}"), api_key))
+        n += 1
+    if len(endpoints) < 2:
+        return None
+    return EndpointPool(
+        endpoints,
+        drain_after=int(os.getenv("LLM_ENDPOINT_DRAIN_AFTER_FAILURES", "3")),
+        drain_seconds=float(os.getenv("LLM_ENDPOINT_DRAIN_SECONDS", "30")),
+        default_cooldown=float(os.getenv("LLM_ENDPOINT_COOLDOWN_SECONDS", "1"))
+    )
+
+def create_intent_processor(on_throttled: Optional[Callable[[], None]] = None) -> Tuple[IntentProcessor, HTTPClientPool]:
+    """
+    Build the intent processor and its HTTP pool from environment variables.
+    on_throttled is called whenever Azure OpenAI answers 429.
+    """
     # Get Azure OpenAI configuration from environment variables
     azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
     azure_api_key = os.getenv("AZURE_OPENAI_API_KEY")
@@ -45,16 +217,96 @@ try:
     if not azure_deployment:
         raise ValueError("AZURE_OPENAI_DEPLOYMENT_NAME environment variable is required")
     
-    intent_processor = IntentProcessor(
+    # Optional response cache in front of intent classification
+    cache = create_intent_cache()
+    
+    # Optional deterministic extraction of dates, times, party size and vehicle type
+    entity_extractor = None
+    if os.getenv("LOCAL_ENTITY_EXTRACTION_ENABLED", "true").lower() == "true":
+        entity_extractor = LocalEntityExtractor()
+    
+    # Optional keyword fast path that answers obvious requests without the LLM
+    local_classifier = None
+    if os.getenv("LOCAL_CLASSIFIER_ENABLED", "false").lower() == "true":
+        local_classifier = LocalIntentClassifier(
+            threshold=float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9")),
+            min_cues=int(os.getenv("LOCAL_CLASSIFIER_MIN_CUES", "2")),
+            entity_extractor=entity_extractor
+        )
+    
+    # Concurrent identical inputs and search queries share one upstream call
+    coalesce_requests = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+    
+    # Compact classification prompts with a shared static prefix and an input token budget
+    prompt_compiler = None
+    if os.getenv("COMPACT_PROMPTS_ENABLED", "true").lower() == "true":
+        prompt_compiler = PromptCompiler(
+            max_input_tokens=int(os.getenv("PROMPT_MAX_INPUT_TOKENS", "1024"))
+        )
+    
+    # Retries with jittered backoff, optional hedging and a circuit breaker around LLM calls
+    resilience = None
+    if os.getenv("LLM_RESILIENCE_ENABLED", "true").lower() == "true":
+        resilience = LLMResilience(
+            max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "3")),
+            backoff_initial=float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.2")),
+            backoff_max=float(os.getenv("LLM_RETRY_BACKOFF_MAX_SECONDS", "2")),
+            hedge=os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true",
+            hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", "0.95")),
+            breaker=CircuitBreaker(
+                failure_rate=float(os.getenv("LLM_CIRCUIT_FAILURE_RATE", "0.5")),
+                window=int(os.getenv("LLM_CIRCUIT_WINDOW", "20")),
+                min_calls=int(os.getenv("LLM_CIRCUIT_MIN_CALLS", "10")),
+                reset_timeout=float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+            )
+        )
+    
+    # Likely "other" inputs start their web search while they are still being classified
+    speculation_threshold = None
+    if os.getenv("SPECULATIVE_SEARCH_ENABLED", "false").lower() == "true":
+        speculation_threshold = float(os.getenv("SPECULATIVE_SEARCH_THRESHOLD", "0.7"))
+    
+    # Shared connection pool for Azure OpenAI with keep-alive and HTTP/2
+    http_client_pool = HTTPClientPool(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30")),
+        timeout=float(os.getenv("HTTP_TIMEOUT_SECONDS", "60")),
+        http2=os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    )
+    
+    processor = IntentProcessor(
         azure_endpoint=azure_endpoint,
         azure_api_key=azure_api_key,
         azure_deployment=azure_deployment,
-        api_version=api_version
+        api_version=api_version,
+        cache=cache,
+        batch_size=int(os.getenv("BATCH_SIZE", "10")),
+        batch_concurrency=int(os.getenv("BATCH_CONCURRENCY", "4")),
+        web_search_service=WebSearchService(
+            query_timeout=float(os.getenv("WEB_SEARCH_QUERY_TIMEOUT_SECONDS", "5")),
+            deadline=float(os.getenv("WEB_SEARCH_DEADLINE_SECONDS", "8")),
+            cache=create_web_search_cache(),
+            fresh_seconds=float(os.getenv("WEB_SEARCH_CACHE_FRESH_SECONDS", "900")),
+            coalesce=coalesce_requests
+        ),
+        local_classifier=local_classifier,
+        entity_extractor=entity_extractor,
+        merge_search_queries=os.getenv("MERGE_SEARCH_QUERIES", "false").lower() == "true",
+        http_client_pool=http_client_pool,
+        session_store=create_session_store_from_env(),
+        prompt_compiler=prompt_compiler,
+        response_format=os.getenv("LLM_RESPONSE_FORMAT", "off"),
+        resilience=resilience,
+        coalesce_requests=coalesce_requests,
+        on_throttled=on_throttled,
+        example_index=create_example_index(),
+        few_shot_k=int(os.getenv("FEW_SHOT_K", "2")),
+        model_router=create_model_router(),
+        endpoint_pool=create_endpoint_pool(azure_endpoint, azure_api_key),
+        speculation_threshold=speculation_threshold
     )
-    logger.info("Intent processor initialized successfully with Azure OpenAI")
-except Exception as e:
-    logger.error(f"Failed to initialize intent processor: {str(e)}")
-    intent_processor = None
+    return processor, http_client_pool
 
 @app.get("/")
 async def root():
@@ -64,23 +316,157 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "personal-assistant-bot", "ai_provider": "Azure OpenAI"}
 
+@app.get("/stats")
+async def stats():
+    if not intent_processor:
+        raise HTTPException(status_code=500, detail="Service not properly initialized")
+    stats = intent_processor.stats()
+    if admission_controller is not None:
+        stats["admission"] = admission_controller.stats()
+    return stats
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text exposition of pipeline latency and failure metrics
+    """
+    if not metrics_registry.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+def _request_priority(header: Optional[str], default: int) -> int:
+    if header is None:
+        return default
+    if header.lower() not in PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"X-Request-Priority must be one of: {', '.join(PRIORITIES)}")
+    return PRIORITIES[header.lower()]
+
+async def _admit(priority: int, timeout: float) -> Union[Permit, nullcontext]:
+    """
+    Take an admission slot, turning a shed request into 503 with Retry-After
+    """
+    if admission_controller is None:
+        return nullcontext()
+    try:
+        return await admission_controller.acquire(priority, timeout)
+    except AdmissionRejected as e:
+        logger.warning(f"Shedding request: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
 @app.post("/process", response_model=AssistantResponse)
-async def process_user_input(request: UserRequest) -> AssistantResponse:
+async def process_user_input(request: UserRequest,
+                             x_request_priority: Optional[str] = Header(None),
+                             x_request_timeout: Optional[float] = Header(None)) -> AssistantResponse:
     """
     Process user input and return structured response
     """
     if not intent_processor:
         raise HTTPException(status_code=500, detail="Service not properly initialized")
     
-    try:
-        logger.info(f"Processing user input: {request.user_input}")
-        response = intent_processor.process_user_input(request.user_input)
-        logger.info(f"Successfully processed input with intent: {response.intent_category}")
-        return response
+    priority = _request_priority(x_request_priority, INTERACTIVE)
+    async with await _admit(priority, x_request_timeout or REQUEST_DEADLINE_SECONDS):
+        try:
+            logger.info(f"Processing user input: {request.user_input}")
+            response = await intent_processor.aprocess_user_input(request.user_input, session_id=request.session_id)
+            logger.info(f"Successfully processed input with intent: {response.intent_category}")
+            return response
     
-    except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error processing request: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@app.post("/process/multi", response_model=MultiIntentResponse)
+async def process_multi_intent(request: UserRequest,
+                               x_request_priority: Optional[str] = Header(None),
+                               x_request_timeout: Optional[float] = Header(None)) -> MultiIntentResponse:
+    """
+    Split a compound request into one sub-request per intent and process them concurrently
+    """
+    if not intent_processor:
+        raise HTTPException(status_code=500, detail="Service not properly initialized")
+    
+    priority = _request_priority(x_request_priority, INTERACTIVE)
+    async with await _admit(priority, x_request_timeout or REQUEST_DEADLINE_SECONDS):
+        try:
+            logger.info(f"Processing multi-intent input: {request.user_input}")
+            response = await intent_processor.aprocess_multi_intent(request.user_input, session_id=request.session_id)
+            logger.info(f"Split input into {len(response.sub_requests)} sub-requests")
+            return response
+        
+        except Exception as e:
+            logger.error(f"Error processing multi-intent request: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+async def _sse_events(user_input: str, session_id: Optional[str], permit: Union[Permit, nullcontext]) -> AsyncIterator[str]:
+    """
+    Encode the processor's incremental results as Server-Sent Events
+    """
+    # The slot is held until the last event has been produced
+    async with permit:
+        try:
+            async for event, payload in intent_processor.astream_user_input(user_input, session_id=session_id):
+                yield f"event: {event}\ndata: {json.dumps(jsonable_encoder(payload))}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming request: {str(e)}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+async def _stream_response(user_input: str, session_id: Optional[str],
+                           priority_header: Optional[str], timeout: Optional[float]) -> StreamingResponse:
+    if not intent_processor:
+        raise HTTPException(status_code=500, detail="Service not properly initialized")
+    
+    permit = await _admit(_request_priority(priority_header, INTERACTIVE), timeout or REQUEST_DEADLINE_SECONDS)
+    logger.info(f"Streaming user input: {user_input}")
+    return StreamingResponse(
+        _sse_events(user_input, session_id, permit),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also releases the slot if the client disconnects before the stream starts
+        background=BackgroundTask(permit.release) if isinstance(permit, Permit) else None
+    )
+
+@app.post("/process/stream")
+async def process_user_input_stream(request: UserRequest,
+                                    x_request_priority: Optional[str] = Header(None),
+                                    x_request_timeout: Optional[float] = Header(None)) -> StreamingResponse:
+    """
+    Stream the classification first, then web search results as they arrive (SSE)
+    """
+    return await _stream_response(request.user_input, request.session_id, x_request_priority, x_request_timeout)
+
+@app.get("/process/stream")
+async def process_user_input_stream_get(user_input: str,
+                                        session_id: Optional[str] = None,
+                                        x_request_priority: Optional[str] = Header(None),
+                                        x_request_timeout: Optional[float] = Header(None)) -> StreamingResponse:
+    """
+    GET variant of /process/stream for EventSource clients
+    """
+    return await _stream_response(user_input, session_id, x_request_priority, x_request_timeout)
+
+@app.post("/process/batch", response_model=BatchAssistantResponse)
+async def process_batch(request: BatchUserRequest,
+                        x_request_priority: Optional[str] = Header(None),
+                        x_request_timeout: Optional[float] = Header(None)) -> BatchAssistantResponse:
+    """
+    Process many user inputs, packing several into each LLM call
+    """
+    if not intent_processor:
+        raise HTTPException(status_code=500, detail="Service not properly initialized")
+    if len(request.user_inputs) > MAX_BATCH_INPUTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_INPUTS} inputs per batch")
+    
+    # Batch and backfill traffic yields to interactive requests
+    priority = _request_priority(x_request_priority, BATCH)
+    async with await _admit(priority, x_request_timeout or BATCH_REQUEST_DEADLINE_SECONDS):
+        try:
+            logger.info(f"Processing batch of {len(request.user_inputs)} inputs")
+            responses = await intent_processor.aprocess_batch(request.user_inputs, web_search=request.web_search)
+            return BatchAssistantResponse(responses=responses)
+        
+        except Exception as e:
+            logger.error(f"Error processing batch request: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
@@ -38,6 +38,56 @@ class AssistantResponse(BaseModel):
     follow_up_questions: List[str] = []
     web_search_results: Optional[List[WebSearchResult]] = None
     reasoning: Optional[str] = None
+    session_id: Optional[str] = None
+    # Search queries produced alongside the classification; internal, kept out of API responses
+    # and cached beside the response by IntentProcessor
+    _search_queries: Optional[List[str]] = PrivateAttr(default=None)
+
+class LLMClassification(BaseModel):
+    """
+    Classification JSON as returned by the LLM, validated in a single pass.
+    Missing fields get the same defaults the parser has always applied.
+    """
+    intent_category: IntentCategory = IntentCategory.OTHER
+    entities: EntityModel = Field(default_factory=EntityModel)
+    confidence_score: float = Field(default=0.5, ge=0.0, le=1.0)
+    follow_up_questions: List[str] = []
+    reasoning: Optional[str] = ""
+    # Only requested by the merged classification + search query prompt
+    search_queries: Optional[List[str]] = None
+    # Only present in batch responses
+    index: Optional[int] = None
+    
+    def to_response(self) -> AssistantResponse:
+        """
+        Convert to an AssistantResponse without validating the fields again
+        """
+        response = AssistantResponse.model_construct(
+            intent_category=self.intent_category,
+            entities=self.entities,
+            confidence_score=self.confidence_score,
+            follow_up_questions=self.follow_up_questions,
+            web_search_results=None,
+            reasoning=self.reasoning,
+            session_id=None
+        )
+        if self.search_queries is not None:
+            search_queries = [q.strip() for q in self.search_queries if q.strip()]
+            response._search_queries = search_queries or None
+        return response
 
 class UserRequest(BaseModel):
-    user_input: str
\ No newline at end of file
+    user_input: str
+    session_id: Optional[str] = None
+
+class BatchUserRequest(BaseModel):
+    user_inputs: List[str]
+    web_search: bool = True
+
+class BatchAssistantResponse(BaseModel):
+    responses: List[AssistantResponse]
+
+class MultiIntentResponse(BaseModel):
+    # One entry per sub-request the input was split into, in order
+    sub_requests: List[str]
+    responses: List[AssistantResponse]
@@ -0,0 +1,83 @@
+"""
+Production entry point that runs the API on several uvicorn worker processes.
+
+    python -m app.server --workers 4 --port 8000
+
+The worker count defaults to WEB_CONCURRENCY, or one worker per available CPU
+core. Each worker builds its own IntentProcessor during lifespan startup.
+With more than one worker, the intent cache, web search cache and session
+store default to SQLite, so every worker reads the same warm, memory-mapped
+entries and follow-up turns can land on any worker. Explicit *_BACKEND
+settings are left alone.
+"""
+import argparse
+import logging
+import os
+from typing import List, Optional
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+SHARED_BACKEND_VARIABLES = ("INTENT_CACHE_BACKEND", "WEB_SEARCH_CACHE_BACKEND", "SESSION_STORE_BACKEND")
+
+
+def default_workers() -> int:
+    """
+    WEB_CONCURRENCY if set, otherwise the CPU cores this process may run on
+    """
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def share_state_between_workers(workers: int) -> None:
+    """
+    Default the caches and session store to SQLite when several workers run
+    """
+    if workers <= 1:
+        return
+    for variable in SHARED_BACKEND_VARIABLES:
+        if variable not in os.environ:
+            os.environ[variable] = "sqlite"
+            logger.info(f"{variable} defaulted to sqlite so {workers} workers share it")
+
+
+def preload() -> None:
+    """
+    Create shared state once before the workers start: the SQLite tables and
+    the tiktoken encoding file, which workers then only read
+    """
+    from app.main import create_intent_cache, create_session_store_from_env, create_web_search_cache
+    from app.utils.prompt_compiler import TokenCounter
+
+    for store in (create_intent_cache(), create_web_search_cache(), create_session_store_from_env()):
+        if store is not None:
+            store.close()
+    TokenCounter().exact
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: WEB_CONCURRENCY or CPU cores)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    # Read .env before choosing defaults so explicit settings there are respected
+    load_dotenv()
+    workers = args.workers or default_workers()
+    share_state_between_workers(workers)
+    preload()
+
+    import uvicorn
+    logger.info(f"Starting {workers} worker(s) on {args.host}:{args.port}")
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=workers, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
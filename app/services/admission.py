@@ -0,0 +1,226 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from app.services.metrics import ADMISSION_REJECTIONS, STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITIES = {"interactive": INTERACTIVE, "batch": BATCH}
+_PRIORITY_NAMES = {value: name for name, value in PRIORITIES.items()}
+
+# Weight of the newest sample in the service time averages
+_EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of queued"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Request shed ({reason}), retry after {retry_after:.0f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Permit:
+    """
+    A granted slot; releasing it more than once is a no-op
+    """
+
+    def __init__(self, controller: "AdmissionController", priority: int, started: float):
+        self.priority = priority
+        self.started = started
+        self._controller = controller
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(self)
+
+    async def __aenter__(self) -> "Permit":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """
+    Bounds how many requests run against the LLM at once and queues the rest.
+
+    The concurrency limit adapts with AIMD: it grows by roughly one slot per
+    limit's worth of completions while the slots are in use, and is cut by
+    `backoff` when Azure answers 429 or an interactive request takes longer
+    than `latency_target` (at most once per `cooldown` seconds). Waiting
+    requests are served by priority, and batch traffic may only use
+    `batch_share` of the limit, so interactive requests always find room.
+    A request that cannot start in time to finish before its deadline, or
+    that finds the queue full, is rejected immediately with a retry hint.
+    """
+
+    def __init__(self, initial_limit: int = 16, min_limit: int = 1, max_limit: int = 128, max_queue: int = 256,
+                 latency_target: float = 10.0, backoff: float = 0.7, batch_share: float = 0.75,
+                 cooldown: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self.max_queue = max_queue
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.batch_share = batch_share
+        self.cooldown = cooldown
+        self.clock = clock
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+        self.throttled = 0
+        self.decreases = 0
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+        self._service_time: Dict[int, float] = {}
+        self._last_decrease = -math.inf
+        # 429s may be reported from worker threads, so limit changes are locked
+        self._lock = threading.Lock()
+
+    async def acquire(self, priority: int = INTERACTIVE, timeout: Optional[float] = None) -> Permit:
+        """
+        Wait for a slot. timeout is the request's whole deadline, so a request
+        is shed once the time left would not cover its expected service time.
+        """
+        now = self.clock()
+        if self._has_room(priority) and not self._waiting_ahead(priority):
+            return self._admit(priority, now)
+
+        wait = self._estimated_wait(priority)
+        service = self._service_time.get(priority, 0.0)
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full", priority, wait)
+        if timeout is not None and wait + service > timeout:
+            self._reject("deadline", priority, wait)
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._sequence), future]
+        heapq.heappush(self._waiters, entry)
+        try:
+            with STAGE_LATENCY.time("admission_wait"):
+                budget = None if timeout is None else max(0.0, timeout - service)
+                return await asyncio.wait_for(future, budget)
+        except asyncio.TimeoutError:
+            self._remove(entry)
+            self._reject("deadline", priority, self._estimated_wait(priority))
+        except asyncio.CancelledError:
+            # The slot may have been granted just as the caller went away
+            if future.done() and not future.cancelled():
+                future.result().release()
+            self._remove(entry)
+            raise
+
+    def record_throttled(self) -> None:
+        """
+        Report a 429 from the LLM; may be called from any thread
+        """
+        with self._lock:
+            self.throttled += 1
+        self._decrease("rate limited")
+
+    def _has_room(self, priority: int) -> bool:
+        return self.in_flight < self._capacity(priority)
+
+    def _capacity(self, priority: int) -> int:
+        limit = int(self.limit)
+        if priority == INTERACTIVE:
+            return limit
+        return max(1, int(limit * self.batch_share))
+
+    def _waiting_ahead(self, priority: int) -> int:
+        return sum(1 for waiter in self._waiters if waiter[0] <= priority and not waiter[2].done())
+
+    def _estimated_wait(self, priority: int) -> float:
+        """
+        Seconds until a new request of this priority would likely start
+        """
+        if self._has_room(priority) and not self._waiting_ahead(priority):
+            return 0.0
+        service = self._mean_service_time()
+        return (self._waiting_ahead(priority) + 1) * service / self._capacity(priority)
+
+    def _mean_service_time(self) -> float:
+        if not self._service_time:
+            return self.latency_target
+        return sum(self._service_time.values()) / len(self._service_time)
+
+    def _admit(self, priority: int, now: float) -> Permit:
+        self.in_flight += 1
+        self.admitted += 1
+        return Permit(self, priority, now)
+
+    def _reject(self, reason: str, priority: int, wait: float) -> None:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        ADMISSION_REJECTIONS.inc(reason, _PRIORITY_NAMES.get(priority, str(priority)))
+        raise AdmissionRejected(reason, retry_after=max(1.0, math.ceil(wait or self._mean_service_time())))
+
+    def _remove(self, entry: list) -> None:
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    def _release(self, permit: Permit) -> None:
+        elapsed = self.clock() - permit.started
+        busy = self.in_flight
+        self.in_flight -= 1
+        previous = self._service_time.get(permit.priority)
+        self._service_time[permit.priority] = elapsed if previous is None else (
+            (1 - _EWMA_ALPHA) * previous + _EWMA_ALPHA * elapsed
+        )
+        if permit.priority == INTERACTIVE and elapsed > self.latency_target:
+            self._decrease("slow response")
+        elif busy * 2 >= self.limit:
+            # Only grow while the slots are actually used, so idle periods do not inflate the limit
+            with self._lock:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._dispatch()
+
+    def _decrease(self, reason: str) -> None:
+        with self._lock:
+            now = self.clock()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            self.decreases += 1
+        logger.warning(f"Concurrency limit lowered to {int(self.limit)} ({reason})")
+
+    def _dispatch(self) -> None:
+        """
+        Hand free slots to waiters in priority order
+        """
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._has_room(priority):
+                return
+            heapq.heappop(self._waiters)
+            future.set_result(self._admit(priority, self.clock()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": {name: sum(1 for waiter in self._waiters if waiter[0] == value and not waiter[2].done())
+                       for name, value in PRIORITIES.items()},
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "throttled": self.throttled,
+            "limit_decreases": self.decreases,
+            "service_time_seconds": {_PRIORITY_NAMES.get(priority, str(priority)): round(seconds, 3)
+                                     for priority, seconds in self._service_time.items()},
+        }
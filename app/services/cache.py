@@ -0,0 +1,228 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Optional
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION_RE = re.compile(r"[\s.!?]+$")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize user input so trivially different phrasings share a cache entry
+    """
+    text = _WHITESPACE_RE.sub(" ", text.strip().lower())
+    return _TRAILING_PUNCTUATION_RE.sub("", text)
+
+
+def make_cache_key(user_input: str, deployment: str, prompt: str, day: Optional[date] = None) -> str:
+    """
+    Build a cache key from the normalized input, deployment and prompt version.
+
+    Keys are scoped to the calendar day so relative dates such as "tonight"
+    or "tomorrow" never resolve to a stale date.
+    """
+    day = day or date.today()
+    prompt_version = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+    raw = "\x1f".join([normalize_text(user_input), deployment, prompt_version, day.isoformat()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Base class for bounded LRU+TTL caches of serialized LLM responses
+    """
+
+    backend_name = "base"
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0, clock: Callable[[], float] = time.time):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend_name,
+            "size": len(self),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class InMemoryCache(ResponseCache):
+    """
+    In-process cache backed by an OrderedDict kept in LRU order
+    """
+
+    backend_name = "memory"
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0, clock: Callable[[], float] = time.time):
+        super().__init__(max_size, ttl_seconds, clock)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(ResponseCache):
+    """
+    File-backed cache that survives restarts and can be shared between processes.
+    Reads go through a memory-mapped view of the file, so worker processes
+    sharing one cache share its pages instead of each holding a copy.
+    Recency for LRU eviction is approximate: a hit only rewrites an entry's
+    last_access once it is touch_interval seconds old, so most reads never
+    take SQLite's write lock.
+    """
+
+    backend_name = "sqlite"
+
+    def __init__(self, path: str, max_size: int = 10000, ttl_seconds: float = 3600.0, clock: Callable[[], float] = time.time,
+                 table: str = "response_cache", mmap_size: int = 64 * 1024 * 1024, touch_interval: float = 60.0):
+        super().__init__(max_size, ttl_seconds, clock)
+        self.touch_interval = touch_interval
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        self.path = path
+        self.table = table
+        # Other workers may hold the write lock briefly
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_access ON {table}(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            now = self.clock()
+            row = self._conn.execute(
+                f"SELECT value, expires_at, last_access FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at, last_access = row
+            if expires_at <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if now - last_access >= self.touch_interval:
+                self._conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            now = self.clock()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl_seconds, now),
+            )
+            overflow = self._count() - self.max_size
+            if overflow > 0:
+                self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count()
+
+
+def create_cache(backend: str, max_size: int = 1024, ttl_seconds: float = 3600.0, path: str = "intent_cache.db",
+                 table: str = "response_cache") -> Optional[ResponseCache]:
+    """
+    Build a cache from configuration; returns None when caching is disabled
+    """
+    backend = (backend or "none").lower()
+    if backend in ("none", "off", "disabled", ""):
+        return None
+    if backend == "memory":
+        return InMemoryCache(max_size=max_size, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteCache(path, max_size=max_size, ttl_seconds=ttl_seconds, table=table)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,265 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+from app.services.metrics import ENDPOINT_FAILOVERS
+from app.services.resilience import is_retryable
+
+logger = logging.getLogger(__name__)
+
+HEALTHY = "healthy"
+COOLING = "cooling"
+DRAINED = "drained"
+
+
+class NoEndpointAvailable(Exception):
+    """Raised when every endpoint is cooling down or drained"""
+
+
+def _header_int(headers: Any, name: str) -> Optional[int]:
+    try:
+        value = headers.get(name)
+        return int(value) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    The server's requested wait from a throttled response, if it sent one
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if headers is None:
+        return None
+    milliseconds = _header_int(headers, "retry-after-ms")
+    if milliseconds is not None:
+        return milliseconds / 1000
+    seconds = _header_int(headers, "retry-after")
+    return float(seconds) if seconds is not None else None
+
+
+class LLMEndpoint:
+    """
+    One Azure OpenAI resource (region) and what has been observed about it
+    """
+
+    def __init__(self, name: str, azure_endpoint: str, api_key: str):
+        self.name = name
+        self.azure_endpoint = azure_endpoint
+        self.api_key = api_key
+        self.client = None
+        self.async_client = None
+        self.ewma_latency: Optional[float] = None
+        self.in_flight = 0
+        self.remaining_requests: Optional[int] = None
+        self.remaining_tokens: Optional[int] = None
+        self.cooldown_until = 0.0
+        self.drained_until = 0.0
+        self.consecutive_failures = 0
+        self.calls = 0
+        self.failures = 0
+        self.throttled = 0
+
+    def state(self, now: float) -> str:
+        if now < self.drained_until:
+            return DRAINED
+        if now < self.cooldown_until:
+            return COOLING
+        return HEALTHY
+
+    def available_at(self) -> float:
+        return max(self.cooldown_until, self.drained_until)
+
+
+class EndpointPool:
+    """
+    Spreads chat-completions calls over several Azure OpenAI endpoints that
+    serve the same deployments, so throughput scales with their combined quota.
+
+    Each call goes to the endpoint with the lowest EWMA latency weighted by
+    its in-flight calls; endpoints whose last response reported little
+    rate-limit headroom are used only when nothing better is free. A 429
+    cools the endpoint down for its Retry-After and the call fails over to
+    the next endpoint at once. After `drain_after` consecutive transient
+    failures an endpoint is drained for `drain_seconds`, then probed again.
+    Errors that are not transient are raised without failing over.
+    """
+
+    def __init__(self, endpoints: Sequence[LLMEndpoint], ewma_alpha: float = 0.3, drain_after: int = 3,
+                 drain_seconds: float = 30.0, default_cooldown: float = 1.0, min_remaining_requests: int = 2,
+                 min_remaining_tokens: int = 2000, clock: Callable[[], float] = time.monotonic):
+        if not endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.endpoints = list(endpoints)
+        self.ewma_alpha = ewma_alpha
+        self.drain_after = drain_after
+        self.drain_seconds = drain_seconds
+        self.default_cooldown = default_cooldown
+        self.min_remaining_requests = min_remaining_requests
+        self.min_remaining_tokens = min_remaining_tokens
+        self.clock = clock
+        self.failovers = 0
+        self._make_client: Optional[Callable[[LLMEndpoint], Any]] = None
+        self._make_async_client: Optional[Callable[[LLMEndpoint], Any]] = None
+        self._lock = threading.Lock()
+
+    def bind(self, make_client: Callable[[LLMEndpoint], Any], make_async_client: Callable[[LLMEndpoint], Any]) -> None:
+        """
+        Set how clients are built; each endpoint builds its clients on first use
+        """
+        self._make_client = make_client
+        self._make_async_client = make_async_client
+
+    def _client(self, endpoint: LLMEndpoint):
+        if endpoint.client is None:
+            with self._lock:
+                if endpoint.client is None:
+                    endpoint.client = self._make_client(endpoint)
+        return endpoint.client
+
+    def _async_client(self, endpoint: LLMEndpoint):
+        if endpoint.async_client is None:
+            with self._lock:
+                if endpoint.async_client is None:
+                    endpoint.async_client = self._make_async_client(endpoint)
+        return endpoint.async_client
+
+    def warm_up(self) -> None:
+        for endpoint in self.endpoints:
+            self._client(endpoint)
+            self._async_client(endpoint)
+
+    def create(self, **kwargs) -> Any:
+        """
+        chat.completions.create on the best endpoint, failing over on transient errors
+        """
+        tried: Set[str] = set()
+        while True:
+            endpoint = self._select(tried)
+            start = self.clock()
+            try:
+                try:
+                    raw = self._client(endpoint).chat.completions.with_raw_response.create(**kwargs)
+                    response = raw.parse()
+                except Exception as e:
+                    self._record_failure(endpoint, e, tried)
+                    continue
+                self._record_success(endpoint, self.clock() - start, raw.headers)
+                return response
+            finally:
+                self._release(endpoint)
+
+    async def acreate(self, **kwargs) -> Any:
+        """
+        Async variant of create
+        """
+        tried: Set[str] = set()
+        while True:
+            endpoint = self._select(tried)
+            start = self.clock()
+            try:
+                try:
+                    raw = await self._async_client(endpoint).chat.completions.with_raw_response.create(**kwargs)
+                    # parse() is synchronous on the async client too: the body has already been read
+                    response = raw.parse()
+                except Exception as e:
+                    self._record_failure(endpoint, e, tried)
+                    continue
+                self._record_success(endpoint, self.clock() - start, raw.headers)
+                return response
+            finally:
+                # Runs on cancellation too (hedge losers, discarded speculation), so in_flight never leaks
+                self._release(endpoint)
+
+    def _select(self, tried: Set[str]) -> LLMEndpoint:
+        """
+        Pick the untried endpoint with the best score and count it as in flight
+        """
+        with self._lock:
+            now = self.clock()
+            candidates = [e for e in self.endpoints if e.name not in tried and e.state(now) == HEALTHY]
+            if not candidates and not tried:
+                # Everything is cooling down or drained: try whichever recovers first rather than fail unseen
+                candidates = [min(self.endpoints, key=LLMEndpoint.available_at)]
+            if not candidates:
+                raise NoEndpointAvailable("No Azure OpenAI endpoint is available")
+            endpoint = min(candidates, key=lambda e: (self._score(e), e.in_flight))
+            endpoint.in_flight += 1
+            endpoint.calls += 1
+            tried.add(endpoint.name)
+            return endpoint
+
+    def _score(self, endpoint: LLMEndpoint) -> float:
+        """
+        Expected wait on an endpoint; lower is better, and unmeasured endpoints go first
+        """
+        score = (endpoint.ewma_latency or 0.0) * (endpoint.in_flight + 1)
+        low_requests = endpoint.remaining_requests is not None and endpoint.remaining_requests <= self.min_remaining_requests
+        low_tokens = endpoint.remaining_tokens is not None and endpoint.remaining_tokens <= self.min_remaining_tokens
+        if low_requests or low_tokens:
+            score = score * 10 + 1
+        return score
+
+    def _release(self, endpoint: LLMEndpoint) -> None:
+        with self._lock:
+            endpoint.in_flight -= 1
+
+    def _record_success(self, endpoint: LLMEndpoint, seconds: float, headers: Any) -> None:
+        with self._lock:
+            endpoint.consecutive_failures = 0
+            endpoint.ewma_latency = seconds if endpoint.ewma_latency is None else (
+                (1 - self.ewma_alpha) * endpoint.ewma_latency + self.ewma_alpha * seconds
+            )
+            endpoint.remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests")
+            endpoint.remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens")
+
+    def _record_failure(self, endpoint: LLMEndpoint, error: Exception, tried: Set[str]) -> None:
+        """
+        Update the endpoint's health, then re-raise unless another endpoint should be tried
+        """
+        transient = is_retryable(error)
+        with self._lock:
+            now = self.clock()
+            if getattr(error, "status_code", None) == 429:
+                endpoint.throttled += 1
+                endpoint.cooldown_until = now + (retry_after_seconds(error) or self.default_cooldown)
+            elif transient:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.drain_after:
+                    endpoint.drained_until = now + self.drain_seconds
+                    logger.warning(f"Draining LLM endpoint {endpoint.name} for {self.drain_seconds}s "
+                                   f"after {endpoint.consecutive_failures} consecutive failures")
+            remaining = [e for e in self.endpoints if e.name not in tried and e.state(now) == HEALTHY]
+            if transient and remaining:
+                self.failovers += 1
+        if not transient or not remaining:
+            raise error
+        ENDPOINT_FAILOVERS.inc(endpoint.name)
+        logger.info(f"Failing over from LLM endpoint {endpoint.name}: {str(error)}")
+
+    def close(self) -> None:
+        for endpoint in self.endpoints:
+            if endpoint.client is not None:
+                endpoint.client.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        for endpoint in self.endpoints:
+            if endpoint.async_client is not None:
+                await endpoint.async_client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        now = self.clock()
+        endpoints: List[Dict[str, Any]] = [{
+            "name": e.name,
+            "state": e.state(now),
+            "ewma_latency_ms": round(e.ewma_latency * 1000, 1) if e.ewma_latency is not None else None,
+            "in_flight": e.in_flight,
+            "calls": e.calls,
+            "failures": e.failures,
+            "throttled": e.throttled,
+            "remaining_requests": e.remaining_requests,
+            "remaining_tokens": e.remaining_tokens,
+        } for e in self.endpoints]
+        return {"failovers": self.failovers, "endpoints": endpoints}
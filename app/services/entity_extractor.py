@@ -0,0 +1,173 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional, Tuple
+from dateutil import parser as date_parser
+from dateutil.relativedelta import relativedelta, MO, TU, WE, TH, FR, SA, SU
+from app.models import EntityModel
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "a couple": 2, "couple": 2,
+}
+_NUMBER = r"(\d{1,2}|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + r")"
+
+_WEEKDAYS = {
+    "monday": MO, "tuesday": TU, "wednesday": WE, "thursday": TH,
+    "friday": FR, "saturday": SA, "sunday": SU,
+}
+
+_RELATIVE_DAYS = [
+    (re.compile(r"\bday after tomorrow\b"), lambda today: today + timedelta(days=2)),
+    (re.compile(r"\b(tomorrow|tmrw|tmr)\b"), lambda today: today + timedelta(days=1)),
+    (re.compile(r"\b(today|tonight|this (morning|afternoon|evening))\b"), lambda today: today),
+    (re.compile(r"\bnext week\b"), lambda today: today + timedelta(weeks=1)),
+    (re.compile(r"\bnext month\b"), lambda today: today + relativedelta(months=1)),
+    (re.compile(r"\b(this |next )?weekend\b"), lambda today: today + relativedelta(weekday=SA(+1))),
+]
+_WEEKDAY_RE = re.compile(r"\b(?:on |this |next )?(" + "|".join(_WEEKDAYS) + r")\b")
+_ISO_DATE_RE = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+_YEAR = r"(?:,? (?P<year>\d{4}))?"
+_DAY = r"(3[01]|[12]\d|0?[1-9])"
+_DAY_MONTH_RE = re.compile(r"\b" + _DAY + r"(st|nd|rd|th)?( of)? " + _MONTH + r"\b" + _YEAR + r"\b")
+_MONTH_DAY_RE = re.compile(r"\b" + _MONTH + r" " + _DAY + r"(st|nd|rd|th)?\b" + _YEAR + r"\b")
+
+_TIME_12H_RE = re.compile(r"\b(\d{1,2})(?::(\d{2}))? ?(am|pm|a\.m\.|p\.m\.)(?!\w)")
+_TIME_24H_RE = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_NAMED_TIMES = {"noon": "12:00", "midday": "12:00", "midnight": "00:00"}
+
+_PARTY_SIZE_RES = [
+    re.compile(r"\b(?:table|reservation|booking|seats?) for " + _NUMBER + r"\b"),
+    re.compile(r"\bparty of " + _NUMBER + r"\b"),
+    re.compile(r"\b" + _NUMBER + r" (?:people|persons|pax|guests|adults|travell?ers|of us)\b"),
+    re.compile(r"\bfor " + _NUMBER + r"\b(?! ?(?:(?:am|pm|nights?|days?|hours?|hrs?|mins?|minutes?|weeks?|months?|years?|yrs?|kms?)\b|a\.m|p\.m|:|-))"),
+]
+
+_VEHICLE_TYPES = [
+    (re.compile(r"\b(large|big|spacious) (vehicle|car|cab)\b"), "large vehicle"),
+    (re.compile(r"\b(suv|xuv)s?\b"), "SUV"),
+    (re.compile(r"\bsedans?\b"), "sedan"),
+    (re.compile(r"\bhatchbacks?\b"), "hatchback"),
+    (re.compile(r"\b(mini ?van|van|tempo traveller)\b"), "van"),
+    (re.compile(r"\b(luxury|premium) (car|cab|ride)\b"), "luxury"),
+    (re.compile(r"\b(auto ?rickshaw|auto|tuk[- ]?tuk)\b"), "auto rickshaw"),
+    (re.compile(r"\b(bike|motorbike) (taxi|ride)\b"), "bike"),
+]
+
+
+class LocalEntityExtractor:
+    """
+    Deterministic extractor for date, time, party_size and vehicle_type.
+
+    Relative dates are resolved against `today` so "tonight" or "next month"
+    always map to a concrete YYYY-MM-DD value. A bare "7:30" is read as 07:30
+    but flagged ambiguous, since it may well mean the evening.
+    """
+
+    def extract(self, user_input: str, today: Optional[date] = None) -> EntityModel:
+        text = user_input.lower()
+        today = today or date.today()
+        return EntityModel(
+            date=self.extract_date(text, today),
+            time=self.extract_time(text),
+            party_size=self.extract_party_size(text),
+            vehicle_type=self.extract_vehicle_type(text),
+        )
+
+    def extract_date(self, text: str, today: date) -> Optional[str]:
+        match = _ISO_DATE_RE.search(text)
+        if match:
+            return match.group(0)
+
+        match = _DAY_MONTH_RE.search(text) or _MONTH_DAY_RE.search(text)
+        if match:
+            try:
+                parsed = date_parser.parse(match.group(0), default=datetime(today.year, today.month, 1)).date()
+            except (ValueError, OverflowError):
+                parsed = None
+            if parsed:
+                # Only a date without an explicit year rolls over to the next occurrence
+                if parsed < today and not match.group("year"):
+                    parsed += relativedelta(years=1)
+                return parsed.isoformat()
+
+        for pattern, resolve in _RELATIVE_DAYS:
+            if pattern.search(text):
+                return resolve(today).isoformat()
+
+        match = _WEEKDAY_RE.search(text)
+        if match:
+            weekday = _WEEKDAYS[match.group(1)]
+            offset = 1 if match.group(0).startswith("next") and today.weekday() == weekday.weekday else 0
+            return (today + relativedelta(days=offset, weekday=weekday(+1))).isoformat()
+        return None
+
+    def overriding_fields(self, user_input: str) -> Tuple[str, ...]:
+        """
+        Fields whose local value should replace the LLM's: the date always,
+        the time only when it is unambiguous
+        """
+        _, certain = self._extract_time(user_input.lower())
+        return ("date", "time") if certain else ("date",)
+
+    def extract_time(self, text: str) -> Optional[str]:
+        return self._extract_time(text)[0]
+
+    def _extract_time(self, text: str) -> Tuple[Optional[str], bool]:
+        """
+        The time as HH:MM and whether it is unambiguous: am/pm, a 24-hour
+        clock hour (0 or 13-23) or a named time such as noon
+        """
+        match = _TIME_12H_RE.search(text)
+        if match:
+            hour = int(match.group(1))
+            minute = int(match.group(2) or 0)
+            if 1 <= hour <= 12 and minute < 60:
+                if match.group(3).startswith("p") and hour != 12:
+                    hour += 12
+                elif match.group(3).startswith("a") and hour == 12:
+                    hour = 0
+                return f"{hour:02d}:{minute:02d}", True
+
+        match = _TIME_24H_RE.search(text)
+        if match:
+            hour = int(match.group(1))
+            return f"{hour:02d}:{match.group(2)}", not 1 <= hour <= 12
+
+        for word, value in _NAMED_TIMES.items():
+            if re.search(rf"\b{word}\b", text):
+                return value, True
+        return None, False
+
+    def extract_party_size(self, text: str) -> Optional[int]:
+        for pattern in _PARTY_SIZE_RES:
+            match = pattern.search(text)
+            if match:
+                value = match.group(1)
+                size = int(value) if value.isdigit() else _NUMBER_WORDS[value]
+                if 0 < size <= 50:
+                    return size
+        return None
+
+    def extract_vehicle_type(self, text: str) -> Optional[str]:
+        for pattern, vehicle_type in _VEHICLE_TYPES:
+            if pattern.search(text):
+                return vehicle_type
+        return None
+
+
+def merge_entities(llm_entities: EntityModel, local_entities: EntityModel,
+                   overrides: Iterable[str] = ("date", "time")) -> EntityModel:
+    """
+    Combine LLM and locally extracted entities.
+
+    Local values for the `overrides` fields win because they are computed
+    deterministically; every other local value only fills gaps.
+    """
+    overrides = set(overrides)
+    merged = llm_entities.model_copy()
+    for field, value in local_entities.model_dump(exclude_none=True).items():
+        if field in overrides or getattr(merged, field) is None:
+            setattr(merged, field, value)
+    return merged
@@ -0,0 +1,48 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def http2_available() -> bool:
+    """
+    httpx only speaks HTTP/2 when the optional h2 package is installed
+    """
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HTTPClientPool:
+    """
+    Shared, connection-pooled httpx clients for the Azure OpenAI SDK.
+
+    One sync and one async client are kept for the life of the process so
+    TCP and TLS connections are reused across requests instead of being set up
+    every time.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, timeout: float = 60.0, http2: bool = True):
+        # Imported here so importing the app does not pay for httpx; the pool is built during startup
+        import httpx
+
+        self.http2 = http2 and http2_available()
+        if http2 and not self.http2:
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(timeout)
+        self.sync_client = httpx.Client(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        self.async_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+
+    def close(self) -> None:
+        self.sync_client.close()
+
+    async def aclose(self) -> None:
+        self.sync_client.close()
+        await self.async_client.aclose()
@@ -1,112 +1,1067 @@
+import asyncio
 import json
 import logging
-from typing import Dict, Any, List
-from openai import AzureOpenAI
-from app.models import AssistantResponse, IntentCategory, EntityModel, WebSearchResult
-from app.utils.prompt_templates import INTENT_CLASSIFICATION_PROMPT, WEB_SEARCH_PROMPT
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple
+from pydantic import TypeAdapter
+from app.models import AssistantResponse, IntentCategory, EntityModel, LLMClassification, MultiIntentResponse, WebSearchResult
+from app.utils.prompt_templates import (
+    CLASSIFICATION_SYSTEM_PROMPT,
+    INTENT_CLASSIFICATION_PROMPT,
+    INTENT_CLASSIFICATION_WITH_SEARCH_PROMPT,
+    BATCH_INTENT_CLASSIFICATION_PROMPT,
+    FOLLOW_UP_MERGE_PROMPT,
+    FEW_SHOT_EXAMPLES_TEMPLATE,
+    FEW_SHOT_EXAMPLE_TEMPLATE,
+    WEB_SEARCH_PROMPT,
+)
 from app.services.web_search import WebSearchService
+from app.services.cache import ResponseCache, make_cache_key
+from app.services.local_classifier import LocalIntentClassifier, follow_up_questions
+from app.services.entity_extractor import LocalEntityExtractor, merge_entities
+from app.services.intent_splitter import IntentSplitter
+from app.services.http_clients import HTTPClientPool
+from app.services.model_router import ModelRouter
+from app.services.endpoint_pool import EndpointPool, LLMEndpoint
+from app.services.resilience import LLMResilience
+from app.services.single_flight import SingleFlight
+from app.services.session_store import SessionStore
+from app.utils.prompt_compiler import PromptCompiler
+from app.utils.structured_output import classification_response_format, extract_json
+from app.services.metrics import (
+    STAGE_LATENCY,
+    REQUEST_LATENCY,
+    FALLBACK_RESPONSES,
+    PARSE_FAILURES,
+    DEGRADED_RESPONSES,
+    LLM_THROTTLED,
+    SPECULATIVE_SEARCHES,
+    record_llm_usage,
+)
+
+if TYPE_CHECKING:
+    from app.services.example_index import ExampleIndex
 
 logger = logging.getLogger(__name__)
 
+# Validates a whole batch response in one pass
+_BATCH_ADAPTER = TypeAdapter(List[LLMClassification])
+
+_OPENAI_CLIENTS = ("AzureOpenAI", "AsyncAzureOpenAI")
+
+
+class _LLMCallFailed(Exception):
+    """Wraps (as __cause__) an error from the LLM call itself, as opposed to its parsing"""
+
+
+def __getattr__(name: str):
+    """
+    The openai SDK is the slowest import in the app, so its client classes
+    are only imported when the first client is built
+    """
+    if name in _OPENAI_CLIENTS:
+        import openai
+        client_class = globals()[name] = getattr(openai, name)
+        return client_class
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class IntentProcessor:
-    def __init__(self, azure_endpoint: str, azure_api_key: str, azure_deployment: str, api_version: str = "2023-12-01-preview"):
-        self.client = AzureOpenAI(
-            azure_endpoint=azure_endpoint,
-            api_key=azure_api_key,
-            api_version=api_version
-        )
+    def __init__(self, azure_endpoint: str, azure_api_key: str, azure_deployment: str, api_version: str = "2023-12-01-preview",
+                 cache: Optional[ResponseCache] = None, batch_size: int = 10, batch_concurrency: int = 4,
+                 web_search_service: Optional[WebSearchService] = None,
+                 local_classifier: Optional[LocalIntentClassifier] = None,
+                 entity_extractor: Optional[LocalEntityExtractor] = None,
+                 merge_search_queries: bool = False,
+                 http_client_pool: Optional[HTTPClientPool] = None,
+                 session_store: Optional[SessionStore] = None,
+                 prompt_compiler: Optional[PromptCompiler] = None,
+                 response_format: str = "off",
+                 resilience: Optional[LLMResilience] = None,
+                 coalesce_requests: bool = True,
+                 on_throttled: Optional[Callable[[], None]] = None,
+                 example_index: Optional["ExampleIndex"] = None,
+                 few_shot_k: int = 2,
+                 model_router: Optional[ModelRouter] = None,
+                 endpoint_pool: Optional[EndpointPool] = None,
+                 speculation_threshold: Optional[float] = None,
+                 intent_splitter: Optional[IntentSplitter] = None):
+        # Shared pooled HTTP clients are only passed when configured
+        self._client_kwargs: Dict[str, Any] = {
+            "azure_endpoint": azure_endpoint,
+            "api_key": azure_api_key,
+            "api_version": api_version,
+        }
+        self._http_client_pool = http_client_pool
+        # The resilience layer owns retries, so the SDK's own retries are turned off
+        if resilience is not None:
+            self._client_kwargs["max_retries"] = 0
+        # Clients are built on first use, keeping startup free of the openai import
+        self._client = None
+        self._async_client = None
+        self._client_lock = threading.Lock()
         self.deployment_name = azure_deployment
-        self.web_search_service = WebSearchService()
+        self.web_search_service = web_search_service or WebSearchService()
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.batch_concurrency = max(1, batch_concurrency)
+        self.local_classifier = local_classifier
+        self.entity_extractor = entity_extractor
+        # When enabled, "other" requests get their search queries from the classification call
+        self.merge_search_queries = merge_search_queries
+        # Compact, token-budgeted prompts replace the original templates when a compiler is given
+        self.prompt_compiler = prompt_compiler
+        if prompt_compiler is not None:
+            self.classification_prompt = prompt_compiler.prompt_version(merge_search_queries)
+        else:
+            self.classification_prompt = INTENT_CLASSIFICATION_WITH_SEARCH_PROMPT if merge_search_queries else INTENT_CLASSIFICATION_PROMPT
+        self.search_query_calls = 0
+        self.search_query_calls_skipped = 0
+        self.session_store = session_store
+        # JSON mode / structured output for single classification calls ("off", "json_object" or "json_schema")
+        self.response_format = classification_response_format(response_format)
+        self.resilience = resilience
+        # Concurrent identical inputs share one classification and one query-generation call
+        self.coalesce_requests = coalesce_requests
+        self._classification_flight = SingleFlight("classification")
+        self._search_query_flight = SingleFlight("search_queries")
+        # Called on every 429 so admission control can lower its concurrency limit
+        self.on_throttled = on_throttled
+        # The most similar labelled examples are added to each single classification prompt
+        self.example_index = example_index
+        self.few_shot_k = few_shot_k
+        self._cache_prompt_version = self.classification_prompt
+        if example_index is not None:
+            self._cache_prompt_version += f"\nexamples={example_index.fingerprint}:k={few_shot_k}"
+        # Classifications try the cheapest deployment first and escalate on low confidence or unparseable output
+        self.model_router = model_router
+        if model_router is not None:
+            self._cache_prompt_version += f"\ntiers={','.join(model_router.deployments)}"
+        # Completions are spread over several endpoints serving the same deployments when a pool is given
+        self.endpoint_pool = endpoint_pool
+        if endpoint_pool is not None:
+            endpoint_pool.bind(lambda endpoint: self._endpoint_client("AzureOpenAI", endpoint),
+                               lambda endpoint: self._endpoint_client("AsyncAzureOpenAI", endpoint))
+        # Inputs that look like "other" start query generation and web search alongside classification
+        self.speculation_threshold = speculation_threshold
+        self._speculation_signal = None
+        self._speculation_executor = None
+        if speculation_threshold is not None:
+            self._speculation_signal = local_classifier or LocalIntentClassifier()
+            self._speculation_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculative-search")
+        self.speculations = {"started": 0, "used": 0, "wasted": 0}
+        self._speculation_lock = threading.Lock()
+        # Compound requests are split locally into one sub-request per intent
+        self.intent_splitter = intent_splitter or IntentSplitter(local_classifier)
     
-    def process_user_input(self, user_input: str) -> AssistantResponse:
+    def process_user_input(self, user_input: str, session_id: Optional[str] = None) -> AssistantResponse:
         """
-        Process user input and return structured response
+        Process user input and return structured response.
+        With a session store, follow-up turns are merged into the session's state.
         """
+        start = time.perf_counter()
+        previous, session_id = self._load_session(session_id)
+        speculation = None
         try:
-            # Get intent classification and entity extraction
-            llm_response = self._classify_intent(user_input)
-            
-            # Parse LLM response
-            parsed_response = self._parse_llm_response(llm_response)
+            # Get intent classification and entity extraction (served from cache when possible)
+            if previous is not None:
+                parsed_response = self._merge_follow_up(user_input, previous)
+            else:
+                # Only speculate once the cache and local classifier have missed
+                def speculate():
+                    nonlocal speculation
+                    speculation = self._start_speculation(user_input)
+                try:
+                    parsed_response = self._classify_and_parse(user_input, before_llm=speculate)
+                except Exception:
+                    self._discard_speculation(speculation)
+                    raise
             
-            # If intent is "other", perform web search
+            # If intent is "other", perform web search (or use the one started speculatively)
             if parsed_response.intent_category == IntentCategory.OTHER:
-                search_results = self._perform_web_search(user_input)
+                if speculation is not None:
+                    search_results = self._speculation_results(speculation)
+                else:
+                    search_results = self._perform_web_search(user_input, parsed_response._search_queries)
                 parsed_response.web_search_results = search_results
+            else:
+                self._discard_speculation(speculation)
             
+            self._save_session(session_id, parsed_response)
+            REQUEST_LATENCY.observe(time.perf_counter() - start, parsed_response.intent_category.value)
             return parsed_response
         
         except Exception as e:
             logger.error(f"Error processing user input: {str(e)}")
             # Return fallback response
-            return AssistantResponse(
-                intent_category=IntentCategory.OTHER,
-                entities=EntityModel(),
-                confidence_score=0.0,
-                follow_up_questions=["I'm sorry, I couldn't understand your request. Could you please rephrase it?"],
-                reasoning="Error occurred during processing"
+            fallback = self._fallback_response()
+            fallback.session_id = session_id
+            return fallback
+    
+    async def aprocess_user_input(self, user_input: str, session_id: Optional[str] = None) -> AssistantResponse:
+        """
+        Async variant of process_user_input that never blocks the event loop
+        """
+        start = time.perf_counter()
+        previous, session_id = self._load_session(session_id)
+        speculation = None
+        try:
+            if previous is not None:
+                parsed_response = await self._amerge_follow_up(user_input, previous)
+            else:
+                def speculate():
+                    nonlocal speculation
+                    speculation = self._astart_speculation(user_input)
+                try:
+                    parsed_response = await self._aclassify_and_parse(user_input, before_llm=speculate)
+                except BaseException:
+                    # Including cancellation, so a dropped request does not leave its search running
+                    self._discard_speculation(speculation)
+                    raise
+            
+            if parsed_response.intent_category == IntentCategory.OTHER:
+                if speculation is not None:
+                    search_results = await self._aspeculation_results(speculation)
+                else:
+                    search_results = await self._aperform_web_search(user_input, parsed_response._search_queries)
+                parsed_response.web_search_results = search_results
+            else:
+                self._discard_speculation(speculation)
+            
+            self._save_session(session_id, parsed_response)
+            REQUEST_LATENCY.observe(time.perf_counter() - start, parsed_response.intent_category.value)
+            return parsed_response
+        
+        except Exception as e:
+            logger.error(f"Error processing user input: {str(e)}")
+            fallback = self._fallback_response()
+            fallback.session_id = session_id
+            return fallback
+    
+    def process_multi_intent(self, user_input: str, session_id: Optional[str] = None) -> MultiIntentResponse:
+        """
+        Split a compound request into sub-requests and process them concurrently,
+        one response per intent. A session follow-up is never split.
+        """
+        sub_requests = [user_input] if session_id is not None else self.intent_splitter.split(user_input)
+        if len(sub_requests) == 1:
+            responses = [self.process_user_input(user_input, session_id)]
+        else:
+            with ThreadPoolExecutor(max_workers=len(sub_requests)) as executor:
+                responses = list(executor.map(self.process_user_input, sub_requests))
+        return MultiIntentResponse(sub_requests=sub_requests, responses=responses)
+    
+    async def aprocess_multi_intent(self, user_input: str, session_id: Optional[str] = None) -> MultiIntentResponse:
+        """
+        Async variant of process_multi_intent
+        """
+        sub_requests = [user_input] if session_id is not None else self.intent_splitter.split(user_input)
+        if len(sub_requests) == 1:
+            responses = [await self.aprocess_user_input(user_input, session_id)]
+        else:
+            responses = list(await asyncio.gather(*(self.aprocess_user_input(sub_request) for sub_request in sub_requests)))
+        return MultiIntentResponse(sub_requests=sub_requests, responses=responses)
+    
+    def _should_speculate(self, user_input: str) -> bool:
+        # With merged search queries the classification call already produces the queries
+        if self._speculation_signal is None or self.merge_search_queries:
+            return False
+        return self._speculation_signal.other_likelihood(user_input) >= self.speculation_threshold
+    
+    def _start_speculation(self, user_input: str) -> Optional[Future]:
+        """
+        Start query generation and web search in the background when the input looks like "other"
+        """
+        if not self._should_speculate(user_input):
+            return None
+        self._record_speculation("started")
+        return self._speculation_executor.submit(self._perform_web_search, user_input)
+    
+    def _astart_speculation(self, user_input: str) -> Optional["asyncio.Task"]:
+        """
+        Async variant of _start_speculation
+        """
+        if not self._should_speculate(user_input):
+            return None
+        self._record_speculation("started")
+        return asyncio.ensure_future(self._aperform_web_search(user_input))
+    
+    def _speculation_results(self, speculation: Future) -> List[WebSearchResult]:
+        self._record_speculation("used")
+        return speculation.result()
+    
+    async def _aspeculation_results(self, speculation: "asyncio.Task") -> List[WebSearchResult]:
+        self._record_speculation("used")
+        return await speculation
+    
+    def _discard_speculation(self, speculation: Optional[Any]) -> None:
+        """
+        Cancel a speculative search the classification did not need; one already
+        running in a thread finishes and its results are dropped
+        """
+        if speculation is None:
+            return
+        speculation.cancel()
+        self._record_speculation("wasted")
+    
+    def _record_speculation(self, outcome: str) -> None:
+        with self._speculation_lock:
+            self.speculations[outcome] += 1
+        SPECULATIVE_SEARCHES.inc(outcome)
+    
+    def _load_session(self, session_id: Optional[str]) -> Tuple[Optional[AssistantResponse], Optional[str]]:
+        """
+        Return the session's previous response (if any) and the session id to use,
+        starting a new session when none was given
+        """
+        if self.session_store is None:
+            return None, session_id
+        if session_id is None:
+            self.session_store.record_turn(incremental=False)
+            return None, self.session_store.new_session_id()
+        previous = self.session_store.load(session_id)
+        self.session_store.record_turn(incremental=previous is not None)
+        return previous, session_id
+    
+    def _save_session(self, session_id: Optional[str], response: AssistantResponse) -> None:
+        if self.session_store is None or session_id is None:
+            return
+        response.session_id = session_id
+        self.session_store.save(session_id, response)
+    
+    def _follow_up_messages(self, user_input: str, previous: AssistantResponse) -> List[Dict[str, str]]:
+        """
+        Build a compact prompt with only the partial state and the new utterance
+        """
+        prompt = FOLLOW_UP_MERGE_PROMPT.format(
+            intent_category=previous.intent_category.value,
+            entities=json.dumps(previous.entities.model_dump(exclude_none=True)),
+            follow_up_questions=json.dumps(previous.follow_up_questions),
+            user_input=user_input
+        )
+        return [
+            {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _merge_follow_up(self, user_input: str, previous: AssistantResponse) -> AssistantResponse:
+        """
+        Merge a follow-up answer into the session state with a single compact LLM call
+        """
+        content = self._complete("follow_up", self._follow_up_messages(user_input, previous), temperature=0.1, max_tokens=500,
+                                 response_format=self.response_format)
+        return self._apply_local_entities(user_input, self._merge_turn(previous, self._parse_llm_response(content)))
+    
+    async def _amerge_follow_up(self, user_input: str, previous: AssistantResponse) -> AssistantResponse:
+        """
+        Async variant of _merge_follow_up
+        """
+        content = await self._acomplete("follow_up", self._follow_up_messages(user_input, previous), temperature=0.1, max_tokens=500,
+                                        response_format=self.response_format)
+        return self._apply_local_entities(user_input, self._merge_turn(previous, self._parse_llm_response(content)))
+    
+    @staticmethod
+    def _merge_turn(previous: AssistantResponse, update: AssistantResponse) -> AssistantResponse:
+        """
+        Overlay the entities from a follow-up turn on the previous state;
+        a change of intent starts over with the new turn only
+        """
+        if update.intent_category != previous.intent_category:
+            return update
+        update.entities = EntityModel(**{
+            **previous.entities.model_dump(exclude_none=True),
+            **update.entities.model_dump(exclude_none=True)
+        })
+        return update
+    
+    async def astream_user_input(self, user_input: str, session_id: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yield ("classification", response) as soon as the intent is known, then
+        ("search_results", results) each time another web search query completes,
+        and finally ("done", response) with the complete response.
+        Session follow-ups are merged exactly as in process_user_input.
+        """
+        previous, session_id = self._load_session(session_id)
+        try:
+            if previous is not None:
+                parsed_response = await self._amerge_follow_up(user_input, previous)
+            else:
+                parsed_response = await self._aclassify_and_parse(user_input)
+        except Exception as e:
+            logger.error(f"Error processing user input: {str(e)}")
+            fallback = self._fallback_response()
+            fallback.session_id = session_id
+            yield "classification", fallback
+            yield "done", fallback
+            return
+        
+        # Web search results are not kept in the session, so it can be saved before they arrive
+        self._save_session(session_id, parsed_response)
+        yield "classification", parsed_response.model_copy()
+        
+        if parsed_response.intent_category == IntentCategory.OTHER:
+            search_results: List[WebSearchResult] = []
+            try:
+                search_queries = await self._aresolve_search_queries(user_input, parsed_response._search_queries)
+                async for search_results in self.web_search_service.astream_multi_search(search_queries):
+                    yield "search_results", search_results
+            except Exception as e:
+                logger.error(f"Error performing web search: {str(e)}")
+            parsed_response.web_search_results = search_results
+        
+        yield "done", parsed_response
+    
+    def process_batch(self, user_inputs: List[str], web_search: bool = True) -> List[AssistantResponse]:
+        """
+        Process many inputs, packing up to batch_size of them into each LLM call.
+        Batches run concurrently, at most batch_concurrency at a time.
+        """
+        chunks = self._batch_chunks(user_inputs)
+        if not chunks:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.batch_concurrency, len(chunks))) as executor:
+            chunk_results = list(executor.map(lambda chunk: self._process_chunk(chunk, web_search), chunks))
+        return [response for responses in chunk_results for response in responses]
+    
+    async def aprocess_batch(self, user_inputs: List[str], web_search: bool = True) -> List[AssistantResponse]:
+        """
+        Async variant of process_batch
+        """
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def run(chunk: List[str]) -> List[AssistantResponse]:
+            async with semaphore:
+                return await self._aprocess_chunk(chunk, web_search)
+        
+        chunk_results = await asyncio.gather(*(run(chunk) for chunk in self._batch_chunks(user_inputs)))
+        return [response for responses in chunk_results for response in responses]
+    
+    def _batch_chunks(self, user_inputs: List[str]) -> List[List[str]]:
+        return [user_inputs[i:i + self.batch_size] for i in range(0, len(user_inputs), self.batch_size)]
+    
+    def _process_chunk(self, chunk: List[str], web_search: bool) -> List[AssistantResponse]:
+        """
+        Classify one batch in a single LLM call, falling back to per-item calls
+        when the batch response cannot be parsed
+        """
+        try:
+            responses = self._classify_batch(chunk)
+        except Exception as e:
+            logger.warning(f"Batch classification failed, falling back to per-item calls: {str(e)}")
+            if web_search:
+                return [self.process_user_input(user_input) for user_input in chunk]
+            return [self._classify_only(user_input) for user_input in chunk]
+        
+        if web_search:
+            for user_input, response in zip(chunk, responses):
+                if response.intent_category == IntentCategory.OTHER:
+                    response.web_search_results = self._perform_web_search(user_input, response._search_queries)
+        return responses
+    
+    async def _aprocess_chunk(self, chunk: List[str], web_search: bool) -> List[AssistantResponse]:
+        """
+        Async variant of _process_chunk
+        """
+        try:
+            responses = await self._aclassify_batch(chunk)
+        except Exception as e:
+            logger.warning(f"Batch classification failed, falling back to per-item calls: {str(e)}")
+            if web_search:
+                return list(await asyncio.gather(*(self.aprocess_user_input(user_input) for user_input in chunk)))
+            return list(await asyncio.gather(*(self._aclassify_only(user_input) for user_input in chunk)))
+        
+        if web_search:
+            others = [(user_input, response) for user_input, response in zip(chunk, responses)
+                      if response.intent_category == IntentCategory.OTHER]
+            search_results = await asyncio.gather(*(self._aperform_web_search(user_input, response._search_queries) for user_input, response in others))
+            for (_, response), results in zip(others, search_results):
+                response.web_search_results = results
+        return responses
+    
+    def _classify_only(self, user_input: str) -> AssistantResponse:
+        try:
+            return self._classify_and_parse(user_input)
+        except Exception as e:
+            logger.error(f"Error processing user input: {str(e)}")
+            return self._fallback_response()
+    
+    async def _aclassify_only(self, user_input: str) -> AssistantResponse:
+        try:
+            return await self._aclassify_and_parse(user_input)
+        except Exception as e:
+            logger.error(f"Error processing user input: {str(e)}")
+            return self._fallback_response()
+    
+    def _classify_batch(self, chunk: List[str]) -> List[AssistantResponse]:
+        """
+        Classify a batch of inputs, sending only cache misses to the LLM
+        """
+        cache_keys = [self._cache_key(user_input) for user_input in chunk]
+        responses = [self._resolve_without_llm(user_input, cache_key) for user_input, cache_key in zip(chunk, cache_keys)]
+        pending = [i for i, response in enumerate(responses) if response is None]
+        if pending:
+            llm_response = self._classify_intent_batch([chunk[i] for i in pending])
+            for i, response in zip(pending, self._parse_batch_response(llm_response, len(pending))):
+                response = self._apply_local_entities(chunk[i], response)
+                self._cache_set(cache_keys[i], response)
+                responses[i] = response
+        return responses
+    
+    async def _aclassify_batch(self, chunk: List[str]) -> List[AssistantResponse]:
+        """
+        Async variant of _classify_batch
+        """
+        cache_keys = [self._cache_key(user_input) for user_input in chunk]
+        responses = [self._resolve_without_llm(user_input, cache_key) for user_input, cache_key in zip(chunk, cache_keys)]
+        pending = [i for i, response in enumerate(responses) if response is None]
+        if pending:
+            llm_response = await self._aclassify_intent_batch([chunk[i] for i in pending])
+            for i, response in zip(pending, self._parse_batch_response(llm_response, len(pending))):
+                response = self._apply_local_entities(chunk[i], response)
+                self._cache_set(cache_keys[i], response)
+                responses[i] = response
+        return responses
+    
+    def _classify_and_parse(self, user_input: str, before_llm: Optional[Callable[[], None]] = None) -> AssistantResponse:
+        """
+        Classify and parse user input, sharing the work with identical concurrent requests
+        """
+        if not self.coalesce_requests:
+            return self._classify_and_parse_once(user_input, before_llm)
+        # Copy because callers attach search results and session ids to the response
+        return self._classification_flight.do(user_input, lambda: self._classify_and_parse_once(user_input, before_llm)).model_copy()
+    
+    async def _aclassify_and_parse(self, user_input: str, before_llm: Optional[Callable[[], None]] = None) -> AssistantResponse:
+        """
+        Async variant of _classify_and_parse
+        """
+        if not self.coalesce_requests:
+            return await self._aclassify_and_parse_once(user_input, before_llm)
+        response = await self._classification_flight.ado(user_input, lambda: self._aclassify_and_parse_once(user_input, before_llm))
+        return response.model_copy()
+    
+    def _classify_and_parse_once(self, user_input: str, before_llm: Optional[Callable[[], None]] = None) -> AssistantResponse:
+        """
+        Classify and parse user input, consulting the response cache first.
+        before_llm runs only when the input actually goes to the LLM.
+        """
+        cache_key = self._cache_key(user_input)
+        resolved = self._resolve_without_llm(user_input, cache_key)
+        if resolved is not None:
+            return resolved
+        
+        if before_llm is not None:
+            before_llm()
+        try:
+            parsed_response = self._route(lambda deployment: self._classify_intent(user_input, deployment))
+        except _LLMCallFailed as e:
+            return self._degraded_response(user_input, e.__cause__)
+        parsed_response = self._apply_local_entities(user_input, parsed_response)
+        self._cache_set(cache_key, parsed_response)
+        return parsed_response
+    
+    async def _aclassify_and_parse_once(self, user_input: str, before_llm: Optional[Callable[[], None]] = None) -> AssistantResponse:
+        """
+        Async variant of _classify_and_parse_once
+        """
+        cache_key = self._cache_key(user_input)
+        resolved = self._resolve_without_llm(user_input, cache_key)
+        if resolved is not None:
+            return resolved
+        
+        if before_llm is not None:
+            before_llm()
+        try:
+            parsed_response = await self._aroute(lambda deployment: self._aclassify_intent(user_input, deployment))
+        except _LLMCallFailed as e:
+            return self._degraded_response(user_input, e.__cause__)
+        parsed_response = self._apply_local_entities(user_input, parsed_response)
+        self._cache_set(cache_key, parsed_response)
+        return parsed_response
+    
+    def _degraded_response(self, user_input: str, error: Exception) -> AssistantResponse:
+        """
+        Answer with the local classifier's best guess when the LLM call failed
+        (including while the circuit breaker is open). Without a local classifier
+        the error is re-raised, so the caller returns the generic fallback response
+        """
+        if self.local_classifier is None:
+            raise error
+        logger.warning(f"LLM unavailable, answering locally: {str(error)}")
+        FALLBACK_RESPONSES.inc()
+        DEGRADED_RESPONSES.inc()
+        response = self._apply_local_entities(user_input, self.local_classifier.guess(user_input))
+        response.follow_up_questions = follow_up_questions(response.intent_category, response.entities)
+        return response
+    
+    def _resolve_without_llm(self, user_input: str, cache_key: Optional[str]) -> Optional[AssistantResponse]:
+        """
+        Answer from the response cache or the local fast-path classifier, if either can
+        """
+        with STAGE_LATENCY.time("cache_lookup"):
+            cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        if self.local_classifier is not None:
+            with STAGE_LATENCY.time("local_classifier"):
+                local_response = self.local_classifier.classify(user_input)
+            if local_response is not None:
+                local_response = self._apply_local_entities(user_input, local_response)
+                local_response.follow_up_questions = follow_up_questions(
+                    local_response.intent_category, local_response.entities
+                )
+            return local_response
+        return None
+    
+    def _apply_local_entities(self, user_input: str, response: AssistantResponse) -> AssistantResponse:
+        """
+        Overlay deterministically extracted entities (dates, times, party size, vehicle type)
+        """
+        if self.entity_extractor is None:
+            return response
+        response.entities = merge_entities(response.entities, self.entity_extractor.extract(user_input),
+                                           self.entity_extractor.overriding_fields(user_input))
+        return response
+    
+    def _cache_key(self, user_input: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return make_cache_key(user_input, self.deployment_name, self._cache_prompt_version)
+    
+    def _cache_get(self, cache_key: Optional[str]) -> Optional[AssistantResponse]:
+        if cache_key is None:
+            return None
+        try:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                entry = json.loads(cached)
+                response = AssistantResponse.model_validate(entry)
+                response._search_queries = entry.get("search_queries")
+                return response
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cache entry: {str(e)}")
+        return None
+    
+    def _cache_set(self, cache_key: Optional[str], response: AssistantResponse) -> None:
+        if cache_key is None:
+            return
+        try:
+            entry = response.model_dump(mode="json")
+            # Merged search queries are private to the response, so they are stored alongside it
+            if response._search_queries is not None:
+                entry["search_queries"] = response._search_queries
+            self.cache.set(cache_key, json.dumps(entry))
+        except Exception as e:
+            logger.warning(f"Failed to store cache entry: {str(e)}")
+    
+    @property
+    def client(self):
+        """
+        The blocking Azure OpenAI client, built on first use
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    http_client = {"http_client": self._http_client_pool.sync_client} if self._http_client_pool else {}
+                    self._client = self._client_class("AzureOpenAI")(**self._client_kwargs, **http_client)
+        return self._client
+
+    @property
+    def async_client(self):
+        """
+        The async Azure OpenAI client, built on first use
+        """
+        if self._async_client is None:
+            with self._client_lock:
+                if self._async_client is None:
+                    http_client = {"http_client": self._http_client_pool.async_client} if self._http_client_pool else {}
+                    self._async_client = self._client_class("AsyncAzureOpenAI")(**self._client_kwargs, **http_client)
+        return self._async_client
+
+    def warm_up(self) -> None:
+        """
+        Do the first-use work ahead of traffic: import the SDK, build both
+        clients and load the tokenizer
+        """
+        try:
+            if self.endpoint_pool is not None:
+                self.endpoint_pool.warm_up()
+            else:
+                self.client
+                self.async_client
+            if self.prompt_compiler is not None:
+                self.prompt_compiler.token_counter.exact
+        except Exception as e:
+            logger.warning(f"Warm-up failed, clients will be built on first use: {str(e)}")
+
+    def _endpoint_client(self, client_class: str, endpoint: LLMEndpoint):
+        """
+        Build a client for one endpoint of the pool, sharing the pooled HTTP connections
+        """
+        kwargs = dict(self._client_kwargs, azure_endpoint=endpoint.azure_endpoint, api_key=endpoint.api_key)
+        if self._http_client_pool is not None:
+            pooled = self._http_client_pool.sync_client if client_class == "AzureOpenAI" else self._http_client_pool.async_client
+            kwargs["http_client"] = pooled
+        return self._client_class(client_class)(**kwargs)
+
+    @staticmethod
+    def _client_class(name: str):
+        # Looked up on the module so the lazy import (or a patched class) is used
+        return getattr(sys.modules[__name__], name)
+
+    async def aclose(self) -> None:
+        """
+        Release HTTP connections, worker threads and cache handles
+        """
+        if self._client is not None:
+            self._client.close()
+        if self._async_client is not None:
+            await self._async_client.close()
+        if self.endpoint_pool is not None:
+            await self.endpoint_pool.aclose()
+        self.web_search_service.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.session_store is not None:
+            self.session_store.close()
+        if self.resilience is not None:
+            self.resilience.close()
+        if self._speculation_executor is not None:
+            self._speculation_executor.shutdown(wait=False, cancel_futures=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return runtime counters for the processor and its optional components
+        """
+        stats: Dict[str, Any] = {
+            "search_queries": {
+                "merged_with_classification": self.merge_search_queries,
+                "generation_calls": self.search_query_calls,
+                "generation_calls_skipped": self.search_query_calls_skipped,
+            },
+            "web_search": self.web_search_service.stats(),
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        if self.local_classifier is not None:
+            stats["local_classifier"] = self.local_classifier.stats()
+        if self.session_store is not None:
+            stats["sessions"] = self.session_store.stats()
+        if self.prompt_compiler is not None:
+            stats["prompts"] = self.prompt_compiler.stats()
+        if self.model_router is not None:
+            stats["model_routing"] = self.model_router.stats()
+        if self.endpoint_pool is not None:
+            stats["endpoints"] = self.endpoint_pool.stats()
+        if self.example_index is not None:
+            stats["few_shot"] = dict(self.example_index.stats(), k=self.few_shot_k)
+        if self.resilience is not None:
+            stats["llm_resilience"] = self.resilience.stats()
+        if self.speculation_threshold is not None:
+            settled = self.speculations["used"] + self.speculations["wasted"]
+            stats["speculative_search"] = dict(
+                self.speculations,
+                threshold=self.speculation_threshold,
+                wasted_ratio=self.speculations["wasted"] / settled if settled else 0.0
             )
+        stats["multi_intent"] = self.intent_splitter.stats()
+        if self.coalesce_requests:
+            stats["coalescing"] = {
+                "classification": self._classification_flight.stats(),
+                "search_queries": self._search_query_flight.stats(),
+            }
+        return stats
+    
+    def _fallback_response(self) -> AssistantResponse:
+        """
+        Build the response returned when processing fails
+        """
+        FALLBACK_RESPONSES.inc()
+        return AssistantResponse(
+            intent_category=IntentCategory.OTHER,
+            entities=EntityModel(),
+            confidence_score=0.0,
+            follow_up_questions=["I'm sorry, I couldn't understand your request. Could you please rephrase it?"],
+            reasoning="Error occurred during processing"
+        )
+    
+    def _classification_messages(self, user_input: str) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for intent classification
+        """
+        examples = self._few_shot_examples(user_input)
+        if self.prompt_compiler is not None:
+            # The compiler counts the examples against the prompt budget and drops them first
+            return self.prompt_compiler.messages(user_input, with_search=self.merge_search_queries, examples=examples)
+        content = self.classification_prompt.format(user_input=user_input)
+        if examples:
+            # The system message stays identical across calls so its prefix can still be cached
+            content = FEW_SHOT_EXAMPLES_TEMPLATE.format(examples="\n".join(examples)) + content
+        return [
+            {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+            {"role": "user", "content": content}
+        ]
+    
+    def _few_shot_examples(self, user_input: str) -> List[str]:
+        """
+        Render the top-k most similar labelled examples, most similar first; none when none are close enough
+        """
+        if self.example_index is None:
+            return []
+        matches = self.example_index.search(user_input, self.few_shot_k)
+        rendered = []
+        for _, (example_input, output) in matches:
+            # Reasoning and empty entities only cost tokens
+            output = {key: value for key, value in output.items() if key != "reasoning"}
+            output["entities"] = {key: value for key, value in output.get("entities", {}).items() if value is not None}
+            rendered.append(FEW_SHOT_EXAMPLE_TEMPLATE.format(
+                user_input=json.dumps(example_input), output=json.dumps(output, separators=(",", ":"))
+            ))
+        return rendered
     
-    def _classify_intent(self, user_input: str) -> str:
+    def _classify_intent(self, user_input: str, deployment: Optional[str] = None) -> str:
         """
         Use Azure OpenAI to classify intent and extract entities
         """
-        prompt = INTENT_CLASSIFICATION_PROMPT.format(user_input=user_input)
+        return self._complete("classification", self._classification_messages(user_input), temperature=0.1, max_tokens=1000,
+                              response_format=self.response_format, deployment=deployment)
         
-        response = self.client.chat.completions.create(
-            model=self.deployment_name,  # Use deployment name instead of model name
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that extracts structured information from user requests. Always respond with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.1,
-            max_tokens=1000
-        )
+    async def _aclassify_intent(self, user_input: str, deployment: Optional[str] = None) -> str:
+        """
+        Async variant of _classify_intent
+        """
+        return await self._acomplete("classification", self._classification_messages(user_input), temperature=0.1, max_tokens=1000,
+                                     response_format=self.response_format, deployment=deployment)
+    
+    def _route(self, call: Callable[[str], str]) -> AssistantResponse:
+        """
+        Run a classification call on each deployment tier in turn until one
+        gives a parseable, confident enough answer; the last tier's answer is
+        accepted as is. If a higher tier fails, the most confident lower-tier
+        answer is kept. Errors from the call itself raise _LLMCallFailed.
+        """
+        deployments = self.model_router.deployments if self.model_router is not None else [self.deployment_name]
+        best: Optional[Tuple[str, AssistantResponse]] = None
+        for tier, deployment in enumerate(deployments):
+            last = tier == len(deployments) - 1
+            try:
+                content = call(deployment)
+            except Exception as e:
+                if best is None:
+                    raise _LLMCallFailed() from e
+                logger.warning(f"Escalation to {deployment} failed, keeping the {best[0]} answer: {str(e)}")
+                break
+            try:
+                response = self._parse_llm_response(content)
+            except Exception:
+                if last and best is None:
+                    raise
+                if not last:
+                    self.model_router.record_escalation(deployment, "parse_failure")
+                continue
+            if last or not self.model_router.should_escalate(response):
+                self._record_answer(deployment)
+                return response
+            self.model_router.record_escalation(deployment, "low_confidence")
+            if best is None or response.confidence_score > best[1].confidence_score:
+                best = (deployment, response)
+        self._record_answer(best[0])
+        return best[1]
+    
+    async def _aroute(self, call: Callable[[str], Awaitable[str]]) -> AssistantResponse:
+        """
+        Async variant of _route
+        """
+        deployments = self.model_router.deployments if self.model_router is not None else [self.deployment_name]
+        best: Optional[Tuple[str, AssistantResponse]] = None
+        for tier, deployment in enumerate(deployments):
+            last = tier == len(deployments) - 1
+            try:
+                content = await call(deployment)
+            except Exception as e:
+                if best is None:
+                    raise _LLMCallFailed() from e
+                logger.warning(f"Escalation to {deployment} failed, keeping the {best[0]} answer: {str(e)}")
+                break
+            try:
+                response = self._parse_llm_response(content)
+            except Exception:
+                if last and best is None:
+                    raise
+                if not last:
+                    self.model_router.record_escalation(deployment, "parse_failure")
+                continue
+            if last or not self.model_router.should_escalate(response):
+                self._record_answer(deployment)
+                return response
+            self.model_router.record_escalation(deployment, "low_confidence")
+            if best is None or response.confidence_score > best[1].confidence_score:
+                best = (deployment, response)
+        self._record_answer(best[0])
+        return best[1]
+    
+    @property
+    def _fast_deployment(self) -> str:
+        """
+        Deployment for simple generation calls such as search queries: the cheapest tier
+        """
+        return self.model_router.deployments[0] if self.model_router is not None else self.deployment_name
+    
+    def _record_answer(self, deployment: str) -> None:
+        if self.model_router is not None:
+            self.model_router.record_answer(deployment)
+    
+    def _complete(self, call: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                       response_format: Optional[Dict[str, Any]] = None, deployment: Optional[str] = None) -> str:
+        """
+        Run one chat-completions request and return the message content
+        """
+        extra: Dict[str, Any] = {"response_format": response_format} if response_format else {}
+        deployment = deployment or self.deployment_name
+        def request():
+            create = self.endpoint_pool.create if self.endpoint_pool is not None else self.client.chat.completions.create
+            with STAGE_LATENCY.time(f"llm_{call}"), self._watch_throttling():
+                return create(
+                    model=deployment,  # Use deployment name instead of model name
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **extra
+                )
+        
+        start = time.perf_counter()
+        response = self.resilience.call(request) if self.resilience is not None else request()
+        record_llm_usage(response, call)
+        if self.model_router is not None:
+            self.model_router.record_call(deployment, time.perf_counter() - start, response)
+        
+        content = response.choices[0].message.content
+        if content is None:
+            raise ValueError(f"OpenAI returned no content for {call}")
+        return content
+    
+    async def _acomplete(self, call: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int,
+                              response_format: Optional[Dict[str, Any]] = None, deployment: Optional[str] = None) -> str:
+        """
+        Async variant of _complete
+        """
+        extra: Dict[str, Any] = {"response_format": response_format} if response_format else {}
+        deployment = deployment or self.deployment_name
+        async def request():
+            create = self.endpoint_pool.acreate if self.endpoint_pool is not None else self.async_client.chat.completions.create
+            with STAGE_LATENCY.time(f"llm_{call}"), self._watch_throttling():
+                return await create(
+                    model=deployment,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    **extra
+                )
+        
+        start = time.perf_counter()
+        response = await (self.resilience.acall(request) if self.resilience is not None else request())
+        record_llm_usage(response, call)
+        if self.model_router is not None:
+            self.model_router.record_call(deployment, time.perf_counter() - start, response)
         
         content = response.choices[0].message.content
         if content is None:
-            raise ValueError("OpenAI returned no content")
+            raise ValueError(f"OpenAI returned no content for {call}")
         return content
     
+    @contextmanager
+    def _watch_throttling(self) -> Iterator[None]:
+        """
+        Count 429 responses and report them to the admission controller, if any
+        """
+        try:
+            yield
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                LLM_THROTTLED.inc()
+                if self.on_throttled is not None:
+                    self.on_throttled()
+            raise
+    
+    def _batch_classification_messages(self, user_inputs: List[str]) -> List[Dict[str, str]]:
+        """
+        Build the chat messages for classifying several inputs in one call
+        """
+        if self.prompt_compiler is not None:
+            return self.prompt_compiler.batch_messages(user_inputs)
+        numbered = "\n".join(f"{i}. {json.dumps(user_input)}" for i, user_input in enumerate(user_inputs, start=1))
+        return [
+            {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+            {"role": "user", "content": BATCH_INTENT_CLASSIFICATION_PROMPT.format(user_inputs=numbered)}
+        ]
+    
+    def _classify_intent_batch(self, user_inputs: List[str]) -> str:
+        """
+        Use Azure OpenAI to classify several inputs in a single round-trip
+        """
+        return self._complete("batch_classification", self._batch_classification_messages(user_inputs),
+                              temperature=0.1, max_tokens=min(1000 * len(user_inputs), 4000))
+    
+    async def _aclassify_intent_batch(self, user_inputs: List[str]) -> str:
+        """
+        Async variant of _classify_intent_batch
+        """
+        return await self._acomplete("batch_classification", self._batch_classification_messages(user_inputs),
+                                     temperature=0.1, max_tokens=min(1000 * len(user_inputs), 4000))
+    
+    def _parse_batch_response(self, llm_response: str, expected: int) -> List[AssistantResponse]:
+        """
+        Split a JSON array response back into one AssistantResponse per input
+        """
+        try:
+            with STAGE_LATENCY.time("parse_batch"):
+                items = self._validate_json(llm_response, _BATCH_ADAPTER.validate_json, "[")
+                if len(items) != expected:
+                    raise ValueError(f"Expected a JSON array of {expected} items")
+                if all(item.index is not None for item in items):
+                    items = sorted(items, key=lambda item: item.index)
+                    if [item.index for item in items] != list(range(1, expected + 1)):
+                        raise ValueError("Batch response indices do not match the inputs")
+                return [item.to_response() for item in items]
+        except Exception:
+            PARSE_FAILURES.inc("batch_classification")
+            raise
+    
     def _parse_llm_response(self, llm_response: str) -> AssistantResponse:
         """
         Parse LLM response into structured format
         """
         try:
-            # Clean the response to extract JSON
-            json_str = llm_response.strip()
-            if json_str.startswith("```json"):
-                json_str = json_str[7:-3]
-            elif json_str.startswith("```"):
-                json_str = json_str[3:-3]
-            
-            data = json.loads(json_str)
-            
-            # Create EntityModel
-            entities = EntityModel(**data.get("entities", {}))
-            
-            # Create AssistantResponse
-            response = AssistantResponse(
-                intent_category=IntentCategory(data.get("intent_category", "other")),
-                entities=entities,
-                confidence_score=data.get("confidence_score", 0.5),
-                follow_up_questions=data.get("follow_up_questions", []),
-                reasoning=data.get("reasoning", "")
-            )
-            
-            return response
+            with STAGE_LATENCY.time("parse"):
+                return self._validate_json(llm_response, LLMClassification.model_validate_json, "{").to_response()
         
         except Exception as e:
+            PARSE_FAILURES.inc("classification")
             logger.error(f"Error parsing LLM response: {str(e)}")
             raise e
     
-    def _perform_web_search(self, user_input: str) -> List[WebSearchResult]:
+    @staticmethod
+    def _validate_json(llm_response: str, validate, opening: str):
+        """
+        Validate the response as JSON in one pass; if the model wrapped it in
+        prose or code fences, recover the first valid JSON value instead
+        """
+        try:
+            return validate(llm_response.strip())
+        except ValueError:
+            return extract_json(llm_response, validate, opening)
+    
+    def _perform_web_search(self, user_input: str, search_queries: Optional[List[str]] = None) -> List[WebSearchResult]:
         """
         Perform web search for queries that don't fit standard categories
         """
         try:
-            # Generate search queries using LLM
-            search_queries = self._generate_search_queries(user_input)
+            # Generate search queries using LLM unless the classification already provided them
+            search_queries = self._resolve_search_queries(user_input, search_queries)
             
             # Perform web search
             search_results = self.web_search_service.multi_search(search_queries)
@@ -117,6 +1072,36 @@ class IntentProcessor:
             logger.error(f"Error performing web search: {str(e)}")
             return []
     
+    async def _aperform_web_search(self, user_input: str, search_queries: Optional[List[str]] = None) -> List[WebSearchResult]:
+        """
+        Async variant of _perform_web_search
+        """
+        try:
+            search_queries = await self._aresolve_search_queries(user_input, search_queries)
+            return await self.web_search_service.amulti_search(search_queries)
+        
+        except Exception as e:
+            logger.error(f"Error performing web search: {str(e)}")
+            return []
+    
+    def _resolve_search_queries(self, user_input: str, search_queries: Optional[List[str]]) -> List[str]:
+        if search_queries:
+            self.search_query_calls_skipped += 1
+            return search_queries
+        self.search_query_calls += 1
+        if not self.coalesce_requests:
+            return self._generate_search_queries(user_input)
+        return list(self._search_query_flight.do(user_input, lambda: self._generate_search_queries(user_input)))
+    
+    async def _aresolve_search_queries(self, user_input: str, search_queries: Optional[List[str]]) -> List[str]:
+        if search_queries:
+            self.search_query_calls_skipped += 1
+            return search_queries
+        self.search_query_calls += 1
+        if not self.coalesce_requests:
+            return await self._agenerate_search_queries(user_input)
+        return list(await self._search_query_flight.ado(user_input, lambda: self._agenerate_search_queries(user_input)))
+    
     def _generate_search_queries(self, user_input: str) -> List[str]:
         """
         Generate relevant search queries for the user input
@@ -124,22 +1109,35 @@ class IntentProcessor:
         try:
             prompt = WEB_SEARCH_PROMPT.format(user_input=user_input)
             
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,  # Use deployment name instead of model name
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=200
-            )
+            content = self._complete("search_queries", [{"role": "user", "content": prompt}], temperature=0.3, max_tokens=200,
+                                     deployment=self._fast_deployment)
             
-            content = response.choices[0].message.content
-            if content is None:
-                raise ValueError("OpenAI returned no content for search query generation")
+            return self._split_search_queries(content)
+        
+        except Exception as e:
+            logger.error(f"Error generating search queries: {str(e)}")
+            return [user_input]  # Fallback to original input
+    
+    async def _agenerate_search_queries(self, user_input: str) -> List[str]:
+        """
+        Async variant of _generate_search_queries
+        """
+        try:
+            prompt = WEB_SEARCH_PROMPT.format(user_input=user_input)
+            
+            content = await self._acomplete("search_queries", [{"role": "user", "content": prompt}], temperature=0.3, max_tokens=200,
+                                            deployment=self._fast_deployment)
 
-            queries = content.strip().split('\n')
-            return [q.strip() for q in queries if q.strip()]
+            return self._split_search_queries(content)
         
         except Exception as e:
             logger.error(f"Error generating search queries: {str(e)}")
-            return [user_input]  # Fallback to original input
\ No newline at end of file
+            return [user_input]
+    
+    @staticmethod
+    def _split_search_queries(content: str) -> List[str]:
+        """
+        Split the LLM output into one search query per line
+        """
+        queries = content.strip().split('\n')
+        return [q.strip() for q in queries if q.strip()]
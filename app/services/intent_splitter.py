@@ -0,0 +1,102 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional
+from app.models import IntentCategory
+from app.services.local_classifier import LocalIntentClassifier
+
+# Clause boundaries a compound request is split on
+_CONJUNCTION_RE = re.compile(r"\s*[;,]?\s+(?:and then|and also|as well as|and|then|also|plus)\s+|\s*;\s*", re.IGNORECASE)
+
+# A leading verb carried over to clauses that leave it out ("book a cab and a table")
+_VERB_RE = re.compile(r"^(book|reserve|find|get|order|arrange|plan|buy|schedule|call)\b", re.IGNORECASE)
+
+# A clause stands as its own request when it has a verb of its own, or starts
+# with an object ("a table for two") that a carried-over verb can act on
+_ACTION_VERB_RE = re.compile(
+    r"\b(book|reserve|find|get|order|arrange|plan|buy|schedule|call|need|want|hire|send|pick|search|look)\b",
+    re.IGNORECASE
+)
+_OBJECT_RE = re.compile(r"^(a|an|the|some|one|two|three|four|five|\d+)\b", re.IGNORECASE)
+
+
+class IntentSplitter:
+    """
+    Splits compound requests into one sub-request per intent with the local
+    keyword rules, so decomposition needs no LLM call.
+
+    The input is cut at conjunctions; clauses without a category cue are
+    joined to the clause before them, and neighbouring clauses with the same
+    category are joined back together. The input is only split when at least
+    two different categories remain, each part scores at least min_confidence
+    on its own and each has its own verb or object; otherwise a category cue
+    inside a noun phrase ("dinner and drinks near my hotel") would split a
+    single request.
+    """
+
+    def __init__(self, classifier: Optional[LocalIntentClassifier] = None, max_parts: int = 4,
+                 min_confidence: float = 0.4):
+        self.classifier = classifier or LocalIntentClassifier()
+        self.max_parts = max_parts
+        self.min_confidence = min_confidence
+        self.requests = 0
+        self.split_requests = 0
+        self.sub_requests = 0
+        self._lock = threading.Lock()
+
+    def split(self, user_input: str) -> List[str]:
+        """
+        The sub-requests of an input, or just the input when it has one intent
+        """
+        parts = self._group(user_input)
+        if not 2 <= len(parts) <= self.max_parts:
+            parts = [user_input]
+        with self._lock:
+            self.requests += 1
+            if len(parts) > 1:
+                self.split_requests += 1
+                self.sub_requests += len(parts)
+        return parts
+
+    def _group(self, user_input: str) -> List[str]:
+        groups: List[List[str]] = []
+        categories: List[Optional[IntentCategory]] = []
+        for clause in _CONJUNCTION_RE.split(user_input):
+            clause = clause.strip(" ,.")
+            if not clause:
+                continue
+            category, _, _ = self.classifier.score(clause)
+            if groups and (category is None or category == categories[-1]):
+                groups[-1].append(clause)
+            elif groups and categories[-1] is None:
+                # Leading clauses without a cue belong to the first categorised one
+                groups[-1].append(clause)
+                categories[-1] = category
+            else:
+                groups.append([clause])
+                categories.append(category)
+        if len(groups) < 2:
+            return [user_input]
+
+        sub_requests = [" and ".join(group) for group in groups]
+        if not all(self._stands_alone(part) for part in sub_requests):
+            return [user_input]
+        verb = _VERB_RE.match(sub_requests[0])
+        if verb:
+            sub_requests = [sub_requests[0]] + [
+                part if _VERB_RE.match(part) else f"{verb.group(0)} {part}" for part in sub_requests[1:]
+            ]
+        return sub_requests
+
+    def _stands_alone(self, part: str) -> bool:
+        category, confidence, _ = self.classifier.score(part)
+        if category is None or confidence < self.min_confidence:
+            return False
+        return bool(_ACTION_VERB_RE.search(part) or _OBJECT_RE.match(part))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "split": self.split_requests,
+            "sub_requests": self.sub_requests,
+            "split_fraction": self.split_requests / self.requests if self.requests else 0.0,
+        }
@@ -0,0 +1,223 @@
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from app.models import AssistantResponse, IntentCategory, EntityModel
+from app.services.entity_extractor import LocalEntityExtractor
+
+# (pattern, weight) pairs per category. Strong cues score close to 1.0,
+# weaker cues only count towards confidence when they corroborate each other.
+_INTENT_RULES: Dict[IntentCategory, List[Tuple[str, float]]] = {
+    IntentCategory.CAB_BOOKING: [
+        (r"\b(cab|taxi|uber|ola|lyft|rideshare|chauffeur)s?\b", 0.93),
+        (r"\b(pick ?up|drop ?off|ride to|ride from)\b", 0.6),
+        (r"\b(sedan|suv|hatchback|auto ?rickshaw)\b", 0.5),
+    ],
+    IntentCategory.DINING: [
+        (r"\btable for\b", 0.93),
+        (r"\b(restaurant|eatery|bistro|diner|cafe)s?\b", 0.9),
+        (r"\b(reserve|book) (a )?table\b", 0.93),
+        (r"\b(dinner|lunch|brunch|breakfast)\b", 0.55),
+        (r"\b(cuisine|menu|vegan|vegetarian|gluten[- ]free)\b", 0.45),
+    ],
+    IntentCategory.TRAVEL: [
+        (r"\b(flight|flights|hotel|hotels|resort|hostel|itinerary)\b", 0.9),
+        (r"\b(trip|vacation|holiday|getaway|sightseeing)\b", 0.6),
+        (r"\b(visa|passport)\b", 0.35),
+    ],
+    IntentCategory.GIFTING: [
+        (r"\b(gift|gifts|present for)\b", 0.92),
+        (r"\b(birthday|anniversary|wedding)\b", 0.35),
+    ],
+}
+
+# Free-text entities the local extractor cannot read (places, recipients, cuisines, budgets);
+# inputs that carry them go to the LLM so the answer does not drop them
+_FREE_TEXT_ENTITY_RES: Dict[IntentCategory, re.Pattern] = {
+    IntentCategory.CAB_BOOKING: re.compile(r"\b(to|from|towards|via)\b", re.IGNORECASE),
+    IntentCategory.DINING: re.compile(
+        r"\b(in|near|around|at the|italian|chinese|indian|mexican|thai|japanese|french|korean|continental|"
+        r"mediterranean|sushi|pizza|biryani|seafood|vegan|vegetarian|gluten[- ]free)\b",
+        re.IGNORECASE
+    ),
+    IntentCategory.TRAVEL: re.compile(r"\b(to|in|from|under|budget)\b", re.IGNORECASE),
+    IntentCategory.GIFTING: re.compile(r"\b(for|under|below|budget)\b", re.IGNORECASE),
+}
+
+# Requests about an existing booking rather than a new one
+_CHANGE_RE = re.compile(r"\b(cancel|reschedule|change|modify|refund|complain|complaint)\b", re.IGNORECASE)
+
+# Inputs phrased as general questions are left to the LLM, which may route them to web search
+_QUESTION_RE = re.compile(r"^\s*(how|what|why|when|where|who|which|is|are|can|does|do)\b", re.IGNORECASE)
+
+# Cues that an input asks for information rather than a booking, used to guess "other" early
+_INFORMATION_RE = re.compile(
+    r"\b(how (to|do|does|can|much|many|long)|what (is|are)|why|explain|tips|guide|difference between)\b|\?\s*$",
+    re.IGNORECASE
+)
+_BOOKING_RE = re.compile(r"\b(book|reserve|order|schedule|arrange|hire|buy)\b", re.IGNORECASE)
+
+# Follow-up prompts per category: (entity field, question)
+FOLLOW_UP_FIELDS: Dict[IntentCategory, List[Tuple[str, str]]] = {
+    IntentCategory.DINING: [
+        ("party_size", "How many people will be dining?"),
+        ("date", "What date would you like the reservation for?"),
+        ("time", "What time would you prefer for your reservation?"),
+        ("dietary_restrictions", "Do you have any dietary restrictions?"),
+    ],
+    IntentCategory.TRAVEL: [
+        ("date", "What are your preferred travel dates?"),
+        ("party_size", "How many people are travelling?"),
+        ("budget", "What is your budget for this trip?"),
+    ],
+    IntentCategory.GIFTING: [
+        ("recipient", "Who is the gift for?"),
+        ("budget", "What is your budget for this gift?"),
+    ],
+    IntentCategory.CAB_BOOKING: [
+        ("destination", "Where would you like to go?"),
+        ("time", "What time do you need to be picked up?"),
+        ("pickup_location", "What is your pickup location?"),
+        ("vehicle_type", "Do you have a vehicle preference?"),
+    ],
+}
+
+
+def follow_up_questions(intent_category: IntentCategory, entities: EntityModel) -> List[str]:
+    """
+    Ask for the fields a category needs that are still missing
+    """
+    return [
+        question
+        for field, question in FOLLOW_UP_FIELDS.get(intent_category, [])
+        if not getattr(entities, field)
+    ]
+
+
+class LocalIntentClassifier:
+    """
+    Compiled keyword/regex classifier that answers obvious requests without an LLM call.
+
+    A request is only absorbed when at least `min_cues` rules of one category
+    agree and it carries no free-text entity the local extractor cannot read;
+    entities come from `entity_extractor`.
+    """
+
+    def __init__(self, threshold: float = 0.9, min_cues: int = 2,
+                 entity_extractor: Optional[LocalEntityExtractor] = None):
+        self.threshold = threshold
+        self.min_cues = min_cues
+        self.entity_extractor = entity_extractor or LocalEntityExtractor()
+        self._rules = {
+            category: [(re.compile(pattern, re.IGNORECASE), weight) for pattern, weight in rules]
+            for category, rules in _INTENT_RULES.items()
+        }
+        self.requests = 0
+        self.absorbed = 0
+        self.absorbed_by_intent: Dict[str, int] = {category.value: 0 for category in self._rules}
+        self._lock = threading.Lock()
+
+    def score(self, user_input: str) -> Tuple[Optional[IntentCategory], float, List[str]]:
+        """
+        Return the best matching category, its confidence and the matched cues
+        """
+        scores: Dict[IntentCategory, Tuple[float, List[str]]] = {}
+        for category, rules in self._rules.items():
+            weights = []
+            cues = []
+            for pattern, weight in rules:
+                match = pattern.search(user_input)
+                if match:
+                    weights.append(weight)
+                    cues.append(match.group(0).lower())
+            if weights:
+                # Each corroborating cue closes part of the remaining gap to 1.0
+                confidence = 0.0
+                for weight in sorted(weights, reverse=True):
+                    confidence += (1.0 - confidence) * weight * (1.0 if confidence == 0.0 else 0.5)
+                scores[category] = (confidence, cues)
+
+        if not scores:
+            return None, 0.0, []
+
+        ranked = sorted(scores.items(), key=lambda item: item[1][0], reverse=True)
+        best, (confidence, cues) = ranked[0]
+        if len(ranked) > 1:
+            # Competing categories usually mean a compound or ambiguous request
+            confidence -= ranked[1][1][0] * 0.5
+        if _QUESTION_RE.match(user_input):
+            confidence -= 0.2
+        return best, max(0.0, min(confidence, 0.99)), cues
+
+    def other_likelihood(self, user_input: str) -> float:
+        """
+        Rough chance, from 0 to 1, that the input belongs under "other": few
+        category cues, phrased as a question and without booking verbs
+        """
+        _, confidence, _ = self.score(user_input)
+        likelihood = 1.0 - confidence
+        if not (_QUESTION_RE.match(user_input) or _INFORMATION_RE.search(user_input)):
+            likelihood *= 0.5
+        if _BOOKING_RE.search(user_input):
+            likelihood *= 0.3
+        return round(likelihood, 2)
+
+    def classify(self, user_input: str) -> Optional[AssistantResponse]:
+        """
+        Return a response when confidence clears the threshold, otherwise None
+        so the caller defers to the LLM
+        """
+        category, confidence, cues = self.score(user_input)
+        absorbed = (
+            category is not None
+            and confidence >= self.threshold
+            and len(cues) >= self.min_cues
+            and not _CHANGE_RE.search(user_input)
+            and not _FREE_TEXT_ENTITY_RES[category].search(user_input)
+        )
+        with self._lock:
+            self.requests += 1
+            if absorbed:
+                self.absorbed += 1
+                self.absorbed_by_intent[category.value] += 1
+        if not absorbed:
+            return None
+
+        entities = self.entity_extractor.extract(user_input)
+        return AssistantResponse(
+            intent_category=category,
+            entities=entities,
+            confidence_score=round(confidence, 2),
+            follow_up_questions=follow_up_questions(category, entities),
+            reasoning=f"Matched local rules: {', '.join(cues)}"
+        )
+
+    def guess(self, user_input: str) -> AssistantResponse:
+        """
+        Best local answer regardless of the threshold, for when the LLM is unavailable
+        """
+        category, confidence, cues = self.score(user_input)
+        entities = self.entity_extractor.extract(user_input)
+        if category is None:
+            return AssistantResponse(
+                intent_category=IntentCategory.OTHER,
+                entities=entities,
+                confidence_score=0.0,
+                reasoning="LLM unavailable and no local rules matched"
+            )
+        return AssistantResponse(
+            intent_category=category,
+            entities=entities,
+            confidence_score=round(confidence, 2),
+            follow_up_questions=follow_up_questions(category, entities),
+            reasoning=f"LLM unavailable; matched local rules: {', '.join(cues)}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "requests": self.requests,
+            "absorbed": self.absorbed,
+            "deferred": self.requests - self.absorbed,
+            "absorbed_fraction": self.absorbed / self.requests if self.requests else 0.0,
+            "absorbed_by_intent": dict(self.absorbed_by_intent),
+        }
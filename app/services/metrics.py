@@ -0,0 +1,223 @@
+import bisect
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits to multi-second LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_TIMER = nullcontext()
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labelvalues", "start")
+
+    def __init__(self, histogram: "Histogram", labelvalues: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labelvalues)
+
+
+class Histogram:
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str,
+                 labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> (per-bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labelvalues: str):
+        """
+        Context manager timing a block; a shared no-op when metrics are disabled
+        """
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labelvalues)
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labelvalues, (bucket_counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, labelvalues, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, labelvalues, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labelvalues)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labelvalues)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus-compatible registry. Recording is a single attribute
+    check when disabled, so instrumentation can stay in the hot path.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: List[object] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(self, name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(self, name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics:
+            with metric._lock:
+                if isinstance(metric, Histogram):
+                    metric._series.clear()
+                else:
+                    metric._values.clear()
+
+
+# Process-wide registry and the pipeline's metrics; enabled from app.main
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "assistant_stage_duration_seconds", "Latency of each request pipeline stage", ["stage"]
+)
+REQUEST_LATENCY = REGISTRY.histogram(
+    "assistant_request_duration_seconds", "End-to-end processing latency per intent category", ["intent"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "assistant_llm_tokens_total", "LLM tokens used", ["call", "kind"]
+)
+FALLBACK_RESPONSES = REGISTRY.counter(
+    "assistant_fallback_responses_total", "Fallback responses returned instead of an LLM answer, including degraded ones"
+)
+PARSE_FAILURES = REGISTRY.counter(
+    "assistant_parse_failures_total", "LLM responses that could not be parsed", ["call"]
+)
+SEARCH_FAILURES = REGISTRY.counter(
+    "assistant_search_failures_total", "Web search queries that failed or timed out"
+)
+LLM_RETRIES = REGISTRY.counter(
+    "assistant_llm_retries_total", "LLM requests retried after a transient error"
+)
+LLM_HEDGED_REQUESTS = REGISTRY.counter(
+    "assistant_llm_hedged_requests_total", "Second copies of slow LLM requests that were sent"
+)
+LLM_HEDGE_WINS = REGISTRY.counter(
+    "assistant_llm_hedge_wins_total", "Hedged LLM requests that finished before the original"
+)
+CIRCUIT_BREAKER_TRIPS = REGISTRY.counter(
+    "assistant_circuit_breaker_trips_total", "Times the LLM circuit breaker opened"
+)
+CIRCUIT_BREAKER_REJECTIONS = REGISTRY.counter(
+    "assistant_circuit_breaker_rejections_total", "LLM calls rejected while the circuit breaker was open"
+)
+DEGRADED_RESPONSES = REGISTRY.counter(
+    "assistant_degraded_responses_total", "Classifications answered locally because the LLM was unavailable"
+)
+COALESCED_CALLS = REGISTRY.counter(
+    "assistant_coalesced_calls_total", "Requests that shared an identical in-flight upstream call", ["call"]
+)
+LLM_THROTTLED = REGISTRY.counter(
+    "assistant_llm_throttled_total", "LLM requests rejected with 429 Too Many Requests"
+)
+MODEL_ESCALATIONS = REGISTRY.counter(
+    "assistant_model_escalations_total", "Classifications passed to the next deployment tier", ["deployment", "reason"]
+)
+ENDPOINT_FAILOVERS = REGISTRY.counter(
+    "assistant_llm_endpoint_failovers_total", "LLM calls moved to another endpoint after a transient error", ["endpoint"]
+)
+SPECULATIVE_SEARCHES = REGISTRY.counter(
+    "assistant_speculative_searches_total", "Web searches started before classification finished", ["outcome"]
+)
+ADMISSION_REJECTIONS = REGISTRY.counter(
+    "assistant_admission_rejections_total", "Requests shed by admission control", ["reason", "priority"]
+)
+
+
+def record_llm_usage(response, call: str) -> None:
+    """
+    Count prompt and completion tokens reported by a chat-completions response
+    """
+    if not REGISTRY.enabled:
+        return
+    usage = getattr(response, "usage", None)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None)
+        if isinstance(tokens, int):
+            LLM_TOKENS.inc(call, kind.split("_")[0], amount=tokens)
@@ -0,0 +1,109 @@
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+from app.models import AssistantResponse
+from app.services.metrics import MODEL_ESCALATIONS
+from app.services.resilience import LatencyTracker
+
+
+class ModelTier:
+    """
+    One Azure OpenAI deployment, with optional prices in USD per 1K tokens
+    """
+
+    def __init__(self, deployment: str, prompt_cost_per_1k: float = 0.0, completion_cost_per_1k: float = 0.0):
+        self.deployment = deployment
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.completion_cost_per_1k = completion_cost_per_1k
+        self.calls = 0
+        self.answered = 0
+        self.escalations: Dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency = LatencyTracker(size=1000, min_samples=1)
+
+    @property
+    def cost(self) -> float:
+        return (self.prompt_tokens * self.prompt_cost_per_1k + self.completion_tokens * self.completion_cost_per_1k) / 1000
+
+    def stats(self) -> Dict[str, Any]:
+        escalated = sum(self.escalations.values())
+        decided = self.answered + escalated
+        p50 = self.latency.quantile(0.5)
+        p95 = self.latency.quantile(0.95)
+        return {
+            "deployment": self.deployment,
+            "calls": self.calls,
+            "answered": self.answered,
+            "escalations": dict(self.escalations),
+            "escalation_rate": escalated / decided if decided else 0.0,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class ModelRouter:
+    """
+    Routes classifications through deployments ordered from cheapest to most
+    capable. A response moves up a tier when it cannot be parsed or its
+    confidence falls below the threshold for its intent; the last tier's
+    answer is always accepted.
+    """
+
+    def __init__(self, tiers: Sequence[ModelTier], default_threshold: float = 0.7,
+                 thresholds: Optional[Dict[str, float]] = None):
+        if not tiers:
+            raise ValueError("ModelRouter needs at least one deployment tier")
+        self.tiers = list(tiers)
+        self.default_threshold = default_threshold
+        self.thresholds = dict(thresholds or {})
+        self._by_deployment = {tier.deployment: tier for tier in self.tiers}
+        self._lock = threading.Lock()
+
+    @property
+    def deployments(self) -> List[str]:
+        return [tier.deployment for tier in self.tiers]
+
+    def threshold(self, intent: str) -> float:
+        return self.thresholds.get(intent, self.default_threshold)
+
+    def should_escalate(self, response: AssistantResponse) -> bool:
+        return response.confidence_score < self.threshold(response.intent_category.value)
+
+    def record_call(self, deployment: str, seconds: float, response: Any) -> None:
+        """
+        Count latency and tokens of any chat-completions call made on a tier's deployment
+        """
+        tier = self._by_deployment.get(deployment)
+        if tier is None:
+            return
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        with self._lock:
+            tier.calls += 1
+            if isinstance(prompt_tokens, int):
+                tier.prompt_tokens += prompt_tokens
+            if isinstance(completion_tokens, int):
+                tier.completion_tokens += completion_tokens
+        tier.latency.observe(seconds)
+
+    def record_answer(self, deployment: str) -> None:
+        with self._lock:
+            self._by_deployment[deployment].answered += 1
+
+    def record_escalation(self, deployment: str, reason: str) -> None:
+        tier = self._by_deployment[deployment]
+        with self._lock:
+            tier.escalations[reason] = tier.escalations.get(reason, 0) + 1
+        MODEL_ESCALATIONS.inc(deployment, reason)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "default_threshold": self.default_threshold,
+            "thresholds": dict(self.thresholds),
+            "tiers": [tier.stats() for tier in self.tiers],
+            "total_cost_usd": round(sum(tier.cost for tier in self.tiers), 6),
+        }
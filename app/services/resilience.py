@@ -0,0 +1,336 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from app.services.metrics import (
+    LLM_RETRIES,
+    LLM_HEDGED_REQUESTS,
+    LLM_HEDGE_WINS,
+    CIRCUIT_BREAKER_REJECTIONS,
+    CIRCUIT_BREAKER_TRIPS,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: timeouts, conflicts, throttling and server errors
+_RETRYABLE_STATUS = {408, 409, 429}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Transient Azure OpenAI failures; client errors such as bad requests are not retried
+    """
+    # An error can only come from the SDK once it has been imported, so never import it here
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return False
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in _RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    Opens when the failure rate over the last `window` calls reaches
+    `failure_rate`, rejects calls for `reset_timeout` seconds, then lets a
+    single probe through and closes again if it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_calls: int = 10,
+                 reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.trips = 0
+        self.rejections = 0
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejections += 1
+        CIRCUIT_BREAKER_REJECTIONS.inc()
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                logger.info("LLM circuit breaker closed after a successful probe")
+                self.state = self.CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._outcomes.append(False)
+            if self.state == self.HALF_OPEN:
+                self._trip()
+            elif self.state == self.CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.failure_rate:
+                    self._trip()
+
+    def release_probe(self) -> None:
+        """
+        Free the half-open probe slot when the probe ends without an outcome, e.g. it was cancelled
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def _trip(self) -> None:
+        logger.warning(f"LLM circuit breaker opened for {self.reset_timeout}s")
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+        self._probe_in_flight = False
+        self.trips += 1
+        CIRCUIT_BREAKER_TRIPS.inc()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "trips": self.trips, "rejections": self.rejections}
+
+
+class LatencyTracker:
+    """
+    Recent successful call latencies, used to pick the hedging delay
+    """
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMResilience:
+    """
+    Retries, hedging and circuit breaking around a single LLM request.
+
+    Each attempt is checked against the circuit breaker, so a breaker that opens
+    mid-retry stops the remaining attempts. With hedging enabled, a second copy
+    of a request is sent once it has run longer than the recent p95 latency and
+    whichever finishes first wins.
+    """
+
+    def __init__(self, max_attempts: int = 3, backoff_initial: float = 0.2, backoff_max: float = 2.0,
+                 hedge: bool = False, hedge_quantile: float = 0.95, hedge_min_delay: float = 0.05,
+                 breaker: Optional[CircuitBreaker] = None, latency: Optional[LatencyTracker] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker
+        self.latency = latency or LatencyTracker()
+        self.retries = 0
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+        self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge") if hedge else None
+        self._lock = threading.Lock()
+
+    def call(self, request: Callable[[], T]) -> T:
+        """
+        Run a blocking request with retries and, if enabled, hedging
+        """
+        from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=self.backoff_initial, max=self.backoff_max),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=self._count_retry,
+            reraise=True
+        )
+        return retrying(self._attempt, request)
+
+    async def acall(self, request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async variant of call
+        """
+        from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=self.backoff_initial, max=self.backoff_max),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=self._count_retry,
+            reraise=True
+        )
+        return await retrying(self._aattempt, request)
+
+    def _attempt(self, request: Callable[[], T]) -> T:
+        self._check_breaker()
+        delay = self._hedge_delay()
+        start = time.perf_counter()
+        try:
+            result = self._hedged(request, delay) if delay is not None else request()
+        except Exception as e:
+            self._record_outcome(healthy=not is_retryable(e))
+            raise
+        except BaseException:
+            # Cancelled (a hedge loser or discarded speculation) before any outcome: never strand the probe
+            self._release_probe()
+            raise
+        self.latency.observe(time.perf_counter() - start)
+        self._record_outcome(healthy=True)
+        return result
+
+    async def _aattempt(self, request: Callable[[], Awaitable[T]]) -> T:
+        self._check_breaker()
+        delay = self._hedge_delay()
+        start = time.perf_counter()
+        try:
+            result = await (self._ahedged(request, delay) if delay is not None else request())
+        except Exception as e:
+            self._record_outcome(healthy=not is_retryable(e))
+            raise
+        except BaseException:
+            # Cancelled (a hedge loser or discarded speculation) before any outcome: never strand the probe
+            self._release_probe()
+            raise
+        self.latency.observe(time.perf_counter() - start)
+        self._record_outcome(healthy=True)
+        return result
+
+    def _hedged(self, request: Callable[[], T], delay: float) -> T:
+        primary = self._executor.submit(request)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        self._count_hedge()
+        hedge = self._executor.submit(request)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count_hedge_win()
+                    # The slower request cannot be cancelled once running; it finishes in the background
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def _ahedged(self, request: Callable[[], Awaitable[T]], delay: float) -> T:
+        primary = asyncio.ensure_future(request())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        self._count_hedge()
+        hedge = asyncio.ensure_future(request())
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count_hedge_win()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _hedge_delay(self) -> Optional[float]:
+        """
+        Delay before hedging, or None while hedging is off or there is too little latency data
+        """
+        if not self.hedge:
+            return None
+        p95 = self.latency.quantile(self.hedge_quantile)
+        return None if p95 is None else max(self.hedge_min_delay, p95)
+
+    def _check_breaker(self) -> None:
+        if self.breaker is not None and not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+    def _release_probe(self) -> None:
+        if self.breaker is not None:
+            self.breaker.release_probe()
+
+    def _record_outcome(self, healthy: bool) -> None:
+        """
+        Feed the breaker; errors such as bad requests still prove the service is reachable
+        """
+        if self.breaker is None:
+            return
+        if healthy:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _count_retry(self, retry_state) -> None:
+        with self._lock:
+            self.retries += 1
+        LLM_RETRIES.inc()
+        logger.warning(f"Retrying LLM call after attempt {retry_state.attempt_number} failed: {retry_state.outcome.exception()}")
+
+    def _count_hedge(self) -> None:
+        with self._lock:
+            self.hedged_requests += 1
+        LLM_HEDGED_REQUESTS.inc()
+
+    def _count_hedge_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+        LLM_HEDGE_WINS.inc()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {
+            "max_attempts": self.max_attempts,
+            "retries": self.retries,
+            "hedging": self.hedge,
+            "hedge_delay_seconds": self._hedge_delay(),
+            "hedged_requests": self.hedged_requests,
+            "hedge_wins": self.hedge_wins,
+        }
+        if self.breaker is not None:
+            stats["circuit_breaker"] = self.breaker.stats()
+        return stats
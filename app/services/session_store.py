@@ -0,0 +1,68 @@
+import logging
+import threading
+import uuid
+from typing import Any, Dict, Optional
+from app.models import AssistantResponse
+from app.services.cache import ResponseCache, create_cache
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """
+    Conversation state keyed by session_id, kept in a bounded LRU+TTL backend.
+
+    Each session holds the last AssistantResponse (intent, partial entities and
+    the follow-up questions that were asked) so the next turn can be merged
+    incrementally instead of being classified cold.
+    """
+
+    def __init__(self, backend: ResponseCache):
+        self.backend = backend
+        self.incremental_turns = 0
+        self.new_sessions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_session_id() -> str:
+        return uuid.uuid4().hex
+
+    def load(self, session_id: str) -> Optional[AssistantResponse]:
+        try:
+            state = self.backend.get(session_id)
+            if state is not None:
+                return AssistantResponse.model_validate_json(state)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable session state for {session_id}: {str(e)}")
+        return None
+
+    def save(self, session_id: str, response: AssistantResponse) -> None:
+        try:
+            # Web search results are not needed to continue the conversation
+            self.backend.set(session_id, response.model_dump_json(exclude={"web_search_results", "session_id"}))
+        except Exception as e:
+            logger.warning(f"Failed to store session state for {session_id}: {str(e)}")
+
+    def record_turn(self, incremental: bool) -> None:
+        with self._lock:
+            if incremental:
+                self.incremental_turns += 1
+            else:
+                self.new_sessions += 1
+
+    def close(self) -> None:
+        self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.backend.stats()
+        stats.update({"incremental_turns": self.incremental_turns, "new_sessions": self.new_sessions})
+        return stats
+
+
+def create_session_store(backend: str, max_sessions: int = 10000, ttl_seconds: float = 1800.0,
+                         path: str = "sessions.db") -> Optional[SessionStore]:
+    """
+    Build a session store from configuration; returns None when sessions are disabled
+    """
+    store = create_cache(backend, max_size=max_sessions, ttl_seconds=ttl_seconds, path=path, table="sessions")
+    return SessionStore(store) if store is not None else None
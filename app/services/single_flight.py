@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+from app.services.metrics import COALESCED_CALLS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers with the same key share one in-flight call.
+
+    The first caller runs the function; callers arriving while it is still
+    running wait for and receive the same result (or exception). Results are
+    shared objects, so callers that mutate them must copy first.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._futures: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], "asyncio.Future"] = {}
+        self._waiters: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], int] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Run fn once for all concurrent blocking callers with the same key
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            leader = future is None
+            if leader:
+                future = self._futures[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            COALESCED_CALLS.inc(self.name)
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._futures.pop(key, None)
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Async variant of do. The shared call runs as its own task, so a
+        cancelled caller does not cancel it for the others; it is only
+        cancelled once every caller waiting on it has been.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (loop, key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if leader:
+                task = self._tasks[task_key] = asyncio.ensure_future(fn())
+                task.add_done_callback(lambda _: self._forget(task_key))
+                self.calls += 1
+            else:
+                self.coalesced += 1
+            self._waiters[task_key] = self._waiters.get(task_key, 0) + 1
+        if not leader:
+            COALESCED_CALLS.inc(self.name)
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            with self._lock:
+                abandoned = self._waiters.get(task_key) == 1 and self._tasks.get(task_key) is task
+            if abandoned:
+                task.cancel()
+            raise
+        finally:
+            with self._lock:
+                if self._tasks.get(task_key) is task:
+                    self._waiters[task_key] -= 1
+
+    def _forget(self, task_key: Tuple[asyncio.AbstractEventLoop, Hashable]) -> None:
+        with self._lock:
+            self._tasks.pop(task_key, None)
+            self._waiters.pop(task_key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.calls + self.coalesced
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_fraction": self.coalesced / total if total else 0.0,
+        }
@@ -1,47 +1,319 @@
-from duckduckgo_search import DDGS  
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, wait
 from app.models import WebSearchResult
+from app.services.cache import ResponseCache, normalize_text
+from app.services.metrics import STAGE_LATENCY, SEARCH_FAILURES
+from app.services.single_flight import SingleFlight
+import asyncio
+import json
 import logging
+import sys
+import threading
 
 logger = logging.getLogger(__name__)
 
+
+def __getattr__(name: str):
+    """
+    duckduckgo_search pulls in a heavy HTTP and HTML parsing stack, so DDGS is
+    only imported when the first search runs
+    """
+    if name == "DDGS":
+        from duckduckgo_search import DDGS
+        globals()[name] = DDGS
+        return DDGS
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 class WebSearchService:
-    def search(self, query: str, max_results: int = 5) -> List[WebSearchResult]:
+    def __init__(self, query_timeout: float = 5.0, deadline: float = 8.0, max_workers: int = 8,
+                 cache: Optional[ResponseCache] = None, fresh_seconds: float = 900.0, coalesce: bool = True):
         """
-        Perform web search using DuckDuckGo (stable DDGS() method)
+        query_timeout bounds each DuckDuckGo request; deadline bounds a whole
+        multi_search, after which whatever results have arrived are returned.
+        Async fan-outs run on a thread pool of their own, so queries abandoned
+        at a timeout cannot fill the shared pool that later searches queue on.
+
+        With a cache, results younger than fresh_seconds are served as-is; older
+        ones are served immediately while a background search refreshes them,
+        until the cache's own TTL drops them. With coalesce, concurrent identical
+        queries share one DuckDuckGo request.
         """
-        try:
-            search_results = DDGS().text(query, max_results=max_results)
-            if not search_results:
-                return []
+        self.query_timeout = query_timeout
+        self.deadline = deadline
+        self.cache = cache
+        self.fresh_seconds = fresh_seconds
+        self.stale_served = 0
+        self.refreshes = 0
+        self.coalesce = coalesce
+        self._flight = SingleFlight("web_search")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-search")
+        # Idle DDGS sessions, borrowed one per query so HTTP connections are reused between queries
+        self._sessions: List[Any] = []
+        self._refreshing: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _checkout_ddgs(self):
+        with self._lock:
+            if self._sessions:
+                return self._sessions.pop()
+        # Looked up on the module so the lazy import (or a substituted class) is used. The timeout
+        # is applied by the HTTP client inside the worker, so an abandoned query still ends on time
+        return sys.modules[__name__].DDGS(timeout=self.query_timeout)
+
+    def _checkin_ddgs(self, ddgs) -> None:
+        with self._lock:
+            self._sessions.append(ddgs)
 
-            results = []
-            for result in search_results:
-                title = result.get('title', '')
-                url = result.get('href', '')
-                snippet = result.get('body', '')
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.cache is not None:
+            self.cache.close()
 
-                web_result = WebSearchResult(
-                    title=title,
-                    url=url,
-                    snippet=snippet
-                )
-                results.append(web_result)
-            return results
+    def search(self, query: str, max_results: int = 5) -> List[WebSearchResult]:
+        """
+        Perform web search using DuckDuckGo (stable DDGS() method), answering from the cache when possible
+        """
+        cached = self._cached(query, max_results)
+        if cached is not None:
+            return cached
+        try:
+            if self.coalesce:
+                return list(self._flight.do(self._cache_key(query, max_results), lambda: self._fetch_and_store(query, max_results)))
+            return self._fetch_and_store(query, max_results)
+        except Exception as e:
+            SEARCH_FAILURES.inc()
+            logger.error(f"Web search failed for query '{query}': {str(e)}")
+            return []
 
+    async def asearch(self, query: str, max_results: int = 5,
+                      executor: Optional[ThreadPoolExecutor] = None) -> List[WebSearchResult]:
+        """
+        Async variant of search; DDGS is blocking so it runs in a worker thread,
+        taken from executor when given and from the shared pool otherwise
+        """
+        cached = self._cached(query, max_results)
+        if cached is not None:
+            return cached
+        loop = asyncio.get_running_loop()
+        executor = executor or self._executor
+        try:
+            if not self.coalesce:
+                return await loop.run_in_executor(executor, self._fetch_and_store, query, max_results)
+            # Followers wait on the event loop instead of tying up a worker thread each; the worker
+            # fetches directly so the call is not counted a second time by the blocking single-flight
+            results = await self._flight.ado(
+                self._cache_key(query, max_results),
+                lambda: loop.run_in_executor(executor, self._fetch_and_store, query, max_results)
+            )
         except Exception as e:
+            SEARCH_FAILURES.inc()
             logger.error(f"Web search failed for query '{query}': {str(e)}")
             return []
+        return list(results)
+
+    def _fetch_and_store(self, query: str, max_results: int) -> List[WebSearchResult]:
+        results = self._fetch(query, max_results)
+        self._store(query, max_results, results)
+        return results
+
+    def _fetch(self, query: str, max_results: int) -> List[WebSearchResult]:
+        ddgs = self._checkout_ddgs()
+        try:
+            with STAGE_LATENCY.time("web_search_query"):
+                search_results = ddgs.text(query, max_results=max_results)
+        finally:
+            self._checkin_ddgs(ddgs)
+        if not search_results:
+            return []
+
+        results = []
+        for result in search_results:
+            title = result.get('title', '')
+            url = result.get('href', '')
+            snippet = result.get('body', '')
+
+            web_result = WebSearchResult(
+                title=title,
+                url=url,
+                snippet=snippet
+            )
+            results.append(web_result)
+        return results
+
+    @staticmethod
+    def _cache_key(query: str, max_results: int) -> str:
+        return f"{max_results}:{normalize_text(query)}"
+
+    def _cached(self, query: str, max_results: int) -> Optional[List[WebSearchResult]]:
+        """
+        Return cached results, scheduling a background refresh when they are stale
+        """
+        if self.cache is None:
+            return None
+        key = self._cache_key(query, max_results)
+        try:
+            with STAGE_LATENCY.time("web_search_cache_lookup"):
+                entry = self.cache.get(key)
+                if entry is None:
+                    return None
+                data = json.loads(entry)
+                results = [WebSearchResult(**result) for result in data["results"]]
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable web search cache entry: {str(e)}")
+            return None
+        if self.cache.clock() - data["fetched_at"] >= self.fresh_seconds:
+            self._refresh(key, query, max_results)
+        return results
+
+    def _refresh(self, key: str, query: str, max_results: int) -> None:
+        with self._lock:
+            self.stale_served += 1
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self.refreshes += 1
+        try:
+            self._executor.submit(self._revalidate, key, query, max_results)
+        except RuntimeError:
+            # Executor already shut down
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _revalidate(self, key: str, query: str, max_results: int) -> None:
+        try:
+            self._store(query, max_results, self._fetch(query, max_results))
+        except Exception as e:
+            SEARCH_FAILURES.inc()
+            logger.warning(f"Background refresh failed for query '{query}': {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, query: str, max_results: int, results: List[WebSearchResult]) -> None:
+        # Empty result lists are often rate limiting, so they are not cached
+        if self.cache is None or not results:
+            return
+        entry = {"fetched_at": self.cache.clock(), "results": [result.model_dump() for result in results]}
+        try:
+            self.cache.set(self._cache_key(query, max_results), json.dumps(entry))
+        except Exception as e:
+            logger.warning(f"Failed to cache web search results: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"stale_served": self.stale_served, "background_refreshes": self.refreshes}
+        if self.coalesce:
+            stats["coalescing"] = self._flight.stats()
+        if self.cache is not None:
+            stats["cache"] = self.cache.stats()
+        return stats
 
     def multi_search(self, queries: List[str], max_results_per_query: int = 3) -> List[WebSearchResult]:
         """
-        Perform multiple searches and combine results
+        Perform multiple searches concurrently and combine results
+        """
+        with STAGE_LATENCY.time("web_search"):
+            futures = [self._executor.submit(self.search, query, max_results_per_query) for query in queries]
+            done, not_done = wait(futures, timeout=self.deadline)
+        if not_done:
+            SEARCH_FAILURES.inc(amount=len(not_done))
+            logger.warning(f"Web search deadline exceeded; dropping {len(not_done)} of {len(futures)} queries")
+            for future in not_done:
+                future.cancel()
+
+        # Collect in query order so de-duplication is deterministic
+        all_results = []
+        for future in futures:
+            if future in done:
+                all_results.extend(future.result())
+
+        return self._dedupe_results(all_results)
+
+    async def amulti_search(self, queries: List[str], max_results_per_query: int = 3) -> List[WebSearchResult]:
+        """
+        Async variant of multi_search
         """
+        if not queries:
+            return []
+        executor = self._fan_out_executor(len(queries))
+        tasks = self._start_search_tasks(queries, max_results_per_query, executor)
+        try:
+            with STAGE_LATENCY.time("web_search"):
+                done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if pending:
+            SEARCH_FAILURES.inc(amount=len(pending))
+            logger.warning(f"Web search deadline exceeded; dropping {len(pending)} of {len(tasks)} queries")
+            for task in pending:
+                task.cancel()
+
         all_results = []
-        for query in queries:
-            results = self.search(query, max_results_per_query)
-            all_results.extend(results)
+        for task in tasks:
+            if task not in done or task.cancelled():
+                continue
+            if task.exception() is not None:
+                SEARCH_FAILURES.inc()
+                logger.warning(f"Web search query failed: {task.exception()!r}")
+                continue
+            all_results.extend(task.result())
+
+        return self._dedupe_results(all_results)
 
+    async def astream_multi_search(self, queries: List[str], max_results_per_query: int = 3) -> AsyncIterator[List[WebSearchResult]]:
+        """
+        Yield the combined, de-duplicated results each time another query completes
+        """
+        executor = self._fan_out_executor(len(queries))
+        tasks = self._start_search_tasks(queries, max_results_per_query, executor)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        pending = set(tasks)
+        all_results = []
+        try:
+            while pending:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.cancelled():
+                        continue
+                    if task.exception() is not None:
+                        logger.warning(f"Web search query failed: {task.exception()!r}")
+                        continue
+                    all_results.extend(task.result())
+                yield self._dedupe_results(all_results)
+        finally:
+            if pending:
+                SEARCH_FAILURES.inc(amount=len(pending))
+                logger.warning(f"Web search deadline exceeded; dropping {len(pending)} of {len(tasks)} queries")
+                for task in pending:
+                    task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _fan_out_executor(size: int) -> ThreadPoolExecutor:
+        """
+        One worker per query for a single fan-out; a query that times out keeps
+        only its own thread, which exits once DDGS gives up
+        """
+        return ThreadPoolExecutor(max_workers=max(1, size), thread_name_prefix="web-search-fan-out")
+
+    def _start_search_tasks(self, queries: List[str], max_results_per_query: int,
+                            executor: ThreadPoolExecutor) -> List["asyncio.Task"]:
+        return [
+            asyncio.ensure_future(asyncio.wait_for(self.asearch(query, max_results_per_query, executor), self.query_timeout))
+            for query in queries
+        ]
+
+    @staticmethod
+    def _dedupe_results(all_results: List[WebSearchResult]) -> List[WebSearchResult]:
+        """
+        Drop results with duplicate URLs and keep the top 5
+        """
         # Remove duplicates based on URL
         unique_results = []
         seen_urls = set()
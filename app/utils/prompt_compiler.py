@@ -0,0 +1,232 @@
+import json
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+from app.utils.prompt_templates import (
+    CLASSIFICATION_SYSTEM_PROMPT,
+    INTENT_CLASSIFICATION_PROMPT,
+    INTENT_CLASSIFICATION_WITH_SEARCH_PROMPT,
+    BATCH_INTENT_CLASSIFICATION_PROMPT,
+    COMPACT_CLASSIFICATION_SYSTEM_PROMPT,
+    COMPACT_CLASSIFICATION_WITH_SEARCH_SYSTEM_PROMPT,
+    COMPACT_BATCH_CLASSIFICATION_SYSTEM_PROMPT,
+    COMPACT_USER_INPUT_TEMPLATE,
+    COMPACT_BATCH_USER_INPUTS_TEMPLATE,
+    FEW_SHOT_EXAMPLES_TEMPLATE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Used when no tiktoken encoding can be loaded (e.g. offline without a cached encoding file)
+_CHARS_PER_TOKEN = 4
+# Tokens the chat format adds around each message
+_MESSAGE_OVERHEAD_TOKENS = 4
+# Inputs are never cut below this, even when the budget barely covers the static prompt
+_MIN_INPUT_TOKENS = 64
+
+CLASSIFICATION = "classification"
+CLASSIFICATION_WITH_SEARCH = "classification_with_search"
+BATCH_CLASSIFICATION = "batch_classification"
+
+_COMPACT_SYSTEM_PROMPTS = {
+    CLASSIFICATION: COMPACT_CLASSIFICATION_SYSTEM_PROMPT,
+    CLASSIFICATION_WITH_SEARCH: COMPACT_CLASSIFICATION_WITH_SEARCH_SYSTEM_PROMPT,
+    BATCH_CLASSIFICATION: COMPACT_BATCH_CLASSIFICATION_SYSTEM_PROMPT,
+}
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(name: str):
+    try:
+        # Imported here so startup does not pay for tiktoken until tokens are counted
+        import tiktoken
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"tiktoken encoding {name} unavailable, estimating token counts: {str(e)}")
+        return None
+
+
+def _numbered(user_inputs: List[str]) -> str:
+    return "\n".join(f"{i}. {json.dumps(user_input)}" for i, user_input in enumerate(user_inputs, start=1))
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken, falling back to a characters-per-token
+    estimate when the encoding cannot be loaded
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        self.encoding_name = encoding_name
+
+    @property
+    def exact(self) -> bool:
+        return _load_encoding(self.encoding_name) is not None
+
+    def count(self, text: str) -> int:
+        encoding = _load_encoding(self.encoding_name)
+        if encoding is None:
+            return -(-len(text) // _CHARS_PER_TOKEN)
+        return len(encoding.encode(text))
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        return sum(self.count(message["content"]) + _MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut text down to at most max_tokens tokens
+        """
+        max_tokens = max(0, max_tokens)
+        encoding = _load_encoding(self.encoding_name)
+        if encoding is None:
+            return text[:max_tokens * _CHARS_PER_TOKEN]
+        tokens = encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+
+
+class PromptCompiler:
+    """
+    Builds classification messages from the compact templates.
+
+    All instructions go into the system message, which is identical on every
+    call so providers can reuse the cached prompt prefix; the user message only
+    carries the input, trimmed so the whole prompt stays within max_input_tokens.
+    Few-shot examples only get the budget the input leaves over and are the
+    first thing dropped. Batch prompts apply the same per-input limit to each input.
+    """
+
+    def __init__(self, max_input_tokens: Optional[int] = None, token_counter: Optional[TokenCounter] = None):
+        self.max_input_tokens = max_input_tokens if max_input_tokens and max_input_tokens > 0 else None
+        self.token_counter = token_counter or TokenCounter()
+        self.compiled_prompts = 0
+        self.truncated_inputs = 0
+        self.dropped_examples = 0
+        self._system_messages = {
+            kind: {"role": "system", "content": prompt} for kind, prompt in _COMPACT_SYSTEM_PROMPTS.items()
+        }
+        self._input_allowance: Dict[str, Optional[int]] = {}
+        self._savings: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def prompt_version(self, with_search: bool = False) -> str:
+        """
+        Identifies the compiled prompt for response cache keys
+        """
+        kind = CLASSIFICATION_WITH_SEARCH if with_search else CLASSIFICATION
+        return f"{_COMPACT_SYSTEM_PROMPTS[kind]}\n{COMPACT_USER_INPUT_TEMPLATE}\nmax_input_tokens={self.max_input_tokens}"
+
+    def messages(self, user_input: str, with_search: bool = False, examples: Sequence[str] = ()) -> List[Dict[str, str]]:
+        """
+        examples are rendered few-shot examples, most relevant first
+        """
+        kind = CLASSIFICATION_WITH_SEARCH if with_search else CLASSIFICATION
+        content = COMPACT_USER_INPUT_TEMPLATE.format(user_input=self._fit(user_input, kind))
+        messages = [self._system_messages[kind], {"role": "user", "content": content}]
+        kept = list(examples)
+        while kept:
+            # The system message stays identical across calls so its prefix can still be cached
+            with_examples = [messages[0], {
+                "role": "user", "content": FEW_SHOT_EXAMPLES_TEMPLATE.format(examples="\n".join(kept)) + content
+            }]
+            if self.max_input_tokens is None or self.token_counter.count_messages(with_examples) <= self.max_input_tokens:
+                messages = with_examples
+                break
+            kept.pop()
+        self._record(compiled=1, dropped=len(examples) - len(kept))
+        return messages
+
+    def batch_messages(self, user_inputs: List[str]) -> List[Dict[str, str]]:
+        fitted = [self._fit(user_input, CLASSIFICATION) for user_input in user_inputs]
+        self._record(compiled=1)
+        return [
+            self._system_messages[BATCH_CLASSIFICATION],
+            {"role": "user", "content": COMPACT_BATCH_USER_INPUTS_TEMPLATE.format(user_inputs=_numbered(fitted))}
+        ]
+
+    def _fit(self, user_input: str, kind: str) -> str:
+        allowance = self._allowance(kind)
+        if allowance is None or self.token_counter.count(user_input) <= allowance:
+            return user_input
+        self._record(truncated=1)
+        logger.info(f"Truncating user input to {allowance} tokens to fit the prompt budget")
+        return self.token_counter.truncate(user_input, allowance)
+
+    def _allowance(self, kind: str) -> Optional[int]:
+        """
+        Tokens left for the user input once the static parts of the prompt are counted
+        """
+        if self.max_input_tokens is None:
+            return None
+        if kind not in self._input_allowance:
+            static = self.token_counter.count_messages([
+                self._system_messages[kind],
+                {"role": "user", "content": COMPACT_USER_INPUT_TEMPLATE.format(user_input="")}
+            ])
+            self._input_allowance[kind] = max(_MIN_INPUT_TOKENS, self.max_input_tokens - static)
+        return self._input_allowance[kind]
+
+    def _record(self, compiled: int = 0, truncated: int = 0, dropped: int = 0) -> None:
+        with self._lock:
+            self.compiled_prompts += compiled
+            self.truncated_inputs += truncated
+            self.dropped_examples += dropped
+
+    def savings_report(self, user_input: str = "") -> Dict[str, Dict[str, Any]]:
+        """
+        Compare prompt tokens of the original templates against the compact ones
+        """
+        legacy = {
+            CLASSIFICATION: [
+                {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+                {"role": "user", "content": INTENT_CLASSIFICATION_PROMPT.format(user_input=user_input)}
+            ],
+            CLASSIFICATION_WITH_SEARCH: [
+                {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+                {"role": "user", "content": INTENT_CLASSIFICATION_WITH_SEARCH_PROMPT.format(user_input=user_input)}
+            ],
+            BATCH_CLASSIFICATION: [
+                {"role": "system", "content": CLASSIFICATION_SYSTEM_PROMPT},
+                {"role": "user", "content": BATCH_INTENT_CLASSIFICATION_PROMPT.format(user_inputs=_numbered([user_input]))}
+            ],
+        }
+        compact = {
+            CLASSIFICATION: [
+                self._system_messages[CLASSIFICATION],
+                {"role": "user", "content": COMPACT_USER_INPUT_TEMPLATE.format(user_input=user_input)}
+            ],
+            CLASSIFICATION_WITH_SEARCH: [
+                self._system_messages[CLASSIFICATION_WITH_SEARCH],
+                {"role": "user", "content": COMPACT_USER_INPUT_TEMPLATE.format(user_input=user_input)}
+            ],
+            BATCH_CLASSIFICATION: [
+                self._system_messages[BATCH_CLASSIFICATION],
+                {"role": "user", "content": COMPACT_BATCH_USER_INPUTS_TEMPLATE.format(user_inputs=_numbered([user_input]))}
+            ],
+        }
+        report = {}
+        for kind, legacy_messages in legacy.items():
+            legacy_tokens = self.token_counter.count_messages(legacy_messages)
+            compact_tokens = self.token_counter.count_messages(compact[kind])
+            report[kind] = {
+                "legacy_tokens": legacy_tokens,
+                "compact_tokens": compact_tokens,
+                "saved_tokens": legacy_tokens - compact_tokens,
+                "saved_fraction": round((legacy_tokens - compact_tokens) / legacy_tokens, 3) if legacy_tokens else 0.0,
+            }
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        # The static savings never change, so they are only counted once
+        if self._savings is None:
+            self._savings = self.savings_report()
+        return {
+            "exact_token_counts": self.token_counter.exact,
+            "max_input_tokens": self.max_input_tokens,
+            "compiled_prompts": self.compiled_prompts,
+            "truncated_inputs": self.truncated_inputs,
+            "dropped_examples": self.dropped_examples,
+            "static_prompt_savings": self._savings,
+        }
@@ -1,8 +1,4 @@
-INTENT_CLASSIFICATION_PROMPT = """
-You are an intelligent personal assistant that analyzes user requests and extracts structured information.
-
-Given the user input, analyze and respond with a JSON object containing:
-1. intent_category: One of ["dining", "travel", "gifting", "cab_booking", "other"]
+_RESPONSE_FIELDS_AND_GUIDELINES = """1. intent_category: One of ["dining", "travel", "gifting", "cab_booking", "other"]
 2. entities: Extract relevant information like date, time, location, etc.
 3. confidence_score: Float between 0.0 and 1.0
 4. follow_up_questions: Array of questions for missing/ambiguous information
@@ -30,15 +26,104 @@ Follow-up Questions Guidelines:
 - For GIFTING: Ask about recipient, occasion, budget if missing
 - For CAB_BOOKING: Ask about destination, pickup time, vehicle preference if missing
 
+"""
+
+CLASSIFICATION_SYSTEM_PROMPT = "You are a helpful assistant that extracts structured information from user requests. Always respond with valid JSON."
+
+INTENT_CLASSIFICATION_PROMPT = """
+You are an intelligent personal assistant that analyzes user requests and extracts structured information.
+
+Given the user input, analyze and respond with a JSON object containing:
+""" + _RESPONSE_FIELDS_AND_GUIDELINES + """User Input: "{user_input}"
+
+Respond with valid JSON only:
+"""
+
+INTENT_CLASSIFICATION_WITH_SEARCH_PROMPT = """
+You are an intelligent personal assistant that analyzes user requests and extracts structured information.
+
+Given the user input, analyze and respond with a JSON object containing:
+""" + _RESPONSE_FIELDS_AND_GUIDELINES + """Search Queries:
+- Also include a "search_queries" array. If intent_category is "other", fill it with 2-3 relevant web search queries that would help find useful information for the user; otherwise leave it empty.
+
 User Input: "{user_input}"
 
 Respond with valid JSON only:
 """
 
+FOLLOW_UP_MERGE_PROMPT = """
+Continue an in-progress request using the current state and the user's new message.
+
+Current state:
+intent_category: {intent_category}
+entities: {entities}
+questions asked: {follow_up_questions}
+
+New user message: "{user_input}"
+
+Respond with a JSON object containing:
+1. intent_category: Keep "{intent_category}" unless the message starts an unrelated request (one of ["dining", "travel", "gifting", "cab_booking", "other"])
+2. entities: Only the fields stated or changed in the new message (date as YYYY-MM-DD, time as HH:MM)
+3. confidence_score: Float between 0.0 and 1.0
+4. follow_up_questions: Questions for information that is still missing
+5. reasoning: Brief explanation
+
+Respond with valid JSON only:
+"""
+
 WEB_SEARCH_PROMPT = """
 Based on the user query: "{user_input}"
 
 This appears to be a request that requires web search. Generate 2-3 relevant search queries that would help find useful information for the user.
 
 Return only the search queries, one per line, without any additional text or formatting.
-"""
\ No newline at end of file
+"""
+
+BATCH_INTENT_CLASSIFICATION_PROMPT = """
+You are an intelligent personal assistant that analyzes user requests and extracts structured information.
+
+You will be given a numbered list of independent user inputs. For EACH input, analyze it on its own and produce a JSON object containing:
+""" + _RESPONSE_FIELDS_AND_GUIDELINES + """Return a JSON array with exactly one object per input, in the same order as the inputs.
+Each object must also contain an "index" field with the number of the input it answers.
+
+User Inputs:
+{user_inputs}
+
+Respond with a valid JSON array only:
+"""
+
+# Compact templates used by app.utils.prompt_compiler. All instructions live in the
+# system message so every call starts with the same static prefix; the user message
+# carries only the input.
+_COMPACT_INTENT_RULES = """Intents and their entities (omit unknown fields; date as YYYY-MM-DD, time as HH:MM):
+- dining (restaurants, food delivery, meals): date, time, location, cuisine, party_size, budget, dietary_restrictions[]
+- travel (hotels, flights, trips, sightseeing): date, location, destination, party_size, budget, accommodation_type, duration
+- gifting (gift ideas, buying presents): recipient, gift_type, budget, date
+- cab_booking (taxi, rideshare, transport): date, time, pickup_location, destination, vehicle_type, party_size
+- other: anything else
+Put any other requirements in additional_requirements[]. follow_up_questions ask only for missing key details."""
+
+COMPACT_CLASSIFICATION_SYSTEM_PROMPT = """You classify personal-assistant requests and extract details. Reply with one JSON object only:
+{"intent_category": "dining|travel|gifting|cab_booking|other", "entities": {}, "confidence_score": 0.0-1.0, "follow_up_questions": [], "reasoning": "brief"}
+""" + _COMPACT_INTENT_RULES
+
+COMPACT_CLASSIFICATION_WITH_SEARCH_SYSTEM_PROMPT = COMPACT_CLASSIFICATION_SYSTEM_PROMPT + """
+Also include "search_queries": 2-3 web search queries if intent_category is "other", otherwise []."""
+
+COMPACT_BATCH_CLASSIFICATION_SYSTEM_PROMPT = """You classify personal-assistant requests and extract details. The user sends a numbered list of independent requests. Reply with a JSON array only, one object per request in the same order:
+{"index": 1, "intent_category": "dining|travel|gifting|cab_booking|other", "entities": {}, "confidence_score": 0.0-1.0, "follow_up_questions": [], "reasoning": "brief"}
+""" + _COMPACT_INTENT_RULES
+
+COMPACT_USER_INPUT_TEMPLATE = 'User Input: "{user_input}"'
+
+COMPACT_BATCH_USER_INPUTS_TEMPLATE = """User Inputs:
+{user_inputs}"""
+
+# Retrieved few-shot examples, placed ahead of the input in the user message
+FEW_SHOT_EXAMPLES_TEMPLATE = """Similar requests and their JSON:
+{examples}
+
+"""
+
+FEW_SHOT_EXAMPLE_TEMPLATE = """Input: {user_input}
+Output: {output}"""
@@ -0,0 +1,91 @@
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from app.models import LLMClassification
+
+T = TypeVar("T")
+
+RESPONSE_FORMATS = ("off", "json_object", "json_schema")
+
+
+def classification_response_format(mode: str) -> Optional[Dict[str, Any]]:
+    """
+    The chat-completions response_format for a structured output mode.
+
+    json_object needs a model with JSON mode; json_schema additionally needs
+    structured-output support (API version 2024-08-01-preview or later).
+    """
+    if mode == "json_object":
+        return {"type": "json_object"}
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "assistant_response",
+                "schema": LLMClassification.model_json_schema(),
+                "strict": False,
+            },
+        }
+    if mode == "off":
+        return None
+    raise ValueError(f"Unknown response format: {mode}")
+
+
+class JSONStreamExtractor:
+    """
+    Incrementally finds complete top-level JSON values in text that may also
+    contain prose or markdown code fences. Brackets inside strings are ignored.
+    """
+
+    def __init__(self, opening: str = "{"):
+        self.opening = opening
+        self._buffer: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Consume the next chunk and return the JSON values it completed
+        """
+        completed = []
+        for char in chunk:
+            if self._depth == 0:
+                if char == self.opening:
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append("".join(self._buffer))
+                    self._buffer = []
+        return completed
+
+
+def extract_json(text: str, validate: Callable[[str], T], opening: str = "{") -> T:
+    """
+    Return the first JSON value in noisy text that passes validation.
+    Each opening bracket is tried in turn, so stray brackets in the prose
+    before the real payload do not hide it.
+    """
+    start = text.find(opening)
+    while start != -1:
+        completed = JSONStreamExtractor(opening).feed(text[start:])
+        if completed:
+            try:
+                return validate(completed[0])
+            except ValueError:
+                pass
+        start = text.find(opening, start + 1)
+    raise ValueError("No valid JSON found in LLM response")
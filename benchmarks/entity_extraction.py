@@ -0,0 +1,100 @@
+"""
+Compare the local entity extractor against the LLM path on latency and accuracy.
+
+    python -m benchmarks.entity_extraction
+
+The local extractor always runs. The LLM path runs only when the Azure OpenAI
+environment variables are set.
+"""
+import os
+import statistics
+import time
+from datetime import date, timedelta
+from dotenv import load_dotenv
+from app.services.entity_extractor import LocalEntityExtractor
+
+FIELDS = ("date", "time", "party_size", "vehicle_type")
+
+
+def labelled_cases(today: date):
+    """
+    Inputs with the expected value of every field the local extractor covers
+    """
+    tomorrow = (today + timedelta(days=1)).isoformat()
+    return [
+        ("Need a sunset-view table for two tonight; gluten-free menu a must",
+         {"date": today.isoformat(), "time": None, "party_size": 2, "vehicle_type": None}),
+        ("Book a cab to the airport tomorrow morning, need a large vehicle",
+         {"date": tomorrow, "time": None, "party_size": None, "vehicle_type": "large vehicle"}),
+        ("Table for 4 at 8pm tomorrow",
+         {"date": tomorrow, "time": "20:00", "party_size": 4, "vehicle_type": None}),
+        ("Get me an SUV to the station at 6:30 am today",
+         {"date": today.isoformat(), "time": "06:30", "party_size": None, "vehicle_type": "SUV"}),
+        ("Dinner reservation for six people on 2030-05-01 at 19:30",
+         {"date": "2030-05-01", "time": "19:30", "party_size": 6, "vehicle_type": None}),
+        ("Sedan for 3 of us day after tomorrow at noon",
+         {"date": (today + timedelta(days=2)).isoformat(), "time": "12:00", "party_size": 3, "vehicle_type": "sedan"}),
+        ("Need a birthday gift for my 25-year-old sister who loves art",
+         {"date": None, "time": None, "party_size": None, "vehicle_type": None}),
+    ]
+
+
+def score(predictions, cases):
+    correct = total = 0
+    for predicted, (_, expected) in zip(predictions, cases):
+        for field in FIELDS:
+            total += 1
+            correct += predicted.get(field) == expected[field]
+    return correct / total
+
+
+def run_local(cases, repeat: int = 200):
+    extractor = LocalEntityExtractor()
+    timings = []
+    predictions = []
+    for user_input, _ in cases:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            entities = extractor.extract(user_input)
+        timings.append((time.perf_counter() - start) / repeat)
+        predictions.append(entities.model_dump())
+    return predictions, timings
+
+
+def run_llm(cases):
+    from app.services.intent_processor import IntentProcessor
+
+    processor = IntentProcessor(
+        azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+        azure_api_key=os.environ["AZURE_OPENAI_API_KEY"],
+        azure_deployment=os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"],
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2023-12-01-preview")
+    )
+    timings = []
+    predictions = []
+    for user_input, _ in cases:
+        start = time.perf_counter()
+        response = processor._parse_llm_response(processor._classify_intent(user_input))
+        timings.append(time.perf_counter() - start)
+        predictions.append(response.entities.model_dump())
+    return predictions, timings
+
+
+def report(name, predictions, timings, cases):
+    print(f"{name:>6}: accuracy {score(predictions, cases):6.1%}  "
+          f"median {statistics.median(timings) * 1000:9.3f} ms  "
+          f"max {max(timings) * 1000:9.3f} ms")
+
+
+def main():
+    load_dotenv()
+    cases = labelled_cases(date.today())
+    report("local", *run_local(cases), cases)
+    if all(os.getenv(name) for name in ("AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_API_KEY", "AZURE_OPENAI_DEPLOYMENT_NAME")):
+        report("llm", *run_llm(cases), cases)
+    else:
+        print("   llm: skipped (Azure OpenAI credentials not set)")
+
+
+if __name__ == "__main__":
+    main()
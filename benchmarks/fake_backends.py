@@ -0,0 +1,139 @@
+"""
+Local stand-ins for Azure OpenAI chat completions and the DuckDuckGo search backend.
+
+    FAKE_LATENCY_MS=400 FAKE_JITTER_MS=100 FAKE_ERROR_RATE=0.01 \
+        uvicorn benchmarks.fake_backends:app --port 9000
+
+Latency, jitter and error rate can be set per process via environment
+variables or changed at runtime with POST /config.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import time
+import uuid
+from typing import Any, Dict, List
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake Azure OpenAI and search backend")
+
+config: Dict[str, float] = {
+    "latency_ms": float(os.getenv("FAKE_LATENCY_MS", "300")),
+    "jitter_ms": float(os.getenv("FAKE_JITTER_MS", "50")),
+    "error_rate": float(os.getenv("FAKE_ERROR_RATE", "0")),
+    "search_latency_ms": float(os.getenv("FAKE_SEARCH_LATENCY_MS", "200")),
+}
+
+_INTENT_KEYWORDS = [
+    ("cab_booking", ("cab", "taxi", "ride", "pickup", "airport")),
+    ("dining", ("table", "restaurant", "dinner", "lunch", "menu")),
+    ("travel", ("trip", "hotel", "flight", "vacation", "weekend")),
+    ("gifting", ("gift", "present", "birthday")),
+]
+
+
+def classify(user_input: str, with_search_queries: bool = False) -> Dict[str, Any]:
+    text = user_input.lower()
+    intent = next((name for name, words in _INTENT_KEYWORDS if any(word in text for word in words)), "other")
+    result: Dict[str, Any] = {
+        "intent_category": intent,
+        "entities": {},
+        "confidence_score": 0.9 if intent != "other" else 0.8,
+        "follow_up_questions": [] if intent == "other" else ["Could you share a few more details?"],
+        "reasoning": "Fake backend keyword classification",
+    }
+    if with_search_queries:
+        result["search_queries"] = [user_input, f"{user_input} guide"] if intent == "other" else []
+    return result
+
+
+def respond(prompt: str) -> str:
+    """
+    Produce a plausible completion for each prompt the processor sends
+    """
+    if "User Inputs:" in prompt:
+        inputs = re.findall(r'^\d+\. (".*")$', prompt, re.MULTILINE)
+        return json.dumps([
+            dict(classify(json.loads(user_input)), index=i)
+            for i, user_input in enumerate(inputs, start=1)
+        ])
+    match = re.search(r'User Input: "(.*)"', prompt)
+    if match:
+        return json.dumps(classify(match.group(1), with_search_queries="search_queries" in prompt))
+    match = re.search(r'Based on the user query: "(.*)"', prompt)
+    if match:
+        return f"{match.group(1)}\n{match.group(1)} official guide"
+    return json.dumps(classify(prompt))
+
+
+async def simulate_latency(base_ms: float) -> None:
+    delay = max(0.0, random.gauss(base_ms, config["jitter_ms"])) / 1000
+    await asyncio.sleep(delay)
+
+
+@app.post("/config")
+async def update_config(updates: Dict[str, float]):
+    config.update({key: float(value) for key, value in updates.items() if key in config})
+    return config
+
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(deployment: str, request: Request):
+    body = await request.json()
+    await simulate_latency(config["latency_ms"])
+    if random.random() < config["error_rate"]:
+        return JSONResponse(status_code=500, content={"error": {"message": "Injected failure", "code": "fake_error"}})
+
+    messages: List[Dict[str, str]] = body.get("messages", [])
+    # Compact prompts keep their instructions in the system message, so look at every message
+    prompt = "\n".join(message.get("content", "") for message in messages)
+    content = respond(prompt)
+    prompt_tokens = sum(len(message.get("content", "")) for message in messages) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": deployment,
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": content},
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        },
+    }
+
+
+@app.get("/search")
+async def search(q: str, max_results: int = 5):
+    await simulate_latency(config["search_latency_ms"])
+    if random.random() < config["error_rate"]:
+        return JSONResponse(status_code=500, content={"error": "Injected failure"})
+    slug = re.sub(r"[^a-z0-9]+", "-", q.lower()).strip("-")
+    return [
+        {"title": f"{q} - result {i}", "href": f"https://example.com/{slug}/{i}", "body": f"Snippet {i} for {q}"}
+        for i in range(max_results)
+    ]
+
+
+class FakeDDGS:
+    """
+    Drop-in replacement for duckduckgo_search.DDGS that queries the fake /search backend
+    """
+
+    base_url = os.getenv("FAKE_SEARCH_URL", "http://127.0.0.1:9000")
+
+    def __init__(self, timeout: int = 10, **kwargs):
+        self._client = httpx.Client(base_url=self.base_url, timeout=timeout)
+
+    def text(self, keywords: str, max_results: int = 5, **kwargs) -> List[Dict[str, str]]:
+        response = self._client.get("/search", params={"q": keywords, "max_results": max_results or 5})
+        response.raise_for_status()
+        return response.json()
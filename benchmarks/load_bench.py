@@ -0,0 +1,212 @@
+"""
+Offline load test for the API against local stand-ins for Azure OpenAI and search.
+
+    python -m benchmarks.load_bench --endpoint process --concurrency 50 --requests 1000
+
+Starts benchmarks.fake_backends and benchmarks.serve_app as subprocesses,
+drives the chosen endpoint at a fixed concurrency and reports throughput,
+latency percentiles and server CPU time per request. Use --max-p95-ms and
+--min-rps to fail (exit code 1) on performance regressions.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+import httpx
+
+SAMPLE_INPUTS = [
+    "Need a sunset-view table for two tonight; gluten-free menu a must",
+    "Planning a weekend trip to Paris for 3 people next month",
+    "Need a birthday gift for my 25-year-old sister who loves art",
+    "Book a cab to the airport tomorrow morning, need a large vehicle",
+    "How to update address in Aadhar card online",
+    "Italian restaurant for an anniversary dinner",
+    "What documents do I need to renew my passport",
+    "Hotel near the beach in Goa for 4 nights",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    """
+    User+system CPU time of a process, read from /proc (Linux only)
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def wait_until_healthy(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become healthy")
+
+
+def start_servers(args) -> Dict[str, object]:
+    fake_port, app_port = free_port(), free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    env = dict(os.environ)
+    env.update({
+        "FAKE_LATENCY_MS": str(args.latency_ms),
+        "FAKE_JITTER_MS": str(args.jitter_ms),
+        "FAKE_ERROR_RATE": str(args.error_rate),
+        "FAKE_SEARCH_LATENCY_MS": str(args.search_latency_ms),
+        "FAKE_SEARCH_URL": fake_url,
+        "AZURE_OPENAI_ENDPOINT": fake_url,
+        "AZURE_OPENAI_API_KEY": "fake-key",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "fake-deployment",
+    })
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.fake_backends:app", "--port", str(fake_port), "--log-level", "warning"],
+        env=env
+    )
+    server = subprocess.Popen([sys.executable, "-m", "benchmarks.serve_app", "--port", str(app_port)], env=env)
+    wait_until_healthy(f"{fake_url}/docs")
+    wait_until_healthy(f"http://127.0.0.1:{app_port}/health")
+    return {"fake": fake, "server": server, "app_url": f"http://127.0.0.1:{app_port}"}
+
+
+def make_inputs(count: int, repeat_inputs: bool) -> List[str]:
+    # Unique suffixes keep the response cache from turning the run into a cache benchmark
+    if repeat_inputs:
+        return [SAMPLE_INPUTS[i % len(SAMPLE_INPUTS)] for i in range(count)]
+    return [f"{SAMPLE_INPUTS[i % len(SAMPLE_INPUTS)]} (ref {i})" for i in range(count)]
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, user_input: str, batch_size: int) -> None:
+    if endpoint == "process":
+        response = await client.post("/process", json={"user_input": user_input})
+    elif endpoint == "batch":
+        response = await client.post(
+            "/process/batch", json={"user_inputs": [f"{user_input} #{i}" for i in range(batch_size)], "web_search": False}
+        )
+    elif endpoint == "stream":
+        async with client.stream("POST", "/process/stream", json={"user_input": user_input}) as response:
+            async for _ in response.aiter_lines():
+                pass
+    else:
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+    response.raise_for_status()
+
+
+async def drive(app_url: str, args) -> Dict[str, object]:
+    inputs = make_inputs(args.requests, args.repeat_inputs)
+    queue: asyncio.Queue = asyncio.Queue()
+    for user_input in inputs:
+        queue.put_nowait(user_input)
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while not queue.empty():
+            user_input = queue.get_nowait()
+            start = time.perf_counter()
+            try:
+                await send(client, args.endpoint, user_input, args.batch_size)
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=app_url, limits=limits, timeout=args.timeout) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"latencies": latencies, "errors": errors, "elapsed": elapsed}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(run: Dict[str, object], cpu_used: Optional[float], args) -> Dict[str, object]:
+    latencies = run["latencies"]
+    completed = len(latencies)
+    return {
+        "endpoint": args.endpoint,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "completed": completed,
+        "errors": run["errors"],
+        "req_per_s": completed / run["elapsed"] if run["elapsed"] else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else float("nan"),
+        "cpu_ms_per_request": cpu_used / completed * 1000 if cpu_used is not None and completed else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=["process", "batch", "stream"], default="process")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=10, help="Inputs per /process/batch request")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Mean fake LLM latency")
+    parser.add_argument("--jitter-ms", type=float, default=50, help="Standard deviation of fake latency")
+    parser.add_argument("--search-latency-ms", type=float, default=200, help="Mean fake search latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of fake backend calls that fail")
+    parser.add_argument("--repeat-inputs", action="store_true", help="Reuse identical inputs so caches can hit")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if p95 latency exceeds this")
+    parser.add_argument("--min-rps", type=float, help="Fail if throughput falls below this")
+    args = parser.parse_args(argv)
+
+    servers = start_servers(args)
+    try:
+        server_pid = servers["server"].pid
+        cpu_before = cpu_seconds(server_pid)
+        run = asyncio.run(drive(servers["app_url"], args))
+        cpu_after = cpu_seconds(server_pid)
+        cpu_used = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+    finally:
+        for process in (servers["server"], servers["fake"]):
+            process.terminate()
+            process.wait(timeout=10)
+
+    report = summarize(run, cpu_used, args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>20}: {value:.2f}" if isinstance(value, float) else f"{key:>20}: {value}")
+
+    failed = False
+    if args.max_p95_ms is not None and report["p95_ms"] > args.max_p95_ms:
+        print(f"FAIL: p95 {report['p95_ms']:.1f} ms exceeds {args.max_p95_ms} ms", file=sys.stderr)
+        failed = True
+    if args.min_rps is not None and report["req_per_s"] < args.min_rps:
+        print(f"FAIL: {report['req_per_s']:.1f} req/s below {args.min_rps}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""
+Report prompt tokens of the original classification templates against the compact ones.
+
+    python -m benchmarks.prompt_tokens
+
+Token counts come from tiktoken (cl100k_base); when the encoding cannot be
+loaded they are estimated from character counts and marked as such.
+"""
+from app.utils.prompt_compiler import PromptCompiler
+from benchmarks.load_bench import SAMPLE_INPUTS
+
+
+def print_row(name, row):
+    print(f"{name:<44}{row['legacy_tokens']:>8}{row['compact_tokens']:>9}{row['saved_tokens']:>8}{row['saved_fraction'] * 100:>8.1f}%")
+
+
+def main():
+    compiler = PromptCompiler()
+    mode = "tiktoken" if compiler.token_counter.exact else "estimated"
+    print(f"Prompt tokens per call ({mode})")
+    print(f"{'prompt':<44}{'legacy':>8}{'compact':>9}{'saved':>8}{'saved %':>9}")
+    for kind, row in compiler.savings_report().items():
+        print_row(f"static prefix ({kind})", row)
+    for user_input in SAMPLE_INPUTS:
+        print_row(user_input[:42], compiler.savings_report(user_input)["classification"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Run app.main with DuckDuckGo replaced by the fake search backend.
+
+    FAKE_SEARCH_URL=http://127.0.0.1:9000 AZURE_OPENAI_ENDPOINT=http://127.0.0.1:9000 \
+        python -m benchmarks.serve_app --port 8000
+
+All other configuration is read by app.main from the environment as usual.
+"""
+import argparse
+import uvicorn
+from app.services import web_search
+from benchmarks.fake_backends import FakeDDGS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    web_search.DDGS = FakeDDGS
+    uvicorn.run("app.main:app", host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
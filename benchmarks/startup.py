@@ -0,0 +1,88 @@
+"""
+Measure how long importing the app takes, using python -X importtime.
+
+    python -m benchmarks.startup --runs 5 --top 15
+
+Each run imports app.main in a fresh interpreter. The report gives the
+median import time of app.main, the top-level packages that cost the most,
+and which of the deferred heavy modules (the openai SDK, duckduckgo_search,
+tiktoken, tenacity, httpx) were imported anyway. Those are loaded later, when
+a worker warms up or serves its first request. Pass --max-import-ms to exit
+non-zero on a regression.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED_MODULES = ("openai", "duckduckgo_search", "tiktoken", "tenacity", "httpx")
+
+# import time:  self [us] | cumulative | imported package
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_profile(module: str) -> Dict[str, int]:
+    """
+    Self time in microseconds of every module imported by `import module`
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            profile[match.group(4)] = int(match.group(1))
+    return profile
+
+
+def by_package(profile: Dict[str, int]) -> Dict[str, int]:
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us in profile.items():
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Packages to list")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import time exceeds this")
+    args = parser.parse_args(argv)
+
+    # The first run also writes bytecode caches, so it is not counted
+    import_profile(args.module)
+    profiles = [import_profile(args.module) for _ in range(max(1, args.runs))]
+    totals_ms = [sum(profile.values()) / 1000 for profile in profiles]
+    median_ms = statistics.median(totals_ms)
+
+    print(f"import {args.module}: median {median_ms:.1f} ms over {len(profiles)} runs "
+          f"(min {min(totals_ms):.1f}, max {max(totals_ms):.1f})")
+    packages: Dict[str, List[int]] = defaultdict(list)
+    for profile in profiles:
+        for package, self_us in by_package(profile).items():
+            packages[package].append(self_us)
+    ranked = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    print(f"{'package':<32}{'ms':>10}")
+    for package, samples in ranked[:args.top]:
+        print(f"{package:<32}{statistics.median(samples) / 1000:>10.1f}")
+
+    imported = [module for module in DEFERRED_MODULES if module in profiles[-1]]
+    print(f"deferred modules imported: {', '.join(imported) if imported else 'none'}")
+
+    if args.max_import_ms is not None and median_ms > args.max_import_ms:
+        print(f"FAIL: import takes {median_ms:.1f} ms, above {args.max_import_ms} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,7 @@ st.markdown("Enter any fuzzy request and get structured information with follow-
 # Sidebar for API configuration
 st.sidebar.title("Configuration")
 api_url = st.sidebar.text_input("API URL", value="http://localhost:8000")
+stream_results = st.sidebar.checkbox("Stream results as they arrive", value=True)
 
 # Main interface
 col1, col2 = st.columns([1, 1])
@@ -42,74 +43,127 @@ with col1:
     
     process_button = st.button("Process Request", type="primary")
 
+# Display intent category with emoji
+intent_emoji = {
+    "dining": "🍽️",
+    "travel": "✈️",
+    "gifting": "🎁",
+    "cab_booking": "🚗",
+    "other": "❓"
+}
+
+def render_classification(result):
+    """Render everything known once the intent has been classified"""
+    st.success(f"**Intent Category:** {intent_emoji.get(result['intent_category'], '❓')} {result['intent_category'].title()}")
+    
+    # Display confidence score
+    confidence = result['confidence_score']
+    st.metric("Confidence Score", f"{confidence:.2f}", delta=f"{confidence-0.5:.2f}")
+    
+    # Display entities
+    if result['entities']:
+        st.subheader("🔍 Extracted Information")
+        entities = result['entities']
+        
+        for key, value in entities.items():
+            if value is not None and value != [] and value != "":
+                if isinstance(value, list):
+                    st.write(f"**{key.replace('_', ' ').title()}:** {', '.join(map(str, value))}")
+                else:
+                    st.write(f"**{key.replace('_', ' ').title()}:** {value}")
+    
+    # Display follow-up questions
+    if result['follow_up_questions']:
+        st.subheader("❓ Follow-up Questions")
+        for i, question in enumerate(result['follow_up_questions'], 1):
+            st.write(f"{i}. {question}")
+    
+    # Display reasoning
+    if result.get('reasoning'):
+        st.subheader("💭 AI Reasoning")
+        st.write(result['reasoning'])
+
+def render_search_results(search_results):
+    """Render web search results"""
+    if search_results:
+        st.subheader("🌐 Web Search Results")
+        for i, search_result in enumerate(search_results, 1):
+            with st.expander(f"{i}. {search_result['title']}"):
+                st.write(search_result['snippet'])
+                st.write(f"**URL:** {search_result['url']}")
+
+def iter_sse_events(response):
+    """Parse a text/event-stream response into (event, data) pairs"""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
 with col2:
     st.header("Structured Response")
     
     if process_button and user_input:
         try:
-            # Make API request
-            with st.spinner("Processing your request..."):
-                response = requests.post(
-                    f"{api_url}/process",
-                    json={"user_input": user_input},
-                    timeout=30
-                )
+            if stream_results:
+                # Render the classification as soon as it arrives, then search results incrementally
+                classification_area = st.container()
+                search_area = st.empty()
+                raw_area = st.empty()
+                with st.spinner("Processing your request..."):
+                    response = requests.post(
+                        f"{api_url}/process/stream",
+                        json={"user_input": user_input},
+                        stream=True,
+                        timeout=30
+                    )
+                if response.status_code == 200:
+                    for event, payload in iter_sse_events(response):
+                        if event == "classification":
+                            with classification_area:
+                                render_classification(payload)
+                        elif event == "search_results":
+                            with search_area.container():
+                                render_search_results(payload)
+                        elif event == "done":
+                            with search_area.container():
+                                render_search_results(payload.get('web_search_results'))
+                            with raw_area.container():
+                                with st.expander("📄 Raw JSON Response"):
+                                    st.json(payload)
+                        elif event == "error":
+                            st.error(f"Error: {payload.get('detail')}")
+                else:
+                    st.error(f"API Error: {response.status_code} - {response.text}")
             
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Display intent category with emoji
-                intent_emoji = {
-                    "dining": "🍽️",
-                    "travel": "✈️",
-                    "gifting": "🎁",
-                    "cab_booking": "🚗",
-                    "other": "❓"
-                }
-                
-                st.success(f"**Intent Category:** {intent_emoji.get(result['intent_category'], '❓')} {result['intent_category'].title()}")
-                
-                # Display confidence score
-                confidence = result['confidence_score']
-                st.metric("Confidence Score", f"{confidence:.2f}", delta=f"{confidence-0.5:.2f}")
+            else:
+                # Make API request
+                with st.spinner("Processing your request..."):
+                    response = requests.post(
+                        f"{api_url}/process",
+                        json={"user_input": user_input},
+                        timeout=30
+                    )
                 
-                # Display entities
-                if result['entities']:
-                    st.subheader("🔍 Extracted Information")
-                    entities = result['entities']
+                if response.status_code == 200:
+                    result = response.json()
                     
-                    for key, value in entities.items():
-                        if value is not None and value != [] and value != "":
-                            if isinstance(value, list):
-                                st.write(f"**{key.replace('_', ' ').title()}:** {', '.join(map(str, value))}")
-                            else:
-                                st.write(f"**{key.replace('_', ' ').title()}:** {value}")
-                
-                # Display follow-up questions
-                if result['follow_up_questions']:
-                    st.subheader("❓ Follow-up Questions")
-                    for i, question in enumerate(result['follow_up_questions'], 1):
-                        st.write(f"{i}. {question}")
-                
-                # Display web search results if available
-                if result.get('web_search_results'):
-                    st.subheader("🌐 Web Search Results")
-                    for i, search_result in enumerate(result['web_search_results'], 1):
-                        with st.expander(f"{i}. {search_result['title']}"):
-                            st.write(search_result['snippet'])
-                            st.write(f"**URL:** {search_result['url']}")
-                
-                # Display reasoning
-                if result.get('reasoning'):
-                    st.subheader("💭 AI Reasoning")
-                    st.write(result['reasoning'])
+                    render_classification(result)
+                    
+                    # Display web search results if available
+                    render_search_results(result.get('web_search_results'))
+                    
+                    # Raw JSON response
+                    with st.expander("📄 Raw JSON Response"):
+                        st.json(result)
                 
-                # Raw JSON response
-                with st.expander("📄 Raw JSON Response"):
-                    st.json(result)
-            
-            else:
-                st.error(f"API Error: {response.status_code} - {response.text}")
+                else:
+                    st.error(f"API Error: {response.status_code} - {response.text}")
         
         except requests.exceptions.RequestException as e:
             st.error(f"Connection Error: {str(e)}")
@@ -0,0 +1,213 @@
+import pytest
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import AssistantResponse, EntityModel, IntentCategory
+from app.services.admission import BATCH, INTERACTIVE, AdmissionController, AdmissionRejected
+
+class FakeClock:
+    """Manually advanced clock for limit and deadline tests"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestAdmissionQueue:
+    """Test cases for slots, priorities and shedding"""
+    
+    def test_waiters_admitted_as_slots_free_up(self):
+        """Test requests beyond the limit queue and start when a slot is released"""
+        async def scenario():
+            controller = AdmissionController(initial_limit=1, max_limit=1)
+            first = await controller.acquire()
+            waiter = asyncio.ensure_future(controller.acquire())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            assert controller.stats()["queued"]["interactive"] == 1
+            first.release()
+            second = await waiter
+            assert controller.in_flight == 1
+            second.release()
+            second.release()
+            return controller
+        
+        controller = asyncio.run(scenario())
+        
+        assert controller.in_flight == 0
+        assert controller.admitted == 2
+    
+    def test_interactive_requests_served_before_batch(self):
+        """Test queued interactive requests win over batch requests that queued first"""
+        async def scenario():
+            controller = AdmissionController(initial_limit=1, max_limit=1)
+            held = await controller.acquire()
+            order = []
+            async def run(priority, name):
+                async with await controller.acquire(priority):
+                    order.append(name)
+            batch = asyncio.ensure_future(run(BATCH, "batch"))
+            await asyncio.sleep(0)
+            interactive = asyncio.ensure_future(run(INTERACTIVE, "interactive"))
+            await asyncio.sleep(0)
+            held.release()
+            await asyncio.gather(batch, interactive)
+            return order
+        
+        assert asyncio.run(scenario()) == ["interactive", "batch"]
+    
+    def test_batch_limited_to_its_share(self):
+        """Test batch requests only start while part of the limit stays free for interactive ones"""
+        async def scenario():
+            controller = AdmissionController(initial_limit=4, max_limit=4, batch_share=0.5)
+            permits = [await controller.acquire(BATCH) for _ in range(2)]
+            waiter = asyncio.ensure_future(controller.acquire(BATCH))
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            interactive = await controller.acquire(INTERACTIVE)
+            assert controller.in_flight == 3
+            permits[0].release()
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            interactive.release()
+            await asyncio.wait_for(waiter, 1.0)
+        
+        asyncio.run(scenario())
+    
+    def test_full_queue_rejects_with_retry_hint(self):
+        """Test a request is shed immediately when the queue is full"""
+        async def scenario():
+            controller = AdmissionController(initial_limit=1, max_limit=1, max_queue=1)
+            await controller.acquire()
+            asyncio.ensure_future(controller.acquire())
+            await asyncio.sleep(0)
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire()
+            return controller, rejected.value
+        
+        controller, error = asyncio.run(scenario())
+        
+        assert error.reason == "queue_full"
+        assert error.retry_after >= 1
+        assert controller.rejected == {"queue_full": 1}
+    
+    def test_request_shed_when_deadline_cannot_be_met(self):
+        """Test a request whose expected wait exceeds its deadline is rejected without queueing"""
+        async def scenario():
+            clock = FakeClock()
+            controller = AdmissionController(initial_limit=1, max_limit=1, clock=clock)
+            permit = await controller.acquire()
+            clock.now = 4.0
+            permit.release()
+            await controller.acquire()
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire(timeout=2.0)
+            return controller, rejected.value
+        
+        controller, error = asyncio.run(scenario())
+        
+        assert error.reason == "deadline"
+        assert error.retry_after == 4
+        assert controller.stats()["queued"]["interactive"] == 0
+    
+    def test_waiter_shed_when_deadline_passes(self):
+        """Test a queued request gives up its place once its deadline passes"""
+        async def scenario():
+            controller = AdmissionController(initial_limit=1, max_limit=1)
+            await controller.acquire()
+            with pytest.raises(AdmissionRejected) as rejected:
+                await controller.acquire(timeout=0.05)
+            return controller, rejected.value
+        
+        controller, error = asyncio.run(scenario())
+        
+        assert error.reason == "deadline"
+        assert controller.stats()["queued"]["interactive"] == 0
+
+class TestAdaptiveLimit:
+    """Test cases for the AIMD concurrency limit"""
+    
+    def test_throttling_cuts_limit_once_per_cooldown(self):
+        """Test 429s lower the limit multiplicatively, at most once per cooldown"""
+        clock = FakeClock()
+        controller = AdmissionController(initial_limit=20, backoff=0.5, cooldown=1.0, clock=clock)
+        
+        controller.record_throttled()
+        controller.record_throttled()
+        assert controller.limit == 10
+        clock.now = 2.0
+        controller.record_throttled()
+        
+        assert controller.limit == 5
+        assert controller.throttled == 3
+        assert controller.decreases == 2
+    
+    def test_limit_grows_while_slots_are_busy(self):
+        """Test completions under load raise the limit additively"""
+        async def scenario():
+            controller = AdmissionController(initial_limit=2, max_limit=10)
+            permits = [await controller.acquire() for _ in range(2)]
+            for permit in permits:
+                permit.release()
+            return controller
+        
+        controller = asyncio.run(scenario())
+        
+        assert 2 < controller.limit < 4
+    
+    def test_slow_interactive_response_cuts_limit(self):
+        """Test an interactive request slower than the latency target lowers the limit"""
+        async def scenario():
+            clock = FakeClock()
+            controller = AdmissionController(initial_limit=10, latency_target=1.0, backoff=0.5, clock=clock)
+            permit = await controller.acquire()
+            clock.now = 3.0
+            permit.release()
+            return controller
+        
+        assert asyncio.run(scenario()).limit == 5
+
+class TestAdmissionEndpoints:
+    """Test cases for shedding at the API"""
+    
+    def test_shed_request_returns_503_with_retry_after(self):
+        """Test a request that cannot be admitted in time gets 503 and Retry-After"""
+        controller = AdmissionController(initial_limit=1, max_limit=1, max_queue=0)
+        controller.in_flight = 1
+        processor = Mock()
+        
+        with patch("app.main.intent_processor", processor), patch("app.main.admission_controller", controller):
+            response = TestClient(app).post("/process", json={"user_input": "Book a table"})
+        
+        assert response.status_code == 503
+        assert int(response.headers["Retry-After"]) >= 1
+        processor.aprocess_user_input.assert_not_called()
+    
+    def test_admitted_request_releases_its_slot(self):
+        """Test a served request gives its slot back"""
+        controller = AdmissionController(initial_limit=1, max_limit=1)
+        processor = Mock()
+        processor.aprocess_user_input = AsyncMock(return_value=AssistantResponse(
+            intent_category=IntentCategory.DINING,
+            entities=EntityModel(),
+            confidence_score=0.9,
+            follow_up_questions=[]
+        ))
+        
+        with patch("app.main.intent_processor", processor), patch("app.main.admission_controller", controller):
+            response = TestClient(app).post("/process", json={"user_input": "Book a table"},
+                                            headers={"X-Request-Priority": "batch"})
+        
+        assert response.status_code == 200
+        assert controller.in_flight == 0
+        assert controller.stats()["service_time_seconds"].keys() == {"batch"}
+    
+    def test_unknown_priority_rejected(self):
+        """Test an invalid X-Request-Priority header is a client error"""
+        with patch("app.main.intent_processor", Mock()):
+            response = TestClient(app).post("/process", json={"user_input": "Book a table"},
+                                            headers={"X-Request-Priority": "urgent"})
+        
+        assert response.status_code == 400
@@ -0,0 +1,113 @@
+import pytest
+from datetime import date
+from app.services.cache import InMemoryCache, SQLiteCache, create_cache, make_cache_key, normalize_text
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class TestCacheKeys:
+    """Test cases for cache key construction"""
+    
+    def test_normalize_text(self):
+        """Test whitespace, case and trailing punctuation are ignored"""
+        assert normalize_text("  Book a CAB   to the airport!! ") == "book a cab to the airport"
+    
+    def test_key_scoped_by_deployment_prompt_and_day(self):
+        """Test keys differ across deployments, prompt versions and days"""
+        day = date(2024, 1, 15)
+        base = make_cache_key("table for two tonight", "gpt-4", "prompt-v1", day)
+        
+        assert base == make_cache_key("Table for two tonight.", "gpt-4", "prompt-v1", day)
+        assert base != make_cache_key("table for two tonight", "gpt-35", "prompt-v1", day)
+        assert base != make_cache_key("table for two tonight", "gpt-4", "prompt-v2", day)
+        assert base != make_cache_key("table for two tonight", "gpt-4", "prompt-v1", date(2024, 1, 16))
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache_factory(request, tmp_path):
+    """Build caches of either backend with a controllable clock"""
+    def factory(max_size=2, ttl_seconds=60.0):
+        clock = FakeClock()
+        if request.param == "memory":
+            cache = InMemoryCache(max_size=max_size, ttl_seconds=ttl_seconds, clock=clock)
+        else:
+            cache = SQLiteCache(str(tmp_path / "cache.db"), max_size=max_size, ttl_seconds=ttl_seconds, clock=clock,
+                                touch_interval=1.0)
+        return cache, clock
+    return factory
+
+class TestResponseCacheBackends:
+    """Test cases shared by every cache backend"""
+    
+    def test_hit_and_miss_counters(self, cache_factory):
+        """Test hits and misses are counted"""
+        cache, _ = cache_factory()
+        assert cache.get("a") is None
+        cache.set("a", "value")
+        assert cache.get("a") == "value"
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["size"] == 1
+    
+    def test_ttl_expiry(self, cache_factory):
+        """Test entries expire after the TTL"""
+        cache, clock = cache_factory(ttl_seconds=10.0)
+        cache.set("a", "value")
+        clock.now += 11
+        
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+    
+    def test_lru_eviction(self, cache_factory):
+        """Test the least recently used entry is evicted when full"""
+        cache, clock = cache_factory(max_size=2)
+        cache.set("a", "1")
+        clock.now += 1
+        cache.set("b", "2")
+        clock.now += 1
+        cache.get("a")
+        clock.now += 1
+        cache.set("c", "3")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+        assert cache.stats()["evictions"] == 1
+
+def test_sqlite_cache_persists_across_instances(tmp_path):
+    """Test the SQLite backend survives a restart"""
+    path = str(tmp_path / "cache.db")
+    SQLiteCache(path).set("a", "value")
+    
+    assert SQLiteCache(path).get("a") == "value"
+
+def test_sqlite_hits_refresh_recency_at_most_once_per_interval(tmp_path):
+    """Test repeated hits inside touch_interval are read-only"""
+    clock = FakeClock()
+    cache = SQLiteCache(str(tmp_path / "cache.db"), clock=clock, touch_interval=60.0)
+    cache.set("a", "value")
+    writes = cache._conn.total_changes
+    
+    for _ in range(5):
+        clock.now += 10
+        assert cache.get("a") == "value"
+    assert cache._conn.total_changes == writes
+    
+    clock.now += 20
+    cache.get("a")
+    assert cache._conn.total_changes == writes + 1
+
+def test_create_cache():
+    """Test backend selection from configuration"""
+    assert create_cache("none") is None
+    assert isinstance(create_cache("memory"), InMemoryCache)
+    with pytest.raises(ValueError):
+        create_cache("redis")
@@ -0,0 +1,174 @@
+import pytest
+import asyncio
+import httpx
+import openai
+from unittest.mock import Mock
+from app.services.endpoint_pool import EndpointPool, LLMEndpoint
+
+class FakeClock:
+    """Manually advanced clock for cooldown and drain tests"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+def _raw(content="ok", headers=None):
+    raw = Mock()
+    raw.headers = headers or {}
+    raw.parse.return_value = content
+    return raw
+
+def _rate_limited(retry_after="5"):
+    request = httpx.Request("POST", "https://east.openai.azure.com/")
+    return openai.RateLimitError(
+        "Too Many Requests", response=httpx.Response(429, request=request, headers={"retry-after": retry_after}), body=None
+    )
+
+def _pool(clock, **kwargs):
+    endpoints = [LLMEndpoint("east", "https://east.openai.azure.com/", "k1"),
+                 LLMEndpoint("west", "https://west.openai.azure.com/", "k2")]
+    clients = {endpoint.name: Mock() for endpoint in endpoints}
+    pool = EndpointPool(endpoints, clock=clock, **kwargs)
+    pool.bind(lambda endpoint: clients[endpoint.name], lambda endpoint: clients[endpoint.name])
+    return pool, {name: client.chat.completions.with_raw_response.create for name, client in clients.items()}
+
+class TestEndpointSelection:
+    """Test cases for picking an endpoint"""
+    
+    def test_faster_endpoint_preferred(self):
+        """Test calls go to the endpoint with the lower observed latency"""
+        clock = FakeClock()
+        pool, create = _pool(clock)
+        def slow(**kwargs):
+            clock.now += 2.0
+            return _raw("east")
+        def fast(**kwargs):
+            clock.now += 0.5
+            return _raw("west")
+        create["east"].side_effect = slow
+        create["west"].side_effect = fast
+        
+        answers = [pool.create(model="gpt", messages=[]) for _ in range(4)]
+        
+        assert answers == ["east", "west", "west", "west"]
+        assert create["west"].call_args.kwargs == {"model": "gpt", "messages": []}
+        assert pool.stats()["endpoints"][1]["ewma_latency_ms"] == 500.0
+    
+    def test_low_headroom_endpoint_avoided(self):
+        """Test an endpoint reporting few remaining requests is passed over"""
+        clock = FakeClock()
+        pool, create = _pool(clock)
+        create["east"].return_value = _raw("east", {"x-ratelimit-remaining-requests": "1"})
+        create["west"].return_value = _raw("west", {"x-ratelimit-remaining-requests": "500"})
+        
+        answers = [pool.create(model="gpt", messages=[]) for _ in range(3)]
+        
+        assert answers == ["east", "west", "west"]
+        assert pool.stats()["endpoints"][0]["remaining_requests"] == 1
+
+class TestEndpointFailover:
+    """Test cases for throttling, failover and draining"""
+    
+    def test_throttled_call_fails_over_and_endpoint_cools_down(self):
+        """Test a 429 moves the call to another endpoint and benches the throttled one for Retry-After"""
+        clock = FakeClock()
+        pool, create = _pool(clock)
+        create["east"].side_effect = [_rate_limited("5"), _raw("east")]
+        create["west"].return_value = _raw("west")
+        
+        assert pool.create(model="gpt", messages=[]) == "west"
+        assert pool.stats()["endpoints"][0]["state"] == "cooling"
+        assert pool.create(model="gpt", messages=[]) == "west"
+        clock.now = 6.0
+        
+        assert pool.stats()["endpoints"][0]["state"] == "healthy"
+        assert pool.create(model="gpt", messages=[]) == "east"
+        assert pool.stats()["failovers"] == 1
+    
+    def test_error_raised_when_every_endpoint_fails(self):
+        """Test the last error is raised once no endpoint is left to try"""
+        pool, create = _pool(FakeClock())
+        create["east"].side_effect = _rate_limited()
+        create["west"].side_effect = _rate_limited()
+        
+        with pytest.raises(openai.RateLimitError):
+            pool.create(model="gpt", messages=[])
+        
+        assert [e["state"] for e in pool.stats()["endpoints"]] == ["cooling", "cooling"]
+    
+    def test_client_errors_not_failed_over(self):
+        """Test a bad request is raised without trying another endpoint"""
+        pool, create = _pool(FakeClock())
+        request = httpx.Request("POST", "https://east.openai.azure.com/")
+        create["east"].side_effect = openai.BadRequestError(
+            "Bad Request", response=httpx.Response(400, request=request), body=None
+        )
+        
+        with pytest.raises(openai.BadRequestError):
+            pool.create(model="gpt", messages=[])
+        
+        create["west"].assert_not_called()
+    
+    def test_failing_endpoint_drained_then_probed(self):
+        """Test repeated transient failures drain an endpoint until drain_seconds pass"""
+        clock = FakeClock()
+        pool, create = _pool(clock, drain_after=2, drain_seconds=30)
+        request = httpx.Request("POST", "https://east.openai.azure.com/")
+        create["east"].side_effect = openai.APIConnectionError(request=request)
+        create["west"].return_value = _raw("west", {"x-ratelimit-remaining-requests": "1"})
+        
+        for _ in range(3):
+            assert pool.create(model="gpt", messages=[]) == "west"
+        
+        assert pool.stats()["endpoints"][0]["state"] == "drained"
+        assert create["east"].call_count == 2
+        clock.now = 31.0
+        pool.create(model="gpt", messages=[])
+        assert create["east"].call_count == 3
+    
+    def test_async_failover(self):
+        """Test the async path fails over and parses a real SDK response"""
+        pool, _ = _pool(FakeClock())
+        def handler(request):
+            if request.url.host.startswith("east"):
+                return httpx.Response(429, headers={"retry-after": "5"}, json={"error": {"message": "Too Many Requests"}})
+            return httpx.Response(200, headers={"x-ratelimit-remaining-requests": "99"}, json={
+                "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "gpt",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "west"}}],
+            })
+        def client(endpoint):
+            return openai.AsyncAzureOpenAI(
+                azure_endpoint=endpoint.azure_endpoint, api_key=endpoint.api_key, api_version="2024-02-01",
+                max_retries=0, http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            )
+        pool.bind(Mock(), client)
+        
+        response = asyncio.run(pool.acreate(model="gpt", messages=[{"role": "user", "content": "hi"}]))
+        
+        assert response.choices[0].message.content == "west"
+        assert pool.stats()["failovers"] == 1
+        assert pool.stats()["endpoints"][1]["remaining_requests"] == 99
+        assert [e["in_flight"] for e in pool.stats()["endpoints"]] == [0, 0]
+    
+    def test_cancelled_calls_release_in_flight(self):
+        """Test a cancelled call no longer counts against its endpoint"""
+        pool, _ = _pool(FakeClock())
+        async def hang(**kwargs):
+            await asyncio.sleep(10)
+        client = Mock()
+        client.chat.completions.with_raw_response.create = hang
+        pool.bind(Mock(), lambda endpoint: client)
+        
+        async def cancel_three():
+            for _ in range(3):
+                task = asyncio.create_task(pool.acreate(model="gpt", messages=[]))
+                await asyncio.sleep(0)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+        asyncio.run(cancel_three())
+        
+        assert [e["in_flight"] for e in pool.stats()["endpoints"]] == [0, 0]
+        assert pool.stats()["failovers"] == 0
@@ -0,0 +1,112 @@
+import pytest
+from datetime import date
+from app.models import EntityModel
+from app.services.entity_extractor import LocalEntityExtractor, merge_entities
+
+TODAY = date(2024, 1, 15)  # a Monday
+
+class TestLocalEntityExtractor:
+    """Test cases for deterministic entity extraction"""
+    
+    @pytest.fixture
+    def extractor(self):
+        return LocalEntityExtractor()
+    
+    @pytest.mark.parametrize("user_input,expected", [
+        ("table for two tonight", "2024-01-15"),
+        ("cab to the airport tomorrow morning", "2024-01-16"),
+        ("day after tomorrow", "2024-01-17"),
+        ("weekend trip to Paris", "2024-01-20"),
+        ("trip next month", "2024-02-15"),
+        ("dinner next monday", "2024-01-22"),
+        ("lunch on friday", "2024-01-19"),
+        ("dinner on 15th of March", "2024-03-15"),
+        ("flight on Jan 3", "2025-01-03"),
+        ("4 july 1776", "1776-07-04"),
+        ("born on March 3, 1990", "1990-03-03"),
+        ("trip on 2nd of june 2025", "2025-06-02"),
+        ("check in 2024-06-01", "2024-06-01"),
+        ("march 32", None),
+        ("32 march", None),
+        ("march 31", "2024-03-31"),
+        ("gift for my sister", None),
+    ])
+    def test_extract_date(self, extractor, user_input, expected):
+        """Test relative and explicit dates resolve to YYYY-MM-DD"""
+        assert extractor.extract(user_input, today=TODAY).date == expected
+    
+    @pytest.mark.parametrize("user_input,expected", [
+        ("table at 8pm", "20:00"),
+        ("pickup at 6:30 a.m.", "06:30"),
+        ("12 am flight", "00:00"),
+        ("reservation at 19:45", "19:45"),
+        ("lunch at noon", "12:00"),
+        ("table for 4", None),
+        ("table for 2 amazing friends", None),
+        ("cab for 2 amigos", None),
+        ("3 pmc road", None),
+    ])
+    def test_extract_time(self, extractor, user_input, expected):
+        """Test times are normalized to HH:MM"""
+        assert extractor.extract(user_input, today=TODAY).time == expected
+    
+    @pytest.mark.parametrize("user_input,expected", [
+        ("table for two tonight", 2),
+        ("party of 6", 6),
+        ("trip for 3 people", 3),
+        ("dinner for a couple", 2),
+        ("table for 4 at 8pm", 4),
+        ("hotel for 3 nights", None),
+        ("dinner for 8 pm", None),
+        ("cab for 2 amigos", 2),
+    ])
+    def test_extract_party_size(self, extractor, user_input, expected):
+        """Test party size is read from numbers and number words"""
+        assert extractor.extract(user_input, today=TODAY).party_size == expected
+    
+    @pytest.mark.parametrize("user_input,expected", [
+        ("need a large vehicle", "large vehicle"),
+        ("book an SUV", "SUV"),
+        ("sedan to the station", "sedan"),
+        ("cab to the airport", None),
+    ])
+    def test_extract_vehicle_type(self, extractor, user_input, expected):
+        """Test vehicle type keywords are normalized"""
+        assert extractor.extract(user_input, today=TODAY).vehicle_type == expected
+
+@pytest.mark.parametrize("user_input,overrides", [
+    ("Dinner for four at 7:30 tonight", ("date",)),
+    ("Dinner at 7:30pm", ("date", "time")),
+    ("Train at 19:30", ("date", "time")),
+    ("Lunch at noon", ("date", "time")),
+    ("Table for two", ("date",)),
+])
+def test_overriding_fields(user_input, overrides):
+    """Test only unambiguous local times may replace the LLM's"""
+    assert LocalEntityExtractor().overriding_fields(user_input) == overrides
+
+def test_ambiguous_local_time_keeps_llm_time():
+    """Test a bare h:mm only fills a missing time and never replaces the LLM's"""
+    extractor = LocalEntityExtractor()
+    user_input = "Dinner for four at 7:30 tonight"
+    local = extractor.extract(user_input, today=TODAY)
+    
+    kept = merge_entities(EntityModel(time="19:30"), local, extractor.overriding_fields(user_input))
+    filled = merge_entities(EntityModel(), local, extractor.overriding_fields(user_input))
+    
+    assert local.time == "07:30"
+    assert kept.time == "19:30"
+    assert kept.date == "2024-01-15"
+    assert filled.time == "07:30"
+
+def test_merge_entities_prefers_local_dates_and_fills_gaps():
+    """Test local dates and times override the LLM and other fields only fill gaps"""
+    llm = EntityModel(date="2023-01-01", party_size=3, destination="airport")
+    local = EntityModel(date="2024-01-16", time="08:00", party_size=2)
+    
+    merged = merge_entities(llm, local)
+    
+    assert merged.date == "2024-01-16"
+    assert merged.time == "08:00"
+    assert merged.party_size == 3
+    assert merged.destination == "airport"
@@ -0,0 +1,65 @@
+import json
+import os
+import time
+from app.services.example_index import ExampleIndex, load_examples
+
+SAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "samples")
+
+EXAMPLES = [
+    ("Table for two tonight at an Italian restaurant", {"intent_category": "dining"}),
+    ("Book a cab to the airport at 6am", {"intent_category": "cab_booking"}),
+    ("Plan a weekend trip to Goa", {"intent_category": "travel"}),
+    ("Birthday gift for my sister", {"intent_category": "gifting"}),
+]
+
+class TestExampleIndex:
+    """Test cases for few-shot example retrieval"""
+    
+    def test_most_similar_examples_ranked_first(self):
+        """Test the closest examples come back best first"""
+        index = ExampleIndex(EXAMPLES, min_similarity=0.0)
+        
+        results = index.search("Need a taxi to the airport", k=2)
+        
+        assert len(results) == 2
+        assert results[0][1][1]["intent_category"] == "cab_booking"
+        assert results[0][0] >= results[1][0]
+    
+    def test_dissimilar_examples_filtered_out(self):
+        """Test examples below the similarity threshold are not returned"""
+        index = ExampleIndex(EXAMPLES, min_similarity=0.2)
+        
+        assert index.search("quantum chromodynamics lecture notes", k=2) == []
+        assert index.search("", k=2) == []
+    
+    def test_load_examples_from_samples_and_corpus(self, tmp_path):
+        """Test examples are read from *_examples.json files and a JSONL corpus"""
+        (tmp_path / "dining_examples.json").write_text(json.dumps({
+            "examples": [{"input": "Dinner for 4", "output": {"intent_category": "dining"}}]
+        }))
+        (tmp_path / "notes.json").write_text("{}")
+        corpus = tmp_path / "corpus.jsonl"
+        corpus.write_text(json.dumps({"input": "Ride to work", "output": {"intent_category": "cab_booking"}}) + "\n\n")
+        
+        examples = load_examples(str(tmp_path), str(corpus))
+        
+        assert [text for text, _ in examples] == ["Dinner for 4", "Ride to work"]
+    
+    def test_fingerprint_tracks_examples(self):
+        """Test the fingerprint changes when the examples change"""
+        assert ExampleIndex(EXAMPLES).fingerprint == ExampleIndex(list(EXAMPLES)).fingerprint
+        assert ExampleIndex(EXAMPLES).fingerprint != ExampleIndex(EXAMPLES[:2]).fingerprint
+    
+    def test_repository_samples_query_under_a_millisecond(self):
+        """Test the bundled samples load and a query takes well under a millisecond"""
+        index = ExampleIndex.from_paths(SAMPLES_DIR)
+        assert {output["intent_category"] for _, output in index.examples} >= {"dining", "travel", "gifting", "cab_booking", "other"}
+        
+        start = time.perf_counter()
+        for _ in range(200):
+            results = index.search("Gluten-free dinner for two tonight with a view", k=2)
+        elapsed = (time.perf_counter() - start) / 200
+        
+        assert results[0][1][1]["intent_category"] == "dining"
+        assert elapsed < 0.001
+        assert index.stats()["queries"] == 200
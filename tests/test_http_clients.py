@@ -0,0 +1,41 @@
+import asyncio
+from unittest.mock import patch
+from app.services.http_clients import HTTPClientPool
+from app.services.intent_processor import IntentProcessor
+
+class TestHTTPClientPool:
+    """Test cases for the shared HTTP client pool"""
+    
+    def test_pool_limits_and_http2(self):
+        """Test connection limits and HTTP/2 are applied to both clients"""
+        pool = HTTPClientPool(max_connections=7, max_keepalive_connections=3, keepalive_expiry=5.0, http2=True)
+        
+        assert pool.http2 is True
+        assert pool.limits.max_connections == 7
+        assert pool.limits.max_keepalive_connections == 3
+        assert pool.limits.keepalive_expiry == 5.0
+        asyncio.run(pool.aclose())
+        assert pool.sync_client.is_closed
+        assert pool.async_client.is_closed
+    
+    def test_http2_falls_back_without_h2(self):
+        """Test HTTP/2 is disabled when h2 is unavailable"""
+        with patch("app.services.http_clients.http2_available", return_value=False):
+            pool = HTTPClientPool(http2=True)
+        
+        assert pool.http2 is False
+        pool.close()
+    
+    def test_processor_shares_pooled_clients(self):
+        """Test the Azure OpenAI clients are built on the shared pool"""
+        pool = HTTPClientPool()
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            http_client_pool=pool
+        )
+        
+        assert processor.client._client is pool.sync_client
+        assert processor.async_client._client is pool.async_client
+        asyncio.run(processor.aclose())
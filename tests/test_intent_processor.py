@@ -1,9 +1,24 @@
 import pytest
+import asyncio
 import json
 import os
-from unittest.mock import Mock, patch, MagicMock
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import openai
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from app.services.intent_processor import IntentProcessor
 from app.models import AssistantResponse, IntentCategory, EntityModel, WebSearchResult
+from app.services.cache import InMemoryCache
+from app.services.local_classifier import LocalIntentClassifier
+from app.services.entity_extractor import LocalEntityExtractor
+from app.services.session_store import SessionStore
+from app.utils.prompt_compiler import PromptCompiler
+from app.services.example_index import ExampleIndex
+from app.services.model_router import ModelRouter, ModelTier
+from app.services.endpoint_pool import EndpointPool, LLMEndpoint
+from app.services.resilience import CircuitBreaker, LLMResilience
+from app.utils.prompt_templates import COMPACT_CLASSIFICATION_SYSTEM_PROMPT
 
 class TestIntentProcessor:
     """Test cases for IntentProcessor class"""
@@ -31,13 +46,15 @@ class TestIntentProcessor:
         )
     
     def test_initialization(self, mock_azure_client):
-        """Test IntentProcessor initialization"""
+        """Test IntentProcessor initialization builds the client on first use"""
         processor = IntentProcessor(
             azure_endpoint="https://test.openai.azure.com/",
             azure_api_key="test-key",
             azure_deployment="test-deployment"
         )
         
+        mock_azure_client.assert_not_called()
+        assert processor.client is processor.client
         mock_azure_client.assert_called_once_with(
             azure_endpoint="https://test.openai.azure.com/",
             api_key="test-key",
@@ -45,6 +62,19 @@ class TestIntentProcessor:
         )
         assert processor.deployment_name == "test-deployment"
     
+    def test_warm_up_builds_clients(self, mock_azure_client):
+        """Test warm-up builds both clients ahead of the first request"""
+        with patch('app.services.intent_processor.AsyncAzureOpenAI') as mock_async_client:
+            processor = IntentProcessor(
+                azure_endpoint="https://test.openai.azure.com/",
+                azure_api_key="test-key",
+                azure_deployment="test-deployment"
+            )
+            processor.warm_up()
+        
+        assert processor.client is mock_azure_client.return_value
+        assert processor.async_client is mock_async_client.return_value
+    
     def test_dining_intent_classification(self, intent_processor, mock_azure_client):
         """Test dining intent classification"""
         # Mock response from Azure OpenAI
@@ -306,6 +336,861 @@ class TestIntentProcessor:
         assert result.entities.cuisine is None
         assert result.confidence_score == 0.7
 
+    def test_repeat_input_served_from_cache(self, mock_azure_client, mock_web_search):
+        """Test repeated phrasings skip the LLM once cached"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            cache=InMemoryCache()
+        )
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({
+            "intent_category": "cab_booking",
+            "entities": {"destination": "airport"},
+            "confidence_score": 0.94,
+            "follow_up_questions": [],
+            "reasoning": "Cab booking"
+        })
+        mock_azure_client.return_value.chat.completions.create.return_value = mock_response
+        
+        first = processor.process_user_input("Book a cab to the airport tomorrow morning")
+        second = processor.process_user_input("book a cab to the airport tomorrow morning.")
+        
+        assert first == second
+        assert mock_azure_client.return_value.chat.completions.create.call_count == 1
+        assert processor.stats()["cache"]["hits"] == 1
+    
+    def test_local_classifier_skips_llm(self, mock_azure_client, mock_web_search):
+        """Test high-confidence keyword matches never reach the LLM"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            local_classifier=LocalIntentClassifier(threshold=0.9)
+        )
+        
+        result = processor.process_user_input("Need a taxi pickup at 6pm")
+        
+        assert result.intent_category == IntentCategory.CAB_BOOKING
+        mock_azure_client.return_value.chat.completions.create.assert_not_called()
+        assert processor.stats()["local_classifier"]["absorbed"] == 1
+    
+    def test_local_entities_fill_fast_path_response(self, mock_azure_client, mock_web_search):
+        """Test the fast path is enriched with locally extracted entities"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            local_classifier=LocalIntentClassifier(threshold=0.9),
+            entity_extractor=LocalEntityExtractor()
+        )
+        
+        result = processor.process_user_input("Reserve a table for 4 at 8pm")
+        
+        assert result.entities.party_size == 4
+        assert result.entities.time == "20:00"
+        assert "How many people will be dining?" not in result.follow_up_questions
+        mock_azure_client.return_value.chat.completions.create.assert_not_called()
+    
+    def test_ambiguous_local_time_does_not_replace_llm_time(self, mock_azure_client, mock_web_search):
+        """Test a bare "7:30" leaves the LLM's evening time in place"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            entity_extractor=LocalEntityExtractor()
+        )
+        mock_azure_client.return_value.chat.completions.create.return_value = self._completion(json.dumps({
+            "intent_category": "dining", "entities": {"party_size": 4, "time": "19:30"}, "confidence_score": 0.9
+        }))
+        
+        result = processor.process_user_input("Dinner for four at 7:30 tonight")
+        
+        assert result.entities.time == "19:30"
+        assert result.entities.date is not None
+    
+    def test_merged_search_queries_skip_second_call(self, mock_azure_client, mock_web_search):
+        """Test merged mode takes search queries from the classification response"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            merge_search_queries=True
+        )
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({
+            "intent_category": "other",
+            "entities": {},
+            "confidence_score": 0.85,
+            "search_queries": ["Aadhar address update online", "Aadhar address change process"]
+        })
+        mock_azure_client.return_value.chat.completions.create.return_value = mock_response
+        mock_web_search.return_value.multi_search.return_value = []
+        
+        result = processor.process_user_input("How to update address in Aadhar card online")
+        
+        assert mock_azure_client.return_value.chat.completions.create.call_count == 1
+        prompt = mock_azure_client.return_value.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert "search_queries" in prompt
+        mock_web_search.return_value.multi_search.assert_called_once_with(
+            ["Aadhar address update online", "Aadhar address change process"]
+        )
+        assert "search_queries" not in result.model_dump()
+        assert processor.stats()["search_queries"]["generation_calls_skipped"] == 1
+    
+    def test_merged_search_queries_survive_cache_hit(self, mock_azure_client, mock_web_search):
+        """Test a cached merged-mode response still carries its search queries, so no second LLM call is made"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            cache=InMemoryCache(),
+            merge_search_queries=True
+        )
+        mock_azure_client.return_value.chat.completions.create.return_value = self._completion(json.dumps({
+            "intent_category": "other",
+            "entities": {},
+            "confidence_score": 0.85,
+            "search_queries": ["Aadhar address update online"]
+        }))
+        mock_web_search.return_value.multi_search.return_value = []
+        
+        processor.process_user_input("How to update address in Aadhar card online")
+        cached = processor.process_user_input("How to update address in Aadhar card online")
+        
+        assert mock_azure_client.return_value.chat.completions.create.call_count == 1
+        assert mock_web_search.return_value.multi_search.call_count == 2
+        mock_web_search.return_value.multi_search.assert_called_with(["Aadhar address update online"])
+        assert "search_queries" not in cached.model_dump()
+    
+    def test_process_batch_packs_inputs_into_one_call(self, intent_processor, mock_azure_client):
+        """Test a batch is classified with a single LLM call and split back per input"""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps([
+            {"index": 2, "intent_category": "cab_booking", "entities": {"destination": "airport"}, "confidence_score": 0.9},
+            {"index": 1, "intent_category": "dining", "entities": {"party_size": 4}, "confidence_score": 0.8}
+        ])
+        mock_azure_client.return_value.chat.completions.create.return_value = mock_response
+        
+        results = intent_processor.process_batch(["Table for 4", "Cab to the airport"])
+        
+        assert [r.intent_category for r in results] == [IntentCategory.DINING, IntentCategory.CAB_BOOKING]
+        assert results[0].entities.party_size == 4
+        assert mock_azure_client.return_value.chat.completions.create.call_count == 1
+    
+    def test_process_batch_falls_back_to_single_calls(self, intent_processor, mock_azure_client):
+        """Test an unparseable batch response falls back to per-item classification"""
+        batch_response = Mock()
+        batch_response.choices = [Mock()]
+        batch_response.choices[0].message.content = "Not a JSON array"
+        single_response = Mock()
+        single_response.choices = [Mock()]
+        single_response.choices[0].message.content = json.dumps({
+            "intent_category": "gifting",
+            "entities": {},
+            "confidence_score": 0.85
+        })
+        mock_azure_client.return_value.chat.completions.create.side_effect = [
+            batch_response, single_response, single_response
+        ]
+        
+        results = intent_processor.process_batch(["Gift for mom", "Gift for dad"], web_search=False)
+        
+        assert [r.intent_category for r in results] == [IntentCategory.GIFTING, IntentCategory.GIFTING]
+        assert mock_azure_client.return_value.chat.completions.create.call_count == 3
+
+    def test_follow_up_turn_merges_into_session(self, mock_azure_client, mock_web_search):
+        """Test a follow-up turn sends only the partial state and merges entities"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            session_store=SessionStore(InMemoryCache(max_size=10, ttl_seconds=60.0))
+        )
+        first = Mock()
+        first.choices = [Mock()]
+        first.choices[0].message.content = json.dumps({
+            "intent_category": "dining",
+            "entities": {"location": "Goa", "cuisine": "Italian"},
+            "confidence_score": 0.9,
+            "follow_up_questions": ["How many people?"]
+        })
+        second = Mock()
+        second.choices = [Mock()]
+        second.choices[0].message.content = json.dumps({
+            "intent_category": "dining",
+            "entities": {"party_size": 4},
+            "confidence_score": 0.95,
+            "follow_up_questions": []
+        })
+        create = mock_azure_client.return_value.chat.completions.create
+        create.side_effect = [first, second]
+        
+        opening = processor.process_user_input("Italian dinner in Goa")
+        follow_up = processor.process_user_input("4 of us", session_id=opening.session_id)
+        
+        assert opening.session_id is not None
+        assert follow_up.session_id == opening.session_id
+        assert follow_up.entities.location == "Goa"
+        assert follow_up.entities.cuisine == "Italian"
+        assert follow_up.entities.party_size == 4
+        prompt = create.call_args.kwargs["messages"][1]["content"]
+        assert "4 of us" in prompt
+        assert "Italian dinner in Goa" not in prompt
+        assert processor.stats()["sessions"]["incremental_turns"] == 1
+    
+    def test_follow_up_with_new_intent_starts_over(self, mock_azure_client, mock_web_search):
+        """Test a change of intent discards the previous entities"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            session_store=SessionStore(InMemoryCache(max_size=10, ttl_seconds=60.0))
+        )
+        previous = AssistantResponse(
+            intent_category=IntentCategory.DINING,
+            entities=EntityModel(location="Goa", party_size=2),
+            confidence_score=0.9
+        )
+        processor.session_store.save("abc", previous)
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({
+            "intent_category": "gifting",
+            "entities": {"recipient": "sister"},
+            "confidence_score": 0.9
+        })
+        mock_azure_client.return_value.chat.completions.create.return_value = mock_response
+        
+        result = processor.process_user_input("Actually, I need a gift for my sister", session_id="abc")
+        
+        assert result.intent_category == IntentCategory.GIFTING
+        assert result.entities.location is None
+        assert result.entities.recipient == "sister"
+    
+    def test_prompt_compiler_builds_messages(self, mock_azure_client, mock_web_search):
+        """Test classification uses the compact prompt and reports it in stats"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            prompt_compiler=PromptCompiler(max_input_tokens=1024)
+        )
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({
+            "intent_category": "gifting",
+            "entities": {"recipient": "sister"},
+            "confidence_score": 0.9
+        })
+        create = mock_azure_client.return_value.chat.completions.create
+        create.return_value = mock_response
+        
+        result = processor.process_user_input("Gift for my sister")
+        
+        assert result.intent_category == IntentCategory.GIFTING
+        messages = create.call_args.kwargs["messages"]
+        assert messages[0]["content"] == COMPACT_CLASSIFICATION_SYSTEM_PROMPT
+        assert messages[1]["content"] == 'User Input: "Gift for my sister"'
+        assert processor.stats()["prompts"]["compiled_prompts"] == 1
+    
+    def test_prose_around_json_is_recovered(self, intent_processor, mock_azure_client):
+        """Test a response wrapped in prose still parses instead of falling back"""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = (
+            'Sure, here is the classification:\n'
+            '{"intent_category": "cab_booking", "entities": {"destination": "airport"}, "confidence_score": 0.9}\n'
+            'Let me know if you need anything else.'
+        )
+        mock_azure_client.return_value.chat.completions.create.return_value = mock_response
+        
+        result = intent_processor.process_user_input("Cab to the airport")
+        
+        assert result.intent_category == IntentCategory.CAB_BOOKING
+        assert result.entities.destination == "airport"
+        assert result.confidence_score == 0.9
+    
+    def test_json_mode_requests_response_format(self, mock_azure_client, mock_web_search):
+        """Test JSON mode is requested for classification calls when enabled"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            response_format="json_object"
+        )
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({
+            "intent_category": "dining",
+            "entities": {},
+            "confidence_score": 0.9
+        })
+        create = mock_azure_client.return_value.chat.completions.create
+        create.return_value = mock_response
+        
+        processor.process_user_input("Dinner reservation")
+        
+        assert create.call_args.kwargs["response_format"] == {"type": "json_object"}
+    
+    def test_open_circuit_falls_back_to_local_guess(self, mock_azure_client, mock_web_search):
+        """Test an open circuit breaker answers from the local classifier instead of the fallback"""
+        breaker = CircuitBreaker(failure_rate=0.5, window=2, min_calls=1, reset_timeout=60.0)
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            local_classifier=LocalIntentClassifier(threshold=0.99),
+            resilience=LLMResilience(max_attempts=2, backoff_initial=0, breaker=breaker)
+        )
+        create = mock_azure_client.return_value.chat.completions.create
+        create.side_effect = openai.APIConnectionError(request=httpx.Request("POST", "https://test.openai.azure.com/"))
+        
+        result = processor.process_user_input("Looking for a restaurant with dinner for 2")
+        
+        assert result.intent_category == IntentCategory.DINING
+        assert result.confidence_score > 0.0
+        assert create.call_count == 1
+        assert breaker.state == CircuitBreaker.OPEN
+        assert mock_azure_client.call_args.kwargs["max_retries"] == 0
+        assert processor.stats()["llm_resilience"]["circuit_breaker"]["trips"] == 1
+    
+    def test_llm_outage_without_local_classifier_returns_generic_fallback(self, mock_azure_client, mock_web_search):
+        """Test an LLM outage with no local classifier gives the 0.0 other response and no web search"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            resilience=LLMResilience(max_attempts=1, backoff_initial=0)
+        )
+        create = mock_azure_client.return_value.chat.completions.create
+        create.side_effect = openai.APIConnectionError(request=httpx.Request("POST", "https://test.openai.azure.com/"))
+        
+        result = processor.process_user_input("Looking for a restaurant with dinner for 2")
+        
+        assert result.intent_category == IntentCategory.OTHER
+        assert result.confidence_score == 0.0
+        assert result.web_search_results is None
+        assert create.call_count == 1
+        mock_web_search.return_value.multi_search.assert_not_called()
+    
+    def test_rate_limit_reported_to_admission_control(self, mock_azure_client, mock_web_search):
+        """Test every 429 from Azure OpenAI is reported through on_throttled"""
+        throttled = Mock()
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            resilience=LLMResilience(max_attempts=2, backoff_initial=0),
+            on_throttled=throttled
+        )
+        request = httpx.Request("POST", "https://test.openai.azure.com/")
+        create = mock_azure_client.return_value.chat.completions.create
+        create.side_effect = openai.RateLimitError(
+            "Too Many Requests", response=httpx.Response(429, request=request), body=None
+        )
+        
+        result = processor.process_user_input("Something unusual")
+        
+        assert result.confidence_score == 0.0
+        assert create.call_count == 2
+        assert throttled.call_count == 2
+    
+    def test_similar_examples_added_to_classification_prompt(self, mock_azure_client, mock_web_search):
+        """Test the top-k similar examples go into the user message and the system prompt stays fixed"""
+        index = ExampleIndex([
+            ("Book a cab to the airport at 6am", {"intent_category": "cab_booking", "entities": {"time": "06:00", "date": None},
+                                                  "reasoning": "Cab booking"}),
+            ("Birthday gift for my sister", {"intent_category": "gifting", "entities": {}}),
+        ])
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            prompt_compiler=PromptCompiler(),
+            example_index=index,
+            few_shot_k=1
+        )
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({"intent_category": "cab_booking", "confidence_score": 0.9})
+        create = mock_azure_client.return_value.chat.completions.create
+        create.return_value = mock_response
+        
+        processor.process_user_input("Taxi to the airport please")
+        
+        messages = create.call_args.kwargs["messages"]
+        assert messages[0]["content"] == COMPACT_CLASSIFICATION_SYSTEM_PROMPT
+        assert 'Input: "Book a cab to the airport at 6am"' in messages[1]["content"]
+        assert '"entities":{"time":"06:00"}' in messages[1]["content"]
+        assert "reasoning" not in messages[1]["content"]
+        assert "sister" not in messages[1]["content"]
+        assert messages[1]["content"].endswith('User Input: "Taxi to the airport please"')
+        assert processor.stats()["few_shot"]["queries"] == 1
+    
+    def _routed_processor(self):
+        router = ModelRouter([ModelTier("small"), ModelTier("large")], default_threshold=0.7)
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="large",
+            model_router=router
+        )
+        return processor, router
+    
+    @staticmethod
+    def _completion(content):
+        completion = Mock()
+        completion.choices = [Mock()]
+        completion.choices[0].message.content = content
+        return completion
+    
+    def test_confident_small_tier_answer_is_kept(self, mock_azure_client, mock_web_search):
+        """Test a confident answer from the cheapest deployment is used without escalating"""
+        processor, router = self._routed_processor()
+        create = mock_azure_client.return_value.chat.completions.create
+        create.return_value = self._completion(json.dumps({"intent_category": "dining", "confidence_score": 0.9}))
+        
+        result = processor.process_user_input("Table for two at 8pm")
+        
+        assert result.intent_category == IntentCategory.DINING
+        assert [c.kwargs["model"] for c in create.call_args_list] == ["small"]
+        assert router.stats()["tiers"][0]["answered"] == 1
+    
+    def test_low_confidence_and_parse_failures_escalate(self, mock_azure_client, mock_web_search):
+        """Test low confidence or unparseable output moves the request to the next tier"""
+        processor, router = self._routed_processor()
+        create = mock_azure_client.return_value.chat.completions.create
+        create.side_effect = [
+            self._completion(json.dumps({"intent_category": "dining", "confidence_score": 0.4})),
+            self._completion(json.dumps({"intent_category": "travel", "confidence_score": 0.95})),
+            self._completion("not json"),
+            self._completion(json.dumps({"intent_category": "gifting", "confidence_score": 0.9})),
+        ]
+        
+        first = processor.process_user_input("Something vague about dinner")
+        second = processor.process_user_input("A present maybe")
+        
+        assert first.intent_category == IntentCategory.TRAVEL
+        assert second.intent_category == IntentCategory.GIFTING
+        assert [c.kwargs["model"] for c in create.call_args_list] == ["small", "large", "small", "large"]
+        small, large = router.stats()["tiers"]
+        assert small["escalations"] == {"low_confidence": 1, "parse_failure": 1}
+        assert small["escalation_rate"] == 1.0
+        assert large["answered"] == 2
+    
+    def test_failed_escalation_keeps_lower_tier_answer(self, mock_azure_client, mock_web_search):
+        """Test an error from the larger deployment falls back to the smaller tier's answer"""
+        processor, router = self._routed_processor()
+        create = mock_azure_client.return_value.chat.completions.create
+        create.side_effect = [
+            self._completion(json.dumps({"intent_category": "cab_booking", "confidence_score": 0.5})),
+            openai.APIConnectionError(request=httpx.Request("POST", "https://test.openai.azure.com/")),
+        ]
+        
+        result = processor.process_user_input("Need a ride somewhere")
+        
+        assert result.intent_category == IntentCategory.CAB_BOOKING
+        assert result.confidence_score == 0.5
+        assert router.stats()["tiers"][0]["answered"] == 1
+    
+    def test_search_queries_use_fastest_tier(self, mock_azure_client, mock_web_search):
+        """Test query generation runs on the cheapest deployment"""
+        processor, _ = self._routed_processor()
+        create = mock_azure_client.return_value.chat.completions.create
+        create.side_effect = [
+            self._completion(json.dumps({"intent_category": "other", "confidence_score": 0.9})),
+            self._completion("passport renewal steps"),
+        ]
+        mock_web_search.return_value.multi_search.return_value = []
+        
+        processor.process_user_input("How do I renew my passport")
+        
+        assert [c.kwargs["model"] for c in create.call_args_list] == ["small", "small"]
+    
+    def test_endpoint_pool_fails_over_on_throttling(self, mock_azure_client, mock_web_search):
+        """Test completions fail over to the next endpoint without reporting the 429 upstream"""
+        clients = {"https://east.openai.azure.com/": Mock(), "https://west.openai.azure.com/": Mock()}
+        mock_azure_client.side_effect = lambda **kwargs: clients[kwargs["azure_endpoint"]]
+        request = httpx.Request("POST", "https://east.openai.azure.com/")
+        clients["https://east.openai.azure.com/"].chat.completions.with_raw_response.create.side_effect = openai.RateLimitError(
+            "Too Many Requests", response=httpx.Response(429, request=request), body=None
+        )
+        raw = clients["https://west.openai.azure.com/"].chat.completions.with_raw_response.create.return_value
+        raw.headers = {}
+        raw.parse.return_value = self._completion(json.dumps({"intent_category": "dining", "confidence_score": 0.9}))
+        on_throttled = Mock()
+        pool = EndpointPool([LLMEndpoint("east", "https://east.openai.azure.com/", "k1"),
+                             LLMEndpoint("west", "https://west.openai.azure.com/", "k2")])
+        processor = IntentProcessor(
+            azure_endpoint="https://east.openai.azure.com/",
+            azure_api_key="k1",
+            azure_deployment="test-deployment",
+            on_throttled=on_throttled,
+            endpoint_pool=pool
+        )
+        
+        result = processor.process_user_input("Table for two at 8pm")
+        
+        assert result.intent_category == IntentCategory.DINING
+        assert mock_azure_client.call_args.kwargs["api_key"] == "k2"
+        on_throttled.assert_not_called()
+        assert processor.stats()["endpoints"]["failovers"] == 1
+    
+    def test_speculative_search_used_or_discarded(self, mock_azure_client, mock_web_search):
+        """Test a likely other input searches alongside classification and keeps the result only for other"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            speculation_threshold=0.7
+        )
+        intents = {"How do I renew my passport?": "other", "How do I get to Goa cheaply?": "travel"}
+        def respond(**kwargs):
+            content = kwargs["messages"][-1]["content"]
+            if kwargs["max_tokens"] == 200:
+                return self._completion("passport renewal steps")
+            intent = next(intent for text, intent in intents.items() if text in content)
+            return self._completion(json.dumps({"intent_category": intent, "confidence_score": 0.9}))
+        mock_azure_client.return_value.chat.completions.create.side_effect = respond
+        results = [WebSearchResult(title="Renew", url="https://example.com", snippet="Steps")]
+        mock_web_search.return_value.multi_search.return_value = results
+        
+        other = processor.process_user_input("How do I renew my passport?")
+        travel = processor.process_user_input("How do I get to Goa cheaply?")
+        processor.process_user_input("Book a table for 4 at 8pm")
+        
+        assert other.web_search_results == results
+        assert travel.web_search_results is None
+        stats = processor.stats()["speculative_search"]
+        assert stats["started"] == 2
+        assert stats["used"] == 1
+        assert stats["wasted"] == 1
+        assert stats["wasted_ratio"] == 0.5
+    
+    def test_speculation_skipped_when_answered_without_llm(self, mock_azure_client, mock_web_search):
+        """Test cache hits and local classifier answers never start a speculative search"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            cache=InMemoryCache(),
+            local_classifier=LocalIntentClassifier(threshold=0.9),
+            speculation_threshold=0.0
+        )
+        def respond(**kwargs):
+            if kwargs["max_tokens"] == 200:
+                return self._completion("passport renewal steps")
+            return self._completion(json.dumps({"intent_category": "other", "confidence_score": 0.9}))
+        mock_azure_client.return_value.chat.completions.create.side_effect = respond
+        mock_web_search.return_value.multi_search.return_value = []
+        
+        processor.process_user_input("How do I renew my passport?")
+        processor.process_user_input("How do I renew my passport?")
+        local = processor.process_user_input("Book a table for 4 at 8pm")
+        
+        assert local.intent_category == IntentCategory.DINING
+        assert processor.stats()["speculative_search"]["started"] == 1
+    
+    def test_multi_intent_sub_requests_processed_separately(self, mock_azure_client, mock_web_search):
+        """Test a compound request returns one response per intent, in order"""
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            local_classifier=LocalIntentClassifier(threshold=0.9),
+            entity_extractor=LocalEntityExtractor()
+        )
+        create = mock_azure_client.return_value.chat.completions.create
+        create.return_value = self._completion(json.dumps({
+            "intent_category": "cab_booking", "entities": {"destination": "the restaurant"}, "confidence_score": 0.9
+        }))
+        
+        result = processor.process_multi_intent("Book a cab to the restaurant and a table for 4 at 8pm")
+        
+        assert result.sub_requests == ["Book a cab to the restaurant", "Book a table for 4 at 8pm"]
+        assert [r.intent_category for r in result.responses] == [IntentCategory.CAB_BOOKING, IntentCategory.DINING]
+        assert result.responses[0].entities.destination == "the restaurant"
+        assert result.responses[1].entities.party_size == 4
+        assert create.call_count == 1
+        assert processor.stats()["multi_intent"]["split"] == 1
+    
+    def test_identical_concurrent_inputs_share_one_llm_call(self, intent_processor, mock_azure_client):
+        """Test concurrent identical inputs are coalesced into one classification call"""
+        def respond(**kwargs):
+            time.sleep(0.2)
+            mock_response = Mock()
+            mock_response.choices = [Mock()]
+            mock_response.choices[0].message.content = json.dumps({
+                "intent_category": "travel",
+                "entities": {"destination": "Goa"},
+                "confidence_score": 0.9
+            })
+            return mock_response
+        create = mock_azure_client.return_value.chat.completions.create
+        create.side_effect = respond
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(intent_processor.process_user_input, ["Weekend trip to Goa"] * 4))
+        
+        assert all(r.entities.destination == "Goa" for r in results)
+        assert len({id(r) for r in results}) == 4
+        assert create.call_count == 1
+        assert intent_processor.stats()["coalescing"]["classification"]["coalesced"] == 3
+    
+class TestAsyncIntentProcessor:
+    """Test cases for the async IntentProcessor path"""
+    
+    @pytest.fixture
+    def mock_async_azure_client(self):
+        """Mock async Azure OpenAI client"""
+        with patch('app.services.intent_processor.AsyncAzureOpenAI') as mock_client:
+            mock_client.return_value.chat.completions.create = AsyncMock()
+            yield mock_client
+    
+    @pytest.fixture
+    def mock_web_search(self):
+        """Mock web search service"""
+        with patch('app.services.intent_processor.WebSearchService') as mock_search:
+            mock_search.return_value.amulti_search = AsyncMock(return_value=[])
+            yield mock_search
+    
+    @pytest.fixture
+    def intent_processor(self, mock_async_azure_client, mock_web_search):
+        """Create IntentProcessor instance with mocked async dependencies"""
+        with patch('app.services.intent_processor.AzureOpenAI'):
+            return IntentProcessor(
+                azure_endpoint="https://test.openai.azure.com/",
+                azure_api_key="test-key",
+                azure_deployment="test-deployment"
+            )
+    
+    def test_async_dining_intent_classification(self, intent_processor, mock_async_azure_client):
+        """Test the async path classifies without touching the sync client"""
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({
+            "intent_category": "dining",
+            "entities": {"party_size": 2},
+            "confidence_score": 0.95,
+            "follow_up_questions": [],
+            "reasoning": "Dining request"
+        })
+        mock_async_azure_client.return_value.chat.completions.create.return_value = mock_response
+        
+        result = asyncio.run(intent_processor.aprocess_user_input("Table for two tonight"))
+        
+        assert result.intent_category == IntentCategory.DINING
+        assert result.entities.party_size == 2
+        assert intent_processor._client is None
+    
+    def test_async_other_intent_with_web_search(self, intent_processor, mock_async_azure_client, mock_web_search):
+        """Test the async path runs query generation and web search for other intent"""
+        intent_response = Mock()
+        intent_response.choices = [Mock()]
+        intent_response.choices[0].message.content = json.dumps({
+            "intent_category": "other",
+            "entities": {},
+            "confidence_score": 0.85,
+            "follow_up_questions": [],
+            "reasoning": "General query"
+        })
+        search_response = Mock()
+        search_response.choices = [Mock()]
+        search_response.choices[0].message.content = "query one\nquery two"
+        mock_async_azure_client.return_value.chat.completions.create.side_effect = [
+            intent_response, search_response
+        ]
+        mock_web_search.return_value.amulti_search.return_value = [
+            WebSearchResult(title="Result", url="https://example.com", snippet="snippet")
+        ]
+        
+        result = asyncio.run(intent_processor.aprocess_user_input("How to renew a passport"))
+        
+        assert result.intent_category == IntentCategory.OTHER
+        assert len(result.web_search_results) == 1
+        mock_web_search.return_value.amulti_search.assert_awaited_once_with(["query one", "query two"])
+    
+    def test_async_process_batch_respects_batch_size(self, intent_processor, mock_async_azure_client):
+        """Test the async batch path issues one LLM call per chunk"""
+        intent_processor.batch_size = 2
+        def respond(**kwargs):
+            count = kwargs["messages"][1]["content"].count('. "')
+            mock_response = Mock()
+            mock_response.choices = [Mock()]
+            mock_response.choices[0].message.content = json.dumps([
+                {"intent_category": "travel", "entities": {}, "confidence_score": 0.9}
+            ] * count)
+            return mock_response
+        mock_async_azure_client.return_value.chat.completions.create.side_effect = respond
+        
+        results = asyncio.run(intent_processor.aprocess_batch(["Trip to Goa", "Trip to Rome", "Trip to Oslo"]))
+        
+        assert len(results) == 3
+        assert all(r.intent_category == IntentCategory.TRAVEL for r in results)
+        assert mock_async_azure_client.return_value.chat.completions.create.await_count == 2
+    
+    def test_astream_yields_classification_before_search_results(self, intent_processor, mock_async_azure_client, mock_web_search):
+        """Test streaming emits the intent first, then incremental search results"""
+        intent_response = Mock()
+        intent_response.choices = [Mock()]
+        intent_response.choices[0].message.content = json.dumps({
+            "intent_category": "other",
+            "entities": {},
+            "confidence_score": 0.85
+        })
+        search_response = Mock()
+        search_response.choices = [Mock()]
+        search_response.choices[0].message.content = "query one\nquery two"
+        mock_async_azure_client.return_value.chat.completions.create.side_effect = [
+            intent_response, search_response
+        ]
+        first = [WebSearchResult(title="One", url="https://one.example", snippet="")]
+        both = first + [WebSearchResult(title="Two", url="https://two.example", snippet="")]
+        async def stream(queries):
+            yield first
+            yield both
+        mock_web_search.return_value.astream_multi_search = stream
+        
+        async def collect():
+            return [event async for event in intent_processor.astream_user_input("How to renew a passport")]
+        events = asyncio.run(collect())
+        
+        assert [name for name, _ in events] == ["classification", "search_results", "search_results", "done"]
+        assert events[0][1].intent_category == IntentCategory.OTHER
+        assert events[0][1].web_search_results is None
+        assert events[-1][1].web_search_results == both
+    
+    def test_astream_follow_up_merges_into_session(self, mock_async_azure_client, mock_web_search):
+        """Test a streamed follow-up turn continues the session like process_user_input"""
+        with patch('app.services.intent_processor.AzureOpenAI'):
+            processor = IntentProcessor(
+                azure_endpoint="https://test.openai.azure.com/",
+                azure_api_key="test-key",
+                azure_deployment="test-deployment",
+                session_store=SessionStore(InMemoryCache(max_size=10, ttl_seconds=60.0))
+            )
+        create = mock_async_azure_client.return_value.chat.completions.create
+        create.side_effect = [
+            TestIntentProcessor._completion(json.dumps({
+                "intent_category": "dining", "entities": {"location": "Goa"}, "confidence_score": 0.9
+            })),
+            TestIntentProcessor._completion(json.dumps({
+                "intent_category": "dining", "entities": {"party_size": 4}, "confidence_score": 0.95
+            })),
+        ]
+        
+        async def collect(user_input, session_id=None):
+            return [event async for event in processor.astream_user_input(user_input, session_id=session_id)]
+        opening = asyncio.run(collect("Dinner in Goa"))
+        session_id = opening[-1][1].session_id
+        follow_up = asyncio.run(collect("4 of us", session_id=session_id))
+        
+        assert session_id is not None
+        assert [name for name, _ in follow_up] == ["classification", "done"]
+        assert follow_up[0][1].session_id == session_id
+        assert follow_up[-1][1].entities.location == "Goa"
+        assert follow_up[-1][1].entities.party_size == 4
+        assert "Dinner in Goa" not in create.call_args.kwargs["messages"][1]["content"]
+    
+    def test_async_speculative_search_cancelled_when_not_other(self, mock_async_azure_client, mock_web_search):
+        """Test a speculative search is cancelled once the classification is not other"""
+        with patch('app.services.intent_processor.AzureOpenAI'):
+            processor = IntentProcessor(
+                azure_endpoint="https://test.openai.azure.com/",
+                azure_api_key="test-key",
+                azure_deployment="test-deployment",
+                speculation_threshold=0.7
+            )
+        searched = []
+        async def respond(**kwargs):
+            if kwargs["max_tokens"] == 200:
+                await asyncio.sleep(0.5)
+                searched.append(kwargs)
+            mock_response = Mock()
+            mock_response.choices = [Mock()]
+            mock_response.choices[0].message.content = json.dumps({"intent_category": "travel", "confidence_score": 0.9})
+            return mock_response
+        mock_async_azure_client.return_value.chat.completions.create.side_effect = respond
+        
+        async def scenario():
+            result = await processor.aprocess_user_input("How do I get to Goa cheaply?")
+            await asyncio.sleep(0.6)
+            return result
+        
+        result = asyncio.run(scenario())
+        
+        assert result.intent_category == IntentCategory.TRAVEL
+        assert searched == []
+        mock_web_search.return_value.amulti_search.assert_not_called()
+        assert processor.stats()["speculative_search"]["wasted"] == 1
+    
+    def test_async_speculation_skipped_on_cache_hit(self, mock_async_azure_client, mock_web_search):
+        """Test a cached input is answered without starting a speculative search"""
+        with patch('app.services.intent_processor.AzureOpenAI'):
+            processor = IntentProcessor(
+                azure_endpoint="https://test.openai.azure.com/",
+                azure_api_key="test-key",
+                azure_deployment="test-deployment",
+                cache=InMemoryCache(),
+                speculation_threshold=0.0
+            )
+        mock_response = Mock()
+        mock_response.choices = [Mock()]
+        mock_response.choices[0].message.content = json.dumps({"intent_category": "travel", "confidence_score": 0.9})
+        mock_async_azure_client.return_value.chat.completions.create.return_value = mock_response
+        
+        async def scenario():
+            await processor.aprocess_user_input("Trip to Goa")
+            return await processor.aprocess_user_input("Trip to Goa")
+        result = asyncio.run(scenario())
+        
+        assert result.intent_category == IntentCategory.TRAVEL
+        assert processor.stats()["speculative_search"]["started"] == 1
+    
+    def test_async_multi_intent_runs_sub_requests_concurrently(self, intent_processor, mock_async_azure_client):
+        """Test the async path classifies the sub-requests in parallel"""
+        async def respond(**kwargs):
+            await asyncio.sleep(0.2)
+            intent = "cab_booking" if "Get me a cab home" in kwargs["messages"][-1]["content"] else "gifting"
+            mock_response = Mock()
+            mock_response.choices = [Mock()]
+            mock_response.choices[0].message.content = json.dumps({"intent_category": intent, "confidence_score": 0.9})
+            return mock_response
+        mock_async_azure_client.return_value.chat.completions.create.side_effect = respond
+        
+        start = time.perf_counter()
+        result = asyncio.run(intent_processor.aprocess_multi_intent("Get me a cab home and then a gift for mom"))
+        elapsed = time.perf_counter() - start
+        
+        assert result.sub_requests == ["Get me a cab home", "Get a gift for mom"]
+        assert [r.intent_category for r in result.responses] == [IntentCategory.CAB_BOOKING, IntentCategory.GIFTING]
+        assert elapsed < 0.35
+    
+    def test_async_multi_intent_follow_up_not_split(self, intent_processor, mock_async_azure_client):
+        """Test a request continuing a session is processed whole"""
+        intent_processor.aprocess_user_input = AsyncMock(return_value=AssistantResponse(
+            intent_category=IntentCategory.DINING, entities=EntityModel(), confidence_score=0.9
+        ))
+        
+        result = asyncio.run(intent_processor.aprocess_multi_intent("A cab and a table for two", session_id="s1"))
+        
+        assert result.sub_requests == ["A cab and a table for two"]
+        intent_processor.aprocess_user_input.assert_awaited_once_with("A cab and a table for two", "s1")
+    
+    def test_async_api_error_handling(self, intent_processor, mock_async_azure_client):
+        """Test the async path returns the fallback response on API errors"""
+        mock_async_azure_client.return_value.chat.completions.create.side_effect = Exception("API Error")
+        
+        result = asyncio.run(intent_processor.aprocess_user_input("Test input"))
+        
+        assert result.confidence_score == 0.0
+        assert result.reasoning == "Error occurred during processing"
+
 # Integration tests (require actual Azure OpenAI setup)
 class TestIntentProcessorIntegration:
     """Integration tests for IntentProcessor (requires Azure OpenAI setup)"""
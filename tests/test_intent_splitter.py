@@ -0,0 +1,42 @@
+import pytest
+from app.services.intent_splitter import IntentSplitter
+
+class TestIntentSplitter:
+    """Test cases for local multi-intent splitting"""
+    
+    @pytest.fixture
+    def splitter(self):
+        return IntentSplitter()
+    
+    @pytest.mark.parametrize("user_input,expected", [
+        ("Book a cab to the restaurant and a table for 4 at 8pm",
+         ["Book a cab to the restaurant", "Book a table for 4 at 8pm"]),
+        ("Need a taxi to the mall, then find a birthday gift for my sister",
+         ["Need a taxi to the mall", "find a birthday gift for my sister"]),
+        ("Book a flight to Delhi; also a hotel near the airport and a table for two",
+         ["Book a flight to Delhi and a hotel near the airport", "Book a table for two"]),
+    ])
+    def test_compound_requests_split_per_intent(self, splitter, user_input, expected):
+        """Test clauses with different intents become separate sub-requests"""
+        assert splitter.split(user_input) == expected
+    
+    @pytest.mark.parametrize("user_input", [
+        "Bread and butter pudding recipe",
+        "Plan a trip to Goa and book a hotel",
+        "How do I renew my passport",
+        "Dinner and drinks near my hotel",
+        "Lunch plus a flight",
+        "Cab and hotel",
+    ])
+    def test_single_intent_inputs_left_whole(self, splitter, user_input):
+        """Test inputs without two different intents are not split"""
+        assert splitter.split(user_input) == [user_input]
+    
+    def test_max_parts_and_stats(self):
+        """Test inputs with more intents than max_parts are left whole and splits are counted"""
+        splitter = IntentSplitter(max_parts=2)
+        
+        splitter.split("Book a cab and a table for two")
+        splitter.split("Book a cab; a table for two and a flight to Goa")
+        
+        assert splitter.stats() == {"requests": 2, "split": 1, "sub_requests": 2, "split_fraction": 0.5}
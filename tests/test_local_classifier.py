@@ -0,0 +1,83 @@
+import pytest
+from app.models import IntentCategory
+from app.services.local_classifier import LocalIntentClassifier
+
+class TestLocalIntentClassifier:
+    """Test cases for the keyword fast-path classifier"""
+    
+    @pytest.fixture
+    def classifier(self):
+        return LocalIntentClassifier(threshold=0.9)
+    
+    @pytest.mark.parametrize("user_input,expected", [
+        ("Need a cab pickup tomorrow at 6am", IntentCategory.CAB_BOOKING),
+        ("Book an SUV taxi for 5 people", IntentCategory.CAB_BOOKING),
+        ("Reserve a table for 4 at 8pm", IntentCategory.DINING),
+        ("Book a hotel for our weekend getaway", IntentCategory.TRAVEL),
+        ("Birthday gift ideas", IntentCategory.GIFTING),
+    ])
+    def test_obvious_inputs_are_absorbed(self, classifier, user_input, expected):
+        """Test clear-cut requests are answered locally"""
+        result = classifier.classify(user_input)
+        
+        assert result is not None
+        assert result.intent_category == expected
+        assert result.confidence_score >= 0.9
+        assert result.follow_up_questions
+    
+    @pytest.mark.parametrize("user_input", [
+        "How to update address in Aadhar card online",
+        "Planning a weekend trip to Paris next month",
+        "Book a cab to the restaurant and a table for 4",
+        "What restaurants are open late?",
+        "cancel my taxi",
+        "cancel my taxi pickup",
+        "olas?",
+        "book a taxi to the airport",
+        "Find an Italian restaurant near me",
+        "Need a birthday gift for my sister",
+    ])
+    def test_uncertain_inputs_are_deferred(self, classifier, user_input):
+        """Test single-cue, compound, question-style, cancellation or free-text-entity inputs go to the LLM"""
+        assert classifier.classify(user_input) is None
+    
+    def test_absorbed_response_carries_local_entities(self, classifier):
+        """Test entities the local extractor reads are filled in and not asked again"""
+        result = classifier.classify("Need a cab pickup tomorrow at 6am")
+        
+        assert result.entities.time == "06:00"
+        assert result.entities.date is not None
+        assert "What time do you need to be picked up?" not in result.follow_up_questions
+        assert "Where would you like to go?" in result.follow_up_questions
+    
+    def test_threshold_is_configurable(self):
+        """Test a lower threshold absorbs weaker matches"""
+        assert LocalIntentClassifier(threshold=0.5, min_cues=1).classify("Planning a weekend getaway") is not None
+    
+    def test_absorbed_fraction_counters(self, classifier):
+        """Test counters report the share of traffic handled locally"""
+        classifier.classify("Need a taxi pickup")
+        classifier.classify("How to renew a passport")
+        
+        stats = classifier.stats()
+        assert stats["requests"] == 2
+        assert stats["absorbed"] == 1
+        assert stats["absorbed_fraction"] == 0.5
+        assert stats["absorbed_by_intent"]["cab_booking"] == 1
+    
+    @pytest.mark.parametrize("user_input,likely", [
+        ("How to update address in Aadhar card online", True),
+        ("What is the capital of Peru?", True),
+        ("Book a table for 4 at 8pm", False),
+        ("Plan a weekend trip to Goa", False),
+        ("Gift ideas for my sister", False),
+    ])
+    def test_other_likelihood(self, classifier, user_input, likely):
+        """Test informational questions without category cues score as likely other"""
+        assert (classifier.other_likelihood(user_input) >= 0.7) == likely
+    
+    def test_other_likelihood_does_not_count_requests(self, classifier):
+        """Test the speculation signal leaves the fast-path counters alone"""
+        classifier.other_likelihood("How to renew a passport")
+        
+        assert classifier.stats()["requests"] == 0
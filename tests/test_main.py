@@ -0,0 +1,284 @@
+import pytest
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import AssistantResponse, EntityModel, IntentCategory, WebSearchResult
+from app.services.admission import AdmissionController
+from app.services.intent_processor import IntentProcessor
+from app.services.local_classifier import LocalIntentClassifier
+from app.services.entity_extractor import LocalEntityExtractor
+
+@pytest.fixture
+def local_processor():
+    """IntentProcessor whose LLM clients fail the test if they are ever called"""
+    with patch('app.services.intent_processor.AzureOpenAI') as mock_client, \
+         patch('app.services.intent_processor.AsyncAzureOpenAI') as mock_async_client, \
+         patch('app.services.intent_processor.WebSearchService'):
+        mock_client.return_value.chat.completions.create.side_effect = AssertionError("unexpected LLM call")
+        mock_async_client.return_value.chat.completions.create.side_effect = AssertionError("unexpected LLM call")
+        yield IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            local_classifier=LocalIntentClassifier(threshold=0.9),
+            entity_extractor=LocalEntityExtractor()
+        )
+
+def _sse_events(body):
+    """Split an SSE body into (event, data) pairs, checking each block's framing"""
+    assert body.endswith("\n\n")
+    events = []
+    for block in body[:-2].split("\n\n"):
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ")
+        assert data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+class TestStreamEndpoint:
+    """Test cases for the /process/stream Server-Sent Events endpoint"""
+    
+    @pytest.fixture
+    def streaming_processor(self):
+        """Processor mock streaming a classification, one search update and the final response"""
+        response = AssistantResponse(
+            intent_category=IntentCategory.OTHER,
+            entities=EntityModel(),
+            confidence_score=0.8,
+            session_id="session-1"
+        )
+        results = [WebSearchResult(title="Passport renewal", url="https://example.com", snippet="Renew online")]
+        
+        async def astream_user_input(user_input, session_id=None):
+            yield "classification", response
+            yield "search_results", results
+            yield "done", response.model_copy(update={"web_search_results": results})
+        
+        processor = Mock()
+        processor.astream_user_input = Mock(side_effect=astream_user_input)
+        return processor
+    
+    def test_events_are_framed_and_end_with_done(self, streaming_processor):
+        """Test each event is an event/data block and done is the terminal event"""
+        with patch("app.main.intent_processor", streaming_processor):
+            response = TestClient(app).post("/process/stream", json={"user_input": "How to renew a passport"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(response.text)
+        assert [event for event, _ in events] == ["classification", "search_results", "done"]
+        assert events[0][1]["intent_category"] == "other"
+        assert events[1][1][0]["url"] == "https://example.com"
+        assert events[-1][1]["web_search_results"][0]["title"] == "Passport renewal"
+    
+    @pytest.mark.parametrize("method,kwargs", [
+        ("POST", {"json": {"user_input": "Make it 8pm", "session_id": "session-1"}}),
+        ("GET", {"params": {"user_input": "Make it 8pm", "session_id": "session-1"}}),
+    ])
+    def test_session_id_passed_to_processor(self, streaming_processor, method, kwargs):
+        """Test both stream variants continue the given session"""
+        with patch("app.main.intent_processor", streaming_processor):
+            response = TestClient(app).request(method, "/process/stream", **kwargs)
+        
+        assert response.status_code == 200
+        streaming_processor.astream_user_input.assert_called_once_with("Make it 8pm", session_id="session-1")
+        assert _sse_events(response.text)[-1][1]["session_id"] == "session-1"
+    
+    def test_processing_error_sent_as_error_event(self):
+        """Test a failure mid-stream ends the stream with an error event"""
+        async def astream_user_input(user_input, session_id=None):
+            yield "classification", AssistantResponse(
+                intent_category=IntentCategory.OTHER, entities=EntityModel(), confidence_score=0.8
+            )
+            raise RuntimeError("search backend down")
+        
+        processor = Mock()
+        processor.astream_user_input = Mock(side_effect=astream_user_input)
+        with patch("app.main.intent_processor", processor):
+            response = TestClient(app).get("/process/stream", params={"user_input": "How to renew a passport"})
+        
+        events = _sse_events(response.text)
+        assert [event for event, _ in events] == ["classification", "error"]
+        assert events[-1][1] == {"detail": "search backend down"}
+    
+    def test_client_disconnect_releases_admission_slot(self):
+        """Test a client dropping mid-stream gives its admission slot back"""
+        controller = AdmissionController(initial_limit=1, max_limit=1)
+        
+        async def astream_user_input(user_input, session_id=None):
+            yield "classification", AssistantResponse(
+                intent_category=IntentCategory.OTHER, entities=EntityModel(), confidence_score=0.8
+            )
+            # A web search that never finishes
+            await asyncio.Event().wait()
+        
+        processor = Mock()
+        processor.astream_user_input = Mock(side_effect=astream_user_input)
+        
+        async def scenario():
+            first_event = asyncio.Event()
+            sent = []
+            body = json.dumps({"user_input": "How to renew a passport"}).encode()
+            requests = iter([{"type": "http.request", "body": body, "more_body": False}])
+            
+            async def receive():
+                request = next(requests, None)
+                if request is not None:
+                    return request
+                await first_event.wait()
+                return {"type": "http.disconnect"}
+            
+            async def send(message):
+                sent.append(message)
+                if message["type"] == "http.response.body" and message.get("body"):
+                    assert controller.in_flight == 1
+                    first_event.set()
+            
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+                "scheme": "http", "path": "/process/stream", "raw_path": b"/process/stream", "query_string": b"",
+                "root_path": "", "headers": [(b"content-type", b"application/json")],
+                "client": ("test", 1), "server": ("test", 80),
+            }
+            await asyncio.wait_for(app(scope, receive, send), timeout=5)
+            return sent
+        
+        with patch("app.main.intent_processor", processor), patch("app.main.admission_controller", controller):
+            sent = asyncio.run(scenario())
+        
+        assert sent[1]["body"].startswith(b"event: classification\n")
+        assert controller.in_flight == 0
+
+class TestMultiIntentEndpoint:
+    """Test cases for POST /process/multi"""
+    
+    def test_compound_request_returns_one_response_per_intent(self, local_processor):
+        """Test the response lists the sub-requests and their responses in the same order"""
+        with patch("app.main.intent_processor", local_processor):
+            response = TestClient(app).post("/process/multi", json={"user_input": "Book a sedan and a table for 4 at 8pm"})
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert body.keys() == {"sub_requests", "responses"}
+        assert body["sub_requests"] == ["Book a sedan", "Book a table for 4 at 8pm"]
+        assert [r["intent_category"] for r in body["responses"]] == ["cab_booking", "dining"]
+        assert body["responses"][1]["entities"]["party_size"] == 4
+    
+    @pytest.mark.parametrize("user_input", [
+        "Book a table for 4 at 8pm",
+        "Book a table for dinner and drinks",
+    ])
+    def test_single_intent_passes_through_whole(self, local_processor, user_input):
+        """Test a single-intent request comes back as one sub-request holding the original input"""
+        with patch("app.main.intent_processor", local_processor):
+            response = TestClient(app).post("/process/multi", json={"user_input": user_input})
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert body["sub_requests"] == [user_input]
+        assert len(body["responses"]) == 1
+        assert body["responses"][0]["intent_category"] == "dining"
+    
+    def test_missing_user_input_rejected(self, local_processor):
+        """Test the request body is validated"""
+        with patch("app.main.intent_processor", local_processor):
+            response = TestClient(app).post("/process/multi", json={})
+        
+        assert response.status_code == 422
+
+class TestBatchEndpoint:
+    """Test cases for POST /process/batch"""
+    
+    @pytest.fixture
+    def batch_processor(self):
+        """IntentProcessor with a mocked async LLM client, packing two inputs per call"""
+        with patch('app.services.intent_processor.AzureOpenAI'), \
+             patch('app.services.intent_processor.AsyncAzureOpenAI') as mock_async_client, \
+             patch('app.services.intent_processor.WebSearchService'):
+            mock_async_client.return_value.chat.completions.create = AsyncMock()
+            processor = IntentProcessor(
+                azure_endpoint="https://test.openai.azure.com/",
+                azure_api_key="test-key",
+                azure_deployment="test-deployment",
+                batch_size=2
+            )
+            yield processor, mock_async_client.return_value.chat.completions.create
+    
+    @staticmethod
+    def _completion(content):
+        completion = Mock()
+        completion.choices = [Mock()]
+        completion.choices[0].message.content = content
+        return completion
+    
+    def test_responses_returned_per_input_in_order(self, batch_processor):
+        """Test the response holds one full response per input, in input order"""
+        processor, create = batch_processor
+        create.side_effect = [
+            self._completion(json.dumps([
+                {"index": 1, "intent_category": "cab_booking", "entities": {"destination": "airport"}, "confidence_score": 0.9},
+                {"index": 2, "intent_category": "dining", "entities": {"party_size": 4}, "confidence_score": 0.8},
+            ])),
+            self._completion(json.dumps([
+                {"index": 1, "intent_category": "gifting", "entities": {}, "confidence_score": 0.85},
+            ])),
+        ]
+        
+        with patch("app.main.intent_processor", processor):
+            response = TestClient(app).post("/process/batch", json={
+                "user_inputs": ["Cab to the airport", "Table for 4", "Gift for mom"], "web_search": False
+            })
+        
+        assert response.status_code == 200
+        body = response.json()
+        assert body.keys() == {"responses"}
+        assert [r["intent_category"] for r in body["responses"]] == ["cab_booking", "dining", "gifting"]
+        assert body["responses"][0]["entities"]["destination"] == "airport"
+        assert set(body["responses"][1]) >= {"intent_category", "entities", "confidence_score", "follow_up_questions"}
+        assert create.call_count == 2
+    
+    def test_failing_input_does_not_fail_the_batch(self, batch_processor):
+        """Test an input whose own call fails gets the fallback response while the others succeed"""
+        processor, create = batch_processor
+        async def respond(**kwargs):
+            content = kwargs["messages"][-1]["content"]
+            if '1. "' in content:
+                return self._completion("Not a JSON array")
+            if "Gift for mom" in content:
+                return self._completion("Not JSON either")
+            return self._completion(json.dumps({"intent_category": "dining", "entities": {}, "confidence_score": 0.9}))
+        create.side_effect = respond
+        
+        with patch("app.main.intent_processor", processor):
+            response = TestClient(app).post("/process/batch", json={
+                "user_inputs": ["Table for 4", "Gift for mom"], "web_search": False
+            })
+        
+        assert response.status_code == 200
+        responses = response.json()["responses"]
+        assert responses[0]["intent_category"] == "dining"
+        assert responses[1]["intent_category"] == "other"
+        assert responses[1]["confidence_score"] == 0.0
+        assert create.await_count == 3
+    
+    def test_oversized_batch_rejected(self, batch_processor):
+        """Test a batch over MAX_BATCH_INPUTS is refused before any LLM call"""
+        processor, create = batch_processor
+        
+        with patch("app.main.intent_processor", processor), patch("app.main.MAX_BATCH_INPUTS", 2):
+            response = TestClient(app).post("/process/batch", json={"user_inputs": ["Table for 4"] * 3})
+        
+        assert response.status_code == 413
+        create.assert_not_called()
+    
+    @pytest.mark.parametrize("body", [{}, {"user_inputs": "Table for 4"}, {"user_inputs": ["Table for 4"], "web_search": "sometimes"}])
+    def test_invalid_request_body_rejected(self, batch_processor, body):
+        """Test the request schema is validated"""
+        processor, _ = batch_processor
+        
+        with patch("app.main.intent_processor", processor):
+            response = TestClient(app).post("/process/batch", json=body)
+        
+        assert response.status_code == 422
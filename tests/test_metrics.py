@@ -0,0 +1,134 @@
+import json
+import pytest
+import httpx
+import openai
+from unittest.mock import Mock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import metrics
+from app.services.intent_processor import IntentProcessor
+from app.services.local_classifier import LocalIntentClassifier
+from app.services.metrics import MetricsRegistry
+from app.services.resilience import LLMResilience
+
+class TestMetricsRegistry:
+    """Test cases for the Prometheus-style metrics registry"""
+    
+    def test_disabled_registry_records_nothing(self):
+        """Test disabled metrics are no-ops"""
+        registry = MetricsRegistry(enabled=False)
+        counter = registry.counter("requests_total", "Requests")
+        histogram = registry.histogram("latency_seconds", "Latency", ["stage"])
+        
+        counter.inc()
+        with histogram.time("llm"):
+            pass
+        
+        assert counter.value() == 0
+        assert histogram.count("llm") == 0
+    
+    def test_render_prometheus_text(self):
+        """Test counters and histograms render in the exposition format"""
+        registry = MetricsRegistry(enabled=True)
+        counter = registry.counter("failures_total", "Failures", ["call"])
+        histogram = registry.histogram("latency_seconds", "Latency", ["stage"], buckets=(0.1, 1.0))
+        
+        counter.inc("parse", amount=2)
+        histogram.observe(0.05, "llm")
+        histogram.observe(0.5, "llm")
+        histogram.observe(5.0, "llm")
+        text = registry.render()
+        
+        assert '# TYPE failures_total counter' in text
+        assert 'failures_total{call="parse"} 2.0' in text
+        assert 'latency_seconds_bucket{stage="llm",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{stage="llm",le="1.0"} 2' in text
+        assert 'latency_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{stage="llm"} 3' in text
+
+@pytest.fixture
+def enabled_metrics():
+    """Enable the process-wide registry for one test"""
+    metrics.REGISTRY.reset()
+    metrics.REGISTRY.enabled = True
+    yield metrics
+    metrics.REGISTRY.enabled = False
+    metrics.REGISTRY.reset()
+
+def test_processor_records_stage_latency_tokens_and_failures(enabled_metrics):
+    """Test the pipeline records per-stage latency, tokens, parse failures and fallbacks"""
+    with patch('app.services.intent_processor.AzureOpenAI') as mock_client, \
+         patch('app.services.intent_processor.WebSearchService'):
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment"
+        )
+        good = Mock()
+        good.choices = [Mock()]
+        good.choices[0].message.content = json.dumps({"intent_category": "dining", "entities": {}, "confidence_score": 0.9})
+        good.usage.prompt_tokens = 300
+        good.usage.completion_tokens = 40
+        bad = Mock()
+        bad.choices = [Mock()]
+        bad.choices[0].message.content = "not json"
+        mock_client.return_value.chat.completions.create.side_effect = [good, bad]
+        
+        processor.process_user_input("Table for two")
+        processor.process_user_input("???")
+    
+    assert enabled_metrics.STAGE_LATENCY.count("llm_classification") == 2
+    assert enabled_metrics.STAGE_LATENCY.count("parse") == 2
+    assert enabled_metrics.REQUEST_LATENCY.count("dining") == 1
+    assert enabled_metrics.LLM_TOKENS.value("classification", "prompt") == 300
+    assert enabled_metrics.LLM_TOKENS.value("classification", "completion") == 40
+    assert enabled_metrics.PARSE_FAILURES.value("classification") == 1
+    assert enabled_metrics.FALLBACK_RESPONSES.value() == 1
+
+def test_degraded_response_counted_as_fallback(enabled_metrics):
+    """Test a local answer given because the LLM failed counts as both degraded and fallback"""
+    with patch('app.services.intent_processor.AzureOpenAI') as mock_client, \
+         patch('app.services.intent_processor.WebSearchService'):
+        processor = IntentProcessor(
+            azure_endpoint="https://test.openai.azure.com/",
+            azure_api_key="test-key",
+            azure_deployment="test-deployment",
+            local_classifier=LocalIntentClassifier(threshold=0.99),
+            resilience=LLMResilience(max_attempts=1, backoff_initial=0)
+        )
+        mock_client.return_value.chat.completions.create.side_effect = openai.APIConnectionError(
+            request=httpx.Request("POST", "https://test.openai.azure.com/")
+        )
+        
+        result = processor.process_user_input("Looking for a restaurant with dinner for 2")
+    
+    assert result.confidence_score > 0.0
+    assert enabled_metrics.DEGRADED_RESPONSES.value() == 1
+    assert enabled_metrics.FALLBACK_RESPONSES.value() == 1
+
+class TestMetricsEndpoint:
+    """Test cases for GET /metrics"""
+    
+    def test_exposition_format_and_content_type(self, enabled_metrics):
+        """Test the endpoint serves the process registry as Prometheus text"""
+        enabled_metrics.FALLBACK_RESPONSES.inc()
+        enabled_metrics.STAGE_LATENCY.observe(0.02, "parse")
+        
+        response = TestClient(app).get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = response.text.splitlines()
+        assert "# TYPE assistant_fallback_responses_total counter" in lines
+        assert "# TYPE assistant_stage_duration_seconds histogram" in lines
+        assert "assistant_fallback_responses_total 1.0" in lines
+        assert any(line.startswith("# HELP assistant_fallback_responses_total ") for line in lines)
+        assert any(line.startswith('assistant_stage_duration_seconds_count{stage="parse"} 1') for line in lines)
+        assert all(line.startswith("#") or len(line.rsplit(" ", 1)) == 2 for line in lines)
+    
+    def test_disabled_metrics_not_found(self):
+        """Test the endpoint is hidden when metrics are disabled"""
+        with patch.object(metrics.REGISTRY, "enabled", False):
+            response = TestClient(app).get("/metrics")
+        
+        assert response.status_code == 404
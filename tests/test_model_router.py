@@ -0,0 +1,50 @@
+from unittest.mock import Mock
+import pytest
+from app.models import AssistantResponse, EntityModel, IntentCategory
+from app.services.model_router import ModelRouter, ModelTier
+
+def response(intent, confidence):
+    return AssistantResponse(intent_category=intent, entities=EntityModel(), confidence_score=confidence, follow_up_questions=[])
+
+def usage(prompt_tokens, completion_tokens):
+    completion = Mock()
+    completion.usage.prompt_tokens = prompt_tokens
+    completion.usage.completion_tokens = completion_tokens
+    return completion
+
+class TestModelRouter:
+    """Test cases for tiered deployment routing"""
+    
+    def test_escalation_uses_per_intent_thresholds(self):
+        """Test the confidence threshold can differ by intent"""
+        router = ModelRouter([ModelTier("small"), ModelTier("large")], default_threshold=0.7, thresholds={"other": 0.5})
+        
+        assert router.should_escalate(response(IntentCategory.DINING, 0.6))
+        assert not router.should_escalate(response(IntentCategory.DINING, 0.7))
+        assert not router.should_escalate(response(IntentCategory.OTHER, 0.6))
+    
+    def test_tier_stats_report_latency_escalations_and_cost(self):
+        """Test per-tier latency, escalation rate and token cost"""
+        router = ModelRouter([ModelTier("small", 0.001, 0.002), ModelTier("large", 0.01, 0.03)])
+        router.record_call("small", 0.2, usage(1000, 500))
+        router.record_call("small", 0.4, usage(1000, 500))
+        router.record_escalation("small", "low_confidence")
+        router.record_answer("small")
+        router.record_call("large", 1.0, usage(2000, 1000))
+        router.record_answer("large")
+        router.record_call("unrelated", 1.0, usage(5000, 5000))
+        
+        small, large = router.stats()["tiers"]
+        
+        assert small["calls"] == 2
+        assert small["escalation_rate"] == 0.5
+        assert small["escalations"] == {"low_confidence": 1}
+        assert small["p50_ms"] == 400.0
+        assert small["cost_usd"] == pytest.approx(0.004)
+        assert large["escalation_rate"] == 0.0
+        assert router.stats()["total_cost_usd"] == pytest.approx(0.054)
+    
+    def test_requires_a_tier(self):
+        """Test a router without deployments is rejected"""
+        with pytest.raises(ValueError):
+            ModelRouter([])
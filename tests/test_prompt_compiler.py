@@ -0,0 +1,100 @@
+from app.utils.prompt_compiler import PromptCompiler, TokenCounter
+from app.utils.prompt_templates import COMPACT_CLASSIFICATION_SYSTEM_PROMPT
+
+class WordCounter(TokenCounter):
+    """Deterministic one-token-per-word counter"""
+    
+    def count(self, text):
+        return len(text.split())
+    
+    def truncate(self, text, max_tokens):
+        return " ".join(text.split()[:max_tokens])
+
+class TestTokenCounter:
+    """Test cases for token counting"""
+    
+    def test_count_and_truncate(self):
+        """Test counts grow with text and truncation respects the limit"""
+        counter = TokenCounter()
+        text = "Book a cab to the airport tomorrow morning " * 20
+        
+        assert counter.count("") == 0
+        assert counter.count(text) > counter.count("Book a cab")
+        assert counter.count(counter.truncate(text, 10)) <= 10
+        assert counter.truncate("short", 10) == "short"
+
+class TestPromptCompiler:
+    """Test cases for compact, token-budgeted prompts"""
+    
+    def test_static_prefix_is_shared(self):
+        """Test every call starts with the same system message and carries only the input"""
+        compiler = PromptCompiler()
+        first = compiler.messages("Table for two tonight")
+        second = compiler.messages("Cab to the airport")
+        
+        assert first[0] == second[0]
+        assert first[0]["content"] == COMPACT_CLASSIFICATION_SYSTEM_PROMPT
+        assert first[1]["content"] == 'User Input: "Table for two tonight"'
+        assert "search_queries" in compiler.messages("x", with_search=True)[0]["content"]
+        assert compiler.compiled_prompts == 3
+    
+    def test_long_input_is_truncated_to_budget(self):
+        """Test inputs are cut so the whole prompt fits max_input_tokens"""
+        counter = WordCounter()
+        compiler = PromptCompiler(max_input_tokens=400, token_counter=counter)
+        
+        messages = compiler.messages("word " * 1000)
+        
+        assert counter.count_messages(messages) <= 400
+        assert compiler.truncated_inputs == 1
+        assert compiler.messages("short input")[1]["content"] == 'User Input: "short input"'
+        assert compiler.truncated_inputs == 1
+    
+    def test_tiny_budget_keeps_some_input(self):
+        """Test a budget smaller than the static prompt still leaves room for the input"""
+        compiler = PromptCompiler(max_input_tokens=10, token_counter=WordCounter())
+        
+        assert "Book a cab" in compiler.messages("Book a cab " + "please " * 200)[1]["content"]
+    
+    def test_examples_count_against_budget_and_drop_first(self):
+        """Test few-shot examples fill only the budget the input leaves and the least similar go first"""
+        counter = WordCounter()
+        compiler = PromptCompiler(max_input_tokens=400, token_counter=counter)
+        static = counter.count_messages(compiler.messages(""))
+        examples = ["best " * 40, "second " * 40]
+        
+        roomy = compiler.messages("short input", examples=examples)
+        tight = compiler.messages("word " * (400 - static - 60), examples=examples)
+        full = compiler.messages("word " * 1000, examples=examples)
+        
+        assert "best" in roomy[1]["content"] and "second" in roomy[1]["content"]
+        assert "best" in tight[1]["content"] and "second" not in tight[1]["content"]
+        assert "best" not in full[1]["content"]
+        assert all(counter.count_messages(messages) <= 400 for messages in (roomy, tight, full))
+        assert full[0] == roomy[0]
+        assert compiler.dropped_examples == 3
+    
+    def test_batch_messages_number_inputs(self):
+        """Test batch prompts list each input once in order"""
+        messages = PromptCompiler().batch_messages(["Cab to the airport", "Gift for mom"])
+        
+        assert messages[1]["content"] == 'User Inputs:\n1. "Cab to the airport"\n2. "Gift for mom"'
+        assert '"index"' in messages[0]["content"]
+    
+    def test_prompt_version_tracks_budget(self):
+        """Test cache keys change with the prompt kind and the budget"""
+        compiler = PromptCompiler(max_input_tokens=500)
+        
+        assert compiler.prompt_version() != compiler.prompt_version(with_search=True)
+        assert compiler.prompt_version() != PromptCompiler(max_input_tokens=600).prompt_version()
+    
+    def test_savings_report(self):
+        """Test the compact templates use fewer tokens than the original ones"""
+        compiler = PromptCompiler(token_counter=WordCounter())
+        
+        report = compiler.savings_report("Need a sunset-view table for two tonight")
+        
+        for kind in ("classification", "classification_with_search", "batch_classification"):
+            assert report[kind]["compact_tokens"] < report[kind]["legacy_tokens"]
+            assert report[kind]["saved_tokens"] == report[kind]["legacy_tokens"] - report[kind]["compact_tokens"]
+        assert compiler.stats()["static_prompt_savings"]["classification"]["saved_fraction"] > 0
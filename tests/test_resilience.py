@@ -0,0 +1,194 @@
+import pytest
+import asyncio
+import threading
+import httpx
+import openai
+from unittest.mock import Mock
+from app.services.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, LLMResilience, is_retryable
+
+REQUEST = httpx.Request("POST", "https://test.openai.azure.com/chat/completions")
+
+def connection_error():
+    return openai.APIConnectionError(request=REQUEST)
+
+def status_error(status):
+    return openai.APIStatusError("error", response=httpx.Response(status, request=REQUEST), body=None)
+
+class FakeClock:
+    """Manually advanced clock for breaker tests"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestRetryableErrors:
+    """Test cases for transient error classification"""
+    
+    def test_classification(self):
+        """Test connection, throttling and server errors are retried but client errors are not"""
+        assert is_retryable(connection_error())
+        assert is_retryable(status_error(429))
+        assert is_retryable(status_error(503))
+        assert not is_retryable(status_error(400))
+        assert not is_retryable(ValueError("bad content"))
+
+class TestCircuitBreaker:
+    """Test cases for the circuit breaker state machine"""
+    
+    def test_opens_on_failure_rate_and_recovers(self):
+        """Test the breaker opens, rejects, probes once and closes on success"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_rate=0.5, window=4, min_calls=4, reset_timeout=10.0, clock=clock)
+        for _ in range(2):
+            breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow()
+        
+        clock.now = 10.0
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_success()
+        
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.stats() == {"state": "closed", "trips": 1, "rejections": 2}
+    
+    def test_failed_probe_reopens(self):
+        """Test a failed half-open probe opens the breaker again"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_rate=0.5, window=2, min_calls=2, reset_timeout=5.0, clock=clock)
+        breaker.record_failure()
+        breaker.record_failure()
+        clock.now = 5.0
+        assert breaker.allow()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.trips == 2
+
+    def test_cancelled_probe_released(self):
+        """Test a cancelled half-open probe lets the next call probe instead of rejecting forever"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_rate=0.5, window=2, min_calls=2, reset_timeout=5.0, clock=clock)
+        breaker.record_failure()
+        breaker.record_failure()
+        clock.now = 5.0
+        resilience = LLMResilience(max_attempts=1, breaker=breaker)
+        async def hang():
+            await asyncio.sleep(10)
+        async def ok():
+            return "ok"
+        
+        async def cancel_probe_then_call():
+            probe = asyncio.create_task(resilience.acall(hang))
+            await asyncio.sleep(0)
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+            return await resilience.acall(ok)
+        
+        assert asyncio.run(cancel_probe_then_call()) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+class TestLLMResilience:
+    """Test cases for retries and hedging"""
+    
+    def test_retries_transient_errors(self):
+        """Test transient errors are retried until success"""
+        resilience = LLMResilience(max_attempts=3, backoff_initial=0)
+        request = Mock(side_effect=[connection_error(), status_error(500), "ok"])
+        
+        assert resilience.call(request) == "ok"
+        assert request.call_count == 3
+        assert resilience.retries == 2
+    
+    def test_does_not_retry_client_errors(self):
+        """Test non-transient errors are raised immediately"""
+        resilience = LLMResilience(max_attempts=3, backoff_initial=0)
+        request = Mock(side_effect=status_error(400))
+        
+        with pytest.raises(openai.APIStatusError):
+            resilience.call(request)
+        assert request.call_count == 1
+    
+    def test_open_breaker_stops_retries(self):
+        """Test a breaker that opens mid-retry ends the call with CircuitOpenError"""
+        breaker = CircuitBreaker(failure_rate=0.5, window=2, min_calls=2, reset_timeout=60.0)
+        resilience = LLMResilience(max_attempts=5, backoff_initial=0, breaker=breaker)
+        request = Mock(side_effect=connection_error())
+        
+        with pytest.raises(CircuitOpenError):
+            resilience.call(request)
+        assert request.call_count == 2
+        assert resilience.stats()["circuit_breaker"]["state"] == "open"
+    
+    def test_async_retries(self):
+        """Test the async path retries transient errors"""
+        resilience = LLMResilience(max_attempts=2, backoff_initial=0)
+        attempts = []
+        async def request():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise connection_error()
+            return "ok"
+        
+        assert asyncio.run(resilience.acall(request)) == "ok"
+        assert resilience.retries == 1
+    
+    def test_hedged_request_wins_when_primary_is_slow(self):
+        """Test a slow request is hedged once it exceeds the p95 latency"""
+        latency = LatencyTracker(min_samples=1)
+        latency.observe(0.01)
+        resilience = LLMResilience(hedge=True, hedge_min_delay=0.01, latency=latency)
+        release = threading.Event()
+        calls = []
+        def request():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(2)
+                return "slow"
+            return "fast"
+        
+        try:
+            assert resilience.call(request) == "fast"
+        finally:
+            release.set()
+            resilience.close()
+        assert resilience.hedged_requests == 1
+        assert resilience.hedge_wins == 1
+    
+    def test_async_hedge_cancels_loser(self):
+        """Test the async hedge returns the first result and cancels the other request"""
+        latency = LatencyTracker(min_samples=1)
+        latency.observe(0.01)
+        resilience = LLMResilience(hedge=True, hedge_min_delay=0.01, latency=latency)
+        cancelled = []
+        calls = []
+        async def request():
+            calls.append(1)
+            if len(calls) == 1:
+                try:
+                    await asyncio.sleep(2)
+                except asyncio.CancelledError:
+                    cancelled.append(1)
+                    raise
+                return "slow"
+            return "fast"
+        
+        assert asyncio.run(resilience.acall(request)) == "fast"
+        resilience.close()
+        assert cancelled == [1]
+        assert resilience.hedge_wins == 1
+    
+    def test_no_hedging_without_latency_data(self):
+        """Test hedging waits until enough latencies have been observed"""
+        resilience = LLMResilience(hedge=True, latency=LatencyTracker(min_samples=5))
+        
+        assert resilience.call(lambda: "ok") == "ok"
+        assert resilience.hedged_requests == 0
+        resilience.close()
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app import server
+from app.main import app
+
+class TestServerLauncher:
+    """Test cases for the multi-worker launcher"""
+    
+    def test_default_workers(self):
+        """Test WEB_CONCURRENCY wins over the CPU count"""
+        with patch.dict(os.environ, {"WEB_CONCURRENCY": "3"}):
+            assert server.default_workers() == 3
+        with patch.dict(os.environ, {}, clear=True):
+            assert server.default_workers() >= 1
+    
+    def test_multiple_workers_share_sqlite_state(self):
+        """Test caches and sessions default to SQLite with several workers, keeping explicit settings"""
+        with patch.dict(os.environ, {"SESSION_STORE_BACKEND": "memory"}, clear=True):
+            server.share_state_between_workers(4)
+            assert os.environ["INTENT_CACHE_BACKEND"] == "sqlite"
+            assert os.environ["WEB_SEARCH_CACHE_BACKEND"] == "sqlite"
+            assert os.environ["SESSION_STORE_BACKEND"] == "memory"
+    
+    def test_single_worker_keeps_defaults(self):
+        """Test a single worker leaves the in-memory defaults alone"""
+        with patch.dict(os.environ, {}, clear=True):
+            server.share_state_between_workers(1)
+            assert "INTENT_CACHE_BACKEND" not in os.environ
+    
+    def test_preload_creates_shared_tables(self, tmp_path):
+        """Test preloading creates the SQLite files before workers start"""
+        env = {
+            "INTENT_CACHE_BACKEND": "sqlite",
+            "INTENT_CACHE_PATH": str(tmp_path / "intent.db"),
+            "WEB_SEARCH_CACHE_BACKEND": "none",
+            "SESSION_STORE_BACKEND": "sqlite",
+            "SESSION_STORE_PATH": str(tmp_path / "sessions.db"),
+        }
+        with patch.dict(os.environ, env):
+            server.preload()
+        
+        assert (tmp_path / "intent.db").exists()
+        assert (tmp_path / "sessions.db").exists()
+
+class TestLifespan:
+    """Test cases for building the processor at startup"""
+    
+    def test_processor_built_on_startup_and_closed_on_shutdown(self):
+        """Test each worker builds its processor in lifespan rather than at import"""
+        env = {
+            "AZURE_OPENAI_ENDPOINT": "https://test.openai.azure.com/",
+            "AZURE_OPENAI_API_KEY": "test-key",
+            "AZURE_OPENAI_DEPLOYMENT_NAME": "test-deployment",
+            "INTENT_CACHE_BACKEND": "memory",
+            "WEB_SEARCH_CACHE_BACKEND": "memory",
+            "SESSION_STORE_BACKEND": "memory",
+        }
+        import app.main as main
+        assert main.intent_processor is None
+        with patch.dict(os.environ, env), TestClient(app) as client:
+            assert main.intent_processor is not None
+            assert client.get("/stats").status_code == 200
+        assert main.intent_processor is None
+    
+    def test_missing_configuration_fails_startup(self):
+        """Test startup fails instead of serving with no processor"""
+        with patch.dict(os.environ, {"AZURE_OPENAI_ENDPOINT": ""}), pytest.raises(ValueError):
+            with TestClient(app):
+                pass
+
+class TestStartupImports:
+    """Test cases for keeping heavy modules out of the app import"""
+    
+    def test_import_skips_heavy_modules(self):
+        """Test importing the app loads no LLM, search, tokenizer or HTTP client library"""
+        heavy = ["openai", "duckduckgo_search", "tiktoken", "tenacity", "httpx"]
+        code = f"import sys, app.main; print([m for m in {heavy!r} if m in sys.modules])"
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, check=True
+        ).stdout
+        
+        assert output.strip() == "[]"
@@ -0,0 +1,58 @@
+import pytest
+from app.models import AssistantResponse, IntentCategory, EntityModel, WebSearchResult
+from app.services.cache import InMemoryCache
+from app.services.session_store import SessionStore, create_session_store
+
+class TestSessionStore:
+    """Test cases for conversation session storage"""
+    
+    @pytest.fixture(params=["memory", "sqlite"])
+    def store(self, request, tmp_path):
+        """Session stores of either backend"""
+        store = create_session_store(request.param, max_sessions=10, ttl_seconds=60.0, path=str(tmp_path / "sessions.db"))
+        yield store
+        store.close()
+    
+    def test_round_trip_drops_search_results(self, store):
+        """Test saved state round-trips without web search results"""
+        response = AssistantResponse(
+            intent_category=IntentCategory.DINING,
+            entities=EntityModel(location="Goa", party_size=2),
+            confidence_score=0.9,
+            follow_up_questions=["What time?"],
+            web_search_results=[WebSearchResult(title="t", url="https://example.com", snippet="s")],
+            session_id="abc"
+        )
+        store.save("abc", response)
+        
+        loaded = store.load("abc")
+        assert loaded.intent_category == IntentCategory.DINING
+        assert loaded.entities.party_size == 2
+        assert loaded.follow_up_questions == ["What time?"]
+        assert loaded.web_search_results is None
+        assert store.load("missing") is None
+    
+    def test_unreadable_state_is_ignored(self):
+        """Test corrupt entries load as a fresh session"""
+        backend = InMemoryCache(max_size=10, ttl_seconds=60.0)
+        backend.set("abc", "not json")
+        
+        assert SessionStore(backend).load("abc") is None
+    
+    def test_stats_count_turns(self, store):
+        """Test stats include incremental and new-session counts"""
+        store.record_turn(incremental=False)
+        store.record_turn(incremental=True)
+        store.record_turn(incremental=True)
+        
+        stats = store.stats()
+        assert stats["new_sessions"] == 1
+        assert stats["incremental_turns"] == 2
+    
+    def test_disabled(self):
+        """Test the none backend disables sessions"""
+        assert create_session_store("none") is None
+    
+    def test_new_session_ids_are_unique(self):
+        """Test generated session ids do not collide"""
+        assert SessionStore.new_session_id() != SessionStore.new_session_id()
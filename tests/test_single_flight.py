@@ -0,0 +1,105 @@
+import pytest
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.services.single_flight import SingleFlight
+
+class TestSingleFlight:
+    """Test cases for request coalescing"""
+    
+    def test_concurrent_callers_share_one_call(self):
+        """Test blocking callers with the same key run the function once"""
+        flight = SingleFlight("test")
+        calls = []
+        def work():
+            calls.append(1)
+            time.sleep(0.2)
+            return "result"
+        
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(lambda _: flight.do("key", work), range(5)))
+        
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert flight.stats() == {"calls": 1, "coalesced": 4, "coalesced_fraction": 0.8}
+    
+    def test_different_keys_and_later_calls_are_not_shared(self):
+        """Test only concurrent callers with equal keys are coalesced"""
+        flight = SingleFlight("test")
+        
+        assert flight.do("a", lambda: 1) == 1
+        assert flight.do("a", lambda: 2) == 2
+        assert flight.do("b", lambda: 3) == 3
+        assert flight.coalesced == 0
+    
+    def test_errors_reach_every_caller(self):
+        """Test followers receive the leader's exception"""
+        flight = SingleFlight("test")
+        started = threading.Event()
+        def fail():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("upstream down")
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, "key", fail)
+            started.wait(1)
+            follower = executor.submit(flight.do, "key", fail)
+            with pytest.raises(RuntimeError):
+                leader.result()
+            with pytest.raises(RuntimeError):
+                follower.result()
+        assert flight.coalesced == 1
+    
+    def test_async_callers_share_one_call(self):
+        """Test async callers share one task"""
+        flight = SingleFlight("test")
+        calls = []
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+        
+        async def run():
+            return await asyncio.gather(*(flight.ado("key", work) for _ in range(10)))
+        
+        assert asyncio.run(run()) == ["result"] * 10
+        assert len(calls) == 1
+        assert flight.coalesced == 9
+    
+    def test_cancelled_caller_does_not_cancel_shared_call(self):
+        """Test cancelling the first caller leaves the shared call running for the others"""
+        flight = SingleFlight("test")
+        async def work():
+            await asyncio.sleep(0.05)
+            return "result"
+        
+        async def run():
+            first = asyncio.ensure_future(flight.ado("key", work))
+            await asyncio.sleep(0)
+            second = asyncio.ensure_future(flight.ado("key", work))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+        
+        assert asyncio.run(run()) == "result"
+    
+    def test_shared_call_cancelled_with_its_last_caller(self):
+        """Test the shared call is cancelled once every caller waiting on it has been"""
+        flight = SingleFlight("test")
+        finished = []
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.append(True)
+        
+        async def run():
+            callers = [asyncio.ensure_future(flight.ado("key", work)) for _ in range(2)]
+            await asyncio.sleep(0)
+            for caller in callers:
+                caller.cancel()
+            await asyncio.sleep(0.1)
+        
+        asyncio.run(run())
+        
+        assert finished == []
@@ -0,0 +1,52 @@
+import pytest
+from app.models import LLMClassification, IntentCategory
+from app.utils.structured_output import JSONStreamExtractor, classification_response_format, extract_json
+
+class TestJSONStreamExtractor:
+    """Test cases for incremental JSON extraction"""
+    
+    def test_values_complete_across_chunks(self):
+        """Test a value split over several chunks is returned once complete"""
+        extractor = JSONStreamExtractor()
+        
+        assert extractor.feed('Sure! Here it is: {"a": {"b"') == []
+        assert extractor.feed(': 1}, "c": "}"') == []
+        assert extractor.feed('} and {"d": 2} trailing') == ['{"a": {"b": 1}, "c": "}"}', '{"d": 2}']
+    
+    def test_escaped_quotes_in_strings(self):
+        """Test escaped quotes do not end a string early"""
+        assert JSONStreamExtractor().feed(r'{"a": "say \"}\" now"}') == [r'{"a": "say \"}\" now"}']
+    
+    def test_arrays(self):
+        """Test array extraction for batch responses"""
+        assert JSONStreamExtractor("[").feed('Results:\n[{"index": 1}, {"index": 2}]') == ['[{"index": 1}, {"index": 2}]']
+
+class TestExtractJSON:
+    """Test cases for recovering JSON from noisy LLM output"""
+    
+    def test_recovers_object_from_prose_and_fences(self):
+        """Test prose and code fences around the payload are ignored"""
+        text = 'Here is the result {as requested}:\n```json\n{"intent_category": "travel", "confidence_score": 0.8}\n```\nHope this helps!'
+        
+        result = extract_json(text, LLMClassification.model_validate_json)
+        
+        assert result.intent_category == IntentCategory.TRAVEL
+        assert result.confidence_score == 0.8
+    
+    def test_raises_when_nothing_valid(self):
+        """Test a response without valid JSON raises ValueError"""
+        with pytest.raises(ValueError):
+            extract_json("I cannot help with that {sorry}", LLMClassification.model_validate_json)
+
+class TestResponseFormat:
+    """Test cases for structured output request parameters"""
+    
+    def test_modes(self):
+        """Test each mode maps to the right response_format"""
+        assert classification_response_format("off") is None
+        assert classification_response_format("json_object") == {"type": "json_object"}
+        schema_format = classification_response_format("json_schema")
+        assert schema_format["type"] == "json_schema"
+        assert "intent_category" in schema_format["json_schema"]["schema"]["properties"]
+        with pytest.raises(ValueError):
+            classification_response_format("yaml")
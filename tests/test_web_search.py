@@ -0,0 +1,234 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+from app.models import WebSearchResult
+from app.services.web_search import WebSearchService
+from app.services.cache import InMemoryCache, SQLiteCache
+
+def make_result(url):
+    return WebSearchResult(title=url, url=url, snippet="")
+
+class TestWebSearchService:
+    """Test cases for WebSearchService multi-search fan-out"""
+    
+    def test_multi_search_runs_queries_concurrently(self):
+        """Test queries run in parallel rather than back to back"""
+        service = WebSearchService()
+        def slow_search(query, max_results=5):
+            time.sleep(0.2)
+            return [make_result(f"https://example.com/{query}")]
+        
+        with patch.object(service, "search", side_effect=slow_search):
+            start = time.perf_counter()
+            results = service.multi_search(["a", "b", "c"])
+            elapsed = time.perf_counter() - start
+        
+        assert [r.url for r in results] == ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+        assert elapsed < 0.5
+    
+    def test_multi_search_dedupes_and_truncates(self):
+        """Test duplicate URLs are dropped and only the top 5 are kept"""
+        service = WebSearchService()
+        def search(query, max_results=5):
+            return [make_result(f"https://example.com/{i}") for i in range(4)]
+        
+        with patch.object(service, "search", side_effect=search):
+            results = service.multi_search(["a", "b"])
+        
+        assert [r.url for r in results] == [f"https://example.com/{i}" for i in range(4)]
+        
+        with patch.object(service, "search", side_effect=lambda q, n=5: [make_result(f"https://{q}.com/{i}") for i in range(3)]):
+            assert len(service.multi_search(["a", "b", "c"])) == 5
+    
+    def test_multi_search_returns_partial_results_at_deadline(self):
+        """Test slow queries are dropped once the deadline passes"""
+        service = WebSearchService(deadline=0.2)
+        def search(query, max_results=5):
+            if query == "slow":
+                time.sleep(1.0)
+            return [make_result(f"https://example.com/{query}")]
+        
+        with patch.object(service, "search", side_effect=search):
+            start = time.perf_counter()
+            results = service.multi_search(["fast", "slow"])
+            elapsed = time.perf_counter() - start
+        
+        assert [r.url for r in results] == ["https://example.com/fast"]
+        assert elapsed < 0.5
+    
+    def test_async_multi_search_applies_per_query_timeout(self):
+        """Test the async fan-out drops queries that exceed the per-query timeout"""
+        service = WebSearchService(query_timeout=0.2, deadline=2.0)
+        def search(query, max_results=5):
+            if query == "slow":
+                time.sleep(0.6)
+            return [make_result(f"https://example.com/{query}")]
+        
+        with patch.object(service, "_fetch", side_effect=search):
+            start = time.perf_counter()
+            results = asyncio.run(service.amulti_search(["fast", "slow"]))
+            elapsed = time.perf_counter() - start
+        
+        assert [r.url for r in results] == ["https://example.com/fast"]
+        assert elapsed < 0.6
+    
+    def test_astream_multi_search_yields_as_queries_complete(self):
+        """Test incremental results are yielded in completion order"""
+        service = WebSearchService()
+        def search(query, max_results=5):
+            time.sleep(0.3 if query == "slow" else 0.0)
+            return [make_result(f"https://example.com/{query}")]
+        
+        async def collect():
+            return [[r.url for r in results] async for results in service.astream_multi_search(["slow", "fast"])]
+        
+        with patch.object(service, "_fetch", side_effect=search):
+            snapshots = asyncio.run(collect())
+        
+        assert snapshots == [
+            ["https://example.com/fast"],
+            ["https://example.com/fast", "https://example.com/slow"],
+        ]
+    
+    def test_abandoned_queries_do_not_starve_later_searches(self):
+        """Test queries still running after their timeout do not hold up the next fan-out"""
+        service = WebSearchService(query_timeout=0.1, deadline=1.0, max_workers=1, coalesce=False)
+        release = threading.Event()
+        def search(query, max_results=5):
+            if query.startswith("stuck"):
+                release.wait(2)
+            return [make_result(f"https://example.com/{query}")]
+        
+        with patch.object(service, "_fetch", side_effect=search):
+            assert asyncio.run(service.amulti_search(["stuck-1", "stuck-2"])) == []
+            start = time.perf_counter()
+            results = asyncio.run(service.amulti_search(["fresh"]))
+            elapsed = time.perf_counter() - start
+            release.set()
+        
+        assert [r.url for r in results] == ["https://example.com/fresh"]
+        assert elapsed < 0.5
+    
+    def test_ddgs_sessions_use_query_timeout_and_are_reused(self):
+        """Test each DDGS session gets the per-query timeout and is reused across queries"""
+        service = WebSearchService(query_timeout=0.5)
+        with patch("app.services.web_search.DDGS", create=True) as ddgs:
+            ddgs.return_value.text.return_value = [{"title": "t", "href": "https://a.com", "body": ""}]
+            service.search("a")
+            service.search("b")
+        
+        ddgs.assert_called_once_with(timeout=0.5)
+    
+    def test_async_search_counts_each_call_once(self):
+        """Test concurrent identical async searches are one coalescing call, not two"""
+        service = WebSearchService()
+        def search(query, max_results=5):
+            time.sleep(0.1)
+            return [make_result(f"https://example.com/{query}")]
+        
+        async def search_twice():
+            return await asyncio.gather(service.asearch("visa"), service.asearch("visa"))
+        
+        with patch.object(service, "_fetch", side_effect=search) as fetch:
+            first, second = asyncio.run(search_twice())
+        
+        assert first == second
+        assert fetch.call_count == 1
+        assert service.stats()["coalescing"] == {"calls": 1, "coalesced": 1, "coalesced_fraction": 0.5}
+
+class FakeClock:
+    """Manually advanced clock for cache tests"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class TestWebSearchCache:
+    """Test cases for the stale-while-revalidate search cache"""
+    
+    def make_service(self, tmp_path=None):
+        clock = FakeClock()
+        if tmp_path is None:
+            cache = InMemoryCache(max_size=10, ttl_seconds=100.0, clock=clock)
+        else:
+            cache = SQLiteCache(str(tmp_path / "search.db"), max_size=10, ttl_seconds=100.0, clock=clock, table="web_search")
+        return WebSearchService(cache=cache, fresh_seconds=10.0), clock
+    
+    def test_fresh_hits_skip_the_search(self):
+        """Test repeated and re-phrased queries are answered from the cache"""
+        service, clock = self.make_service()
+        fetches = []
+        def fetch(query, max_results):
+            fetches.append(query)
+            return [make_result(f"https://example.com/{len(fetches)}")]
+        
+        with patch.object(service, "_fetch", side_effect=fetch):
+            first = service.search("How to update Aadhar address", 3)
+            second = service.search("how to update aadhar address?", 3)
+            other_size = service.search("How to update Aadhar address", 5)
+        
+        assert first == second
+        assert other_size != first
+        assert len(fetches) == 2
+        service.close()
+    
+    def test_stale_entries_are_served_then_refreshed(self):
+        """Test stale results return immediately while a background search refreshes them"""
+        service, clock = self.make_service()
+        version = ["v1"]
+        with patch.object(service, "_fetch", side_effect=lambda q, n: [make_result(f"https://example.com/{version[0]}")]):
+            service.search("passport renewal")
+            version[0] = "v2"
+            clock.now += 20
+            
+            stale = service.search("passport renewal")
+            deadline = time.monotonic() + 2
+            while service._refreshing and time.monotonic() < deadline:
+                time.sleep(0.01)
+            refreshed = service.search("passport renewal")
+        
+        assert stale[0].url == "https://example.com/v1"
+        assert refreshed[0].url == "https://example.com/v2"
+        assert service.stats()["stale_served"] == 1
+        assert service.stats()["background_refreshes"] == 1
+        service.close()
+    
+    def test_failures_and_empty_results_are_not_cached(self):
+        """Test errors and empty results go back to the search next time"""
+        service, clock = self.make_service()
+        with patch.object(service, "_fetch", side_effect=[RuntimeError("rate limited"), [], [make_result("https://a.com")]]) as fetch:
+            assert service.search("q") == []
+            assert service.search("q") == []
+            assert len(service.search("q")) == 1
+            assert len(service.search("q")) == 1
+        
+        assert fetch.call_count == 3
+        service.close()
+    
+    def test_sqlite_cache_persists(self, tmp_path):
+        """Test results survive a restart with the sqlite backend"""
+        service, clock = self.make_service(tmp_path)
+        with patch.object(service, "_fetch", return_value=[make_result("https://a.com")]):
+            service.search("visa rules")
+        service.close()
+        
+        restarted, _ = self.make_service(tmp_path)
+        with patch.object(restarted, "_fetch") as fetch:
+            assert restarted.search("visa rules")[0].url == "https://a.com"
+        fetch.assert_not_called()
+        restarted.close()
+    
+    def test_async_hit_skips_the_executor(self):
+        """Test cached async searches return without a worker thread"""
+        service, clock = self.make_service()
+        with patch.object(service, "_fetch", return_value=[make_result("https://a.com")]):
+            service.search("q")
+        with patch.object(service._executor, "submit") as submit:
+            results = asyncio.run(service.asearch("q"))
+        
+        assert results[0].url == "https://a.com"
+        submit.assert_not_called()
+        service.close()